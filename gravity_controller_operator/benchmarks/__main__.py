@@ -0,0 +1,70 @@
+import argparse
+import json
+import sys
+
+from gravity_controller_operator.benchmarks.suite import compare, \
+    format_report, run_suite
+from gravity_controller_operator.simulators.registry import SIMULATORS
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Бенчмарк опроса и команд реле на локальных симуляторах "
+                    "устройств (python -m gravity_controller_operator.benchmarks)."
+    )
+    parser.add_argument("--models", nargs="+", choices=sorted(SIMULATORS),
+                        default=sorted(SIMULATORS), help="Модели контроллеров")
+    parser.add_argument("--devices", nargs="+", type=int,
+                        default=[1, 10, 100, 1000],
+                        help="Число устройств в замерах FleetOperator")
+    parser.add_argument("--fleet-models", nargs="*", default=None,
+                        help="Модели для замеров FleetOperator (по умолчанию все)")
+    parser.add_argument("--cycles", type=int, default=200, help="Циклов опроса")
+    parser.add_argument("--reads", type=int, default=10000, help="Вызовов get_points")
+    parser.add_argument("--commands", type=int, default=100, help="Команд реле")
+    parser.add_argument("--duration", type=float, default=3.0,
+                        help="Длительность замера FleetOperator, сек")
+    parser.add_argument("--max-workers", type=int, default=16)
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="Задержка ответа симулятора, сек")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Случайная добавка к задержке, сек")
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="Доля запросов без ответа")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Доля ответов с ошибкой протокола")
+    parser.add_argument("--reset-rate", type=float, default=0.0,
+                        help="Доля запросов с обрывом соединения")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", help="Сохранить результаты в файл")
+    parser.add_argument("--baseline", help="Сравнить с сохранённым прогоном")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Допустимое ухудшение относительно baseline")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    faults = dict(delay=args.delay, jitter=args.jitter,
+                  drop_rate=args.drop_rate, error_rate=args.error_rate,
+                  reset_rate=args.reset_rate, seed=args.seed)
+    results = run_suite(
+        [SIMULATORS[model](**faults) for model in args.models], args.devices,
+        fleet_models=args.fleet_models, cycles=args.cycles, reads=args.reads,
+        commands=args.commands, duration=args.duration,
+        max_workers=args.max_workers)
+    print(format_report(results))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nРегрессии относительно baseline:")
+            print("\n".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
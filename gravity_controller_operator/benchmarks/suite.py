@@ -0,0 +1,223 @@
+import itertools
+import threading
+import time
+
+from gravity_controller_operator.controller_factory import ControllerCreator
+from gravity_controller_operator.fleet import FleetOperator
+from gravity_controller_operator.main import ControllerOperator
+from gravity_controller_operator.metrics import percentiles
+
+
+# Метрики, где больше - лучше; у остальных (задержки) лучше меньше
+THROUGHPUT_KEYS = ("polls_per_sec", "commands_per_sec")
+
+
+def summarize(samples):
+    """
+    Перцентили (nearest rank), среднее и максимум выборки в секундах.
+    """
+    if not samples:
+        return {}
+    summary = percentiles(samples)
+    summary.update(mean=sum(samples) / len(samples), max=max(samples),
+                   count=len(samples))
+    return summary
+
+
+def timed(func, count, *args):
+    """
+    Длительности успешных вызовов и число ошибок (при неисправностях
+    симулятора вызовы могут завершаться исключением).
+    """
+    samples = []
+    errors = 0
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            func(*args)
+        except Exception:
+            errors += 1
+            continue
+        samples.append(time.perf_counter() - started)
+    return samples, errors
+
+
+def summarize_timed(timed_result):
+    samples, errors = timed_result
+    return dict(summarize(samples), errors=errors)
+
+
+def close_controller(controller):
+    """Закрыть соединения драйвера, чтобы не копить сокеты между замерами."""
+    interface = controller.interface
+    for part in (interface.di_interface, interface.relay_interface):
+        for attr in ("client", "controller"):
+            close = getattr(getattr(part, attr, None), "close", None)
+            if close:
+                close()
+    bus = getattr(controller, "bus", None)
+    if bus is not None:
+        bus.close()
+
+
+def first_relay(points):
+    return next(iter(points["relays"]))
+
+
+def bench_operator(simulator, cycles=200, reads=10000, commands=100):
+    """
+    Один ControllerOperator без фонового потока:
+    цикл опроса update_points(), чтение get_points() и команда реле.
+    """
+    controller = ControllerCreator.get_controller(
+        simulator.model, **simulator.controller_kwargs(0))
+    try:
+        operator = ControllerOperator(controller, auto_update_points=False,
+                                      update_cooldown=0)
+        poll = timed(operator.update_points, cycles)
+        get_points = timed(operator.get_points, reads)
+        channel = first_relay(operator.get_points())
+        states = itertools.cycle((1, 0))
+        command = timed(
+            lambda: operator.change_relay_state(channel, next(states)), commands)
+    finally:
+        close_controller(controller)
+    return {"poll": summarize_timed(poll),
+            "get_points": summarize_timed(get_points),
+            "command": summarize_timed(command)}
+
+
+def bench_fleet(simulator, devices, duration=3.0, max_workers=16,
+                command_interval=0.01):
+    """
+    devices устройств в одном FleetOperator с непрерывным опросом
+    (update_cooldown=0): опросов в секунду и задержка команд реле
+    на фоне опроса.
+    """
+    fleet = FleetOperator(max_workers=max_workers, update_cooldown=0)
+    names = []
+    try:
+        for i in range(devices):
+            name = f"{simulator.model}_{i}"
+            fleet.register(name, simulator.model, **simulator.controller_kwargs(i))
+            names.append(name)
+        channel = first_relay(fleet.get_controller_points(names[0]))
+        fleet.start()
+        stop = threading.Event()
+        command = []
+        command_errors = []
+
+        def send_commands():
+            for i in itertools.count():
+                if stop.wait(command_interval):
+                    return
+                started = time.perf_counter()
+                try:
+                    fleet.change_relay_state(names[i % devices], channel, i % 2)
+                except Exception:
+                    command_errors.append(i)
+                    continue
+                command.append(time.perf_counter() - started)
+
+        sender = threading.Thread(target=send_commands, daemon=True)
+        polls_before = sum(s["polls"] for s in fleet.get_stats().values())
+        started = time.perf_counter()
+        sender.start()
+        time.sleep(duration)
+        stats = fleet.get_stats()
+        elapsed = time.perf_counter() - started
+        stop.set()
+        sender.join()
+    finally:
+        fleet.stop()
+        for name in names:
+            close_controller(fleet.get_device(name).controller)
+    polls = sum(s["polls"] for s in stats.values()) - polls_before
+    return {
+        "devices": devices,
+        "polls_per_sec": polls / elapsed,
+        "commands_per_sec": len(command) / elapsed,
+        "errors": sum(s["errors"] for s in stats.values()),
+        "command_errors": len(command_errors),
+        "command": summarize(command),
+    }
+
+
+def run_suite(simulators, device_counts=(1, 10, 100, 1000), fleet_models=None,
+              cycles=200, reads=10000, commands=100, duration=3.0,
+              max_workers=16):
+    """
+    Полный прогон: bench_operator для каждого симулятора и bench_fleet
+    для fleet_models (по умолчанию - всех) на каждом числе устройств.
+    Возвращает {модель: {"operator": ..., "fleet": {N: ...}}}.
+    """
+    results = {}
+    for simulator in simulators:
+        with simulator:
+            result = results[simulator.model] = {
+                "operator": bench_operator(simulator, cycles, reads, commands)}
+            if fleet_models is not None and simulator.model not in fleet_models:
+                continue
+            result["fleet"] = {
+                str(devices): bench_fleet(simulator, devices, duration, max_workers)
+                for devices in device_counts}
+    return results
+
+
+def _flatten(results):
+    for model, result in results.items():
+        for metric, summary in result["operator"].items():
+            for key, value in summary.items():
+                yield f"{model}.operator.{metric}.{key}", value
+        for devices, fleet in result.get("fleet", {}).items():
+            for key in THROUGHPUT_KEYS:
+                yield f"{model}.fleet.{devices}.{key}", fleet[key]
+            for key, value in fleet["command"].items():
+                yield f"{model}.fleet.{devices}.command.{key}", value
+
+
+def compare(results, baseline, tolerance=0.25, min_delta=1e-4):
+    """
+    Сравнить с сохранённым прогоном: список регрессий больше tolerance
+    (задержки p50/p99 выросли или пропускная способность упала).
+    Рост задержки меньше min_delta секунд считается шумом.
+    """
+    previous = dict(_flatten(baseline))
+    regressions = []
+    for key, value in _flatten(results):
+        old = previous.get(key)
+        if not old:
+            continue
+        if key.endswith(THROUGHPUT_KEYS):
+            if value < old * (1 - tolerance):
+                regressions.append(f"{key}: {old:.1f} -> {value:.1f}")
+        elif key.endswith((".p50", ".p99")) and value > old * (1 + tolerance) \
+                and value - old > min_delta:
+            regressions.append(f"{key}: {old * 1e3:.3f} ms -> {value * 1e3:.3f} ms")
+    return regressions
+
+
+def format_report(results):
+    lines = []
+    header = "{:<20}{:<12}" + "{:>12}" * 4 + "{:>8}"
+    lines.append(header.format("model", "metric", "p50, us", "p90, us",
+                               "p99, us", "max, us", "errors"))
+    for model, result in results.items():
+        for metric, summary in result["operator"].items():
+            lines.append(header.format(model, metric, *(
+                f"{summary[key] * 1e6:.1f}" if key in summary else "-"
+                for key in ("p50", "p90", "p99", "max")),
+                summary.get("errors", 0)))
+    lines.append("")
+    header = "{:<20}{:>8}{:>14}{:>14}{:>16}{:>8}"
+    lines.append(header.format("model", "devices", "polls/s", "commands/s",
+                               "cmd p99, ms", "errors"))
+    for model, result in results.items():
+        for devices, fleet in result.get("fleet", {}).items():
+            p99 = fleet["command"].get("p99")
+            lines.append(header.format(
+                model, devices, f"{fleet['polls_per_sec']:.1f}",
+                f"{fleet['commands_per_sec']:.1f}",
+                f"{p99 * 1e3:.3f}" if p99 is not None else "-",
+                fleet["errors"] + fleet.get("command_errors", 0)))
+    return "\n".join(lines)
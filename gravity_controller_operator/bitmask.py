@@ -0,0 +1,75 @@
+def bits_to_mask(bits):
+    """Упаковать последовательность битов (бит i - элемент i) в int."""
+    mask = 0
+    for i, bit in enumerate(bits):
+        if bit:
+            mask |= 1 << i
+    return mask
+
+
+def mask_to_bits(mask, count):
+    return [bool(mask >> i & 1) for i in range(count)]
+
+
+def iter_bits(mask):
+    """Номера установленных битов маски по возрастанию."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class MaskDebouncer:
+    """
+    Фильтр дребезга для масок входов. Новое состояние бита принимается,
+    только если оно держится не меньше delay секунд (по меткам времени
+    чтений); импульс короче - отбрасывается как помеха. delay задаётся
+    по умолчанию и отдельно для битов (per_bit {бит: секунды}); бит
+    с delay 0 переключается сразу. Биты считаются только у тех входов,
+    что отличаются от принятого состояния, - остальные стоят одного XOR.
+    initial - уже принятая маска; без неё принимается первое чтение.
+    """
+    def __init__(self, delay=0.0, per_bit=None, initial=None):
+        self.delay = delay
+        self.per_bit = dict(per_bit or {})
+        self.stable = initial
+        self.last_raw = initial
+        # бит -> время чтения, с которого держится новое значение
+        self.pending = {}
+        instant = 0
+        delayed = 0
+        for bit, bit_delay in self.per_bit.items():
+            if bit_delay > 0:
+                delayed |= 1 << bit
+            else:
+                instant |= 1 << bit
+        self._instant = instant
+        self._delayed = delayed
+
+    def _delay_mask(self, differ):
+        if self.delay > 0:
+            return differ & ~self._instant
+        return differ & self._delayed
+
+    def filter(self, raw, now):
+        """Вернуть принятую (отфильтрованную) маску для чтения raw."""
+        if self.stable is None:
+            self.stable = self.last_raw = raw
+            return raw
+        toggled = raw ^ self.last_raw
+        self.last_raw = raw
+        differ = raw ^ self.stable
+        if self.pending:
+            for bit in [bit for bit in self.pending if not differ >> bit & 1]:
+                del self.pending[bit]
+        delayed = self._delay_mask(differ)
+        stable = self.stable ^ (differ & ~delayed)
+        for bit in iter_bits(delayed):
+            since = self.pending.get(bit)
+            if since is None or toggled >> bit & 1:
+                since = self.pending[bit] = now
+            if now - since >= self.per_bit.get(bit, self.delay):
+                stable ^= 1 << bit
+                del self.pending[bit]
+        self.stable = stable
+        return stable
@@ -0,0 +1,285 @@
+import struct
+import sys
+import zlib
+from array import array
+
+from gravity_controller_operator.controllers_super import PointTable
+from gravity_controller_operator.exceptions import CodecError
+from gravity_controller_operator.snapshot import ControllerSnapshot
+
+
+# Двоичный формат снимков (все числа little-endian):
+#
+#   снимок:  "GCS" версия:u8 флаги:u8 seq:u64 taken_at:f64 [base_seq:u64]
+#            + таблица "di" + таблица "relays"
+#   таблица: вид:u8 флаги:u8 n:u32 layout:u32, затем при виде != ABSENT
+#            полный:  каналы i32[n] адреса i32[n]
+#            дельта:  индексы точек u32[n]
+#            маска известных значений, значения, changed i64[n] (мс, 0 - нет)
+#   парк:    "GCF" версия:u8 число:u32, затем для каждого устройства
+#            длина имени:u16 имя(utf-8) длина:u32 снимок
+#
+# Значения вида BITS - битовая маска, INTS - i64[n]. layout - crc32
+# каналов и адресов: дельта применяется только к снимку той же раскладки.
+VERSION = 1
+SNAPSHOT_MAGIC = b"GCS"
+FLEET_MAGIC = b"GCF"
+TYPES = ("di", "relays")
+
+FLAG_DELTA = 1
+FLAG_BOOL = 1
+ABSENT, BITS, INTS = 0, 1, 2
+
+_HEADER = struct.Struct("<3sBBQd")
+_BASE = struct.Struct("<Q")
+_TABLE = struct.Struct("<BBII")
+_FLEET = struct.Struct("<3sBI")
+_NAME = struct.Struct("<H")
+_LENGTH = struct.Struct("<I")
+_SWAP = sys.byteorder != "little"
+
+
+def _to_bytes(typecode, items):
+    packed = array(typecode, items)
+    if _SWAP:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(fmt, data, offset, what="snapshot"):
+    if offset + fmt.size > len(data):
+        raise CodecError(f"Truncated {what} data")
+    return fmt.unpack_from(data, offset)
+
+
+def _from_bytes(typecode, data, offset, count):
+    packed = array(typecode)
+    end = offset + packed.itemsize * count
+    if end > len(data):
+        raise CodecError("Truncated snapshot data")
+    packed.frombytes(data[offset:end])
+    if _SWAP:
+        packed.byteswap()
+    return packed, end
+
+
+def _mask_bytes(bits, count):
+    mask = 0
+    for i, bit in enumerate(bits):
+        if bit:
+            mask |= 1 << i
+    return mask.to_bytes((count + 7) // 8, "little")
+
+
+def _read_mask(data, offset, count):
+    end = offset + (count + 7) // 8
+    if end > len(data):
+        raise CodecError("Truncated snapshot data")
+    return int.from_bytes(data[offset:end], "little"), end
+
+
+def layout_of(table):
+    """crc32 раскладки таблицы (каналы и адреса)."""
+    return zlib.crc32(_to_bytes("i", table.channels + table.addrs))
+
+
+def _encode_table(table, indices=None):
+    """
+    Таблица целиком (indices=None) или только точки indices (дельта).
+    """
+    if table is None:
+        return _TABLE.pack(ABSENT, 0, 0, 0)
+    values = table.values
+    changed = table.changed
+    if indices is None:
+        chunks = [_to_bytes("i", table.channels), _to_bytes("i", table.addrs)]
+    else:
+        values = [values[i] for i in indices]
+        changed = [changed[i] for i in indices]
+        chunks = [_to_bytes("I", indices)]
+    count = len(values)
+    known = [value is not None for value in values]
+    present = [value for value in values if value is not None]
+    if any(not isinstance(value, int) for value in present):
+        raise CodecError("Only bool/int point values can be encoded")
+    flags = FLAG_BOOL if present and all(
+        value is True or value is False for value in present) else 0
+    if all(value in (0, 1) for value in present):
+        kind = BITS
+        chunks += [_mask_bytes(known, count), _mask_bytes(values, count)]
+    else:
+        kind = INTS
+        chunks += [_mask_bytes(known, count),
+                   _to_bytes("q", [value or 0 for value in values])]
+    chunks.append(_to_bytes("q", [round(ts * 1000) for ts in changed]))
+    return _TABLE.pack(kind, flags, count, layout_of(table)) + b"".join(chunks)
+
+
+def _same_layout(table, base_table):
+    if table is None or base_table is None:
+        return table is base_table
+    return table.channels == base_table.channels \
+        and table.addrs == base_table.addrs
+
+
+def _changed_indices(table, base):
+    if table is base:
+        return []
+    values, changed = table.values, table.changed
+    base_values, base_changed = base.values, base.changed
+    return [i for i in range(len(values))
+            if values[i] != base_values[i] or changed[i] != base_changed[i]]
+
+
+def encode_snapshot(snapshot, base=None):
+    """
+    Закодировать ControllerSnapshot в байты. С base (прошлый отправленный
+    снимок) - дельта: только изменившиеся точки. Если раскладка таблиц
+    не совпадает с base, снимок кодируется целиком.
+    """
+    tables = [snapshot.get_table(typ) for typ in TYPES]
+    if base is not None:
+        base_tables = [base.get_table(typ) for typ in TYPES]
+        if not all(map(_same_layout, tables, base_tables)):
+            base = None
+    if base is None:
+        header = _HEADER.pack(SNAPSHOT_MAGIC, VERSION, 0, snapshot.seq,
+                              snapshot.taken_at)
+        return header + b"".join(_encode_table(table) for table in tables)
+    header = _HEADER.pack(SNAPSHOT_MAGIC, VERSION, FLAG_DELTA, snapshot.seq,
+                          snapshot.taken_at) + _BASE.pack(base.seq)
+    return header + b"".join(
+        _encode_table(table, _changed_indices(table, base_table)
+                      if table is not None else None)
+        for table, base_table in zip(tables, base_tables))
+
+
+def _decode_values(kind, flags, data, offset, count):
+    known, offset = _read_mask(data, offset, count)
+    if kind == BITS:
+        bits, offset = _read_mask(data, offset, count)
+        cast = bool if flags & FLAG_BOOL else int
+        values = [cast(bits >> i & 1) if known >> i & 1 else None
+                  for i in range(count)]
+    elif kind == INTS:
+        packed, offset = _from_bytes("q", data, offset, count)
+        values = [value if known >> i & 1 else None
+                  for i, value in enumerate(packed)]
+    else:
+        raise CodecError(f"Unknown table kind {kind}")
+    stamps, offset = _from_bytes("q", data, offset, count)
+    return values, [ms / 1000 for ms in stamps], offset
+
+
+def _decode_table(data, offset, base_table=None, delta=False):
+    kind, flags, count, layout = _unpack(_TABLE, data, offset)
+    offset += _TABLE.size
+    if kind == ABSENT:
+        return None, offset
+    if not delta:
+        channels, offset = _from_bytes("i", data, offset, count)
+        addrs, offset = _from_bytes("i", data, offset, count)
+        table = PointTable(channels, addrs)
+        values, stamps, offset = _decode_values(kind, flags, data, offset, count)
+        table.values = values
+        table.changed = array("d", stamps)
+        return table.freeze(), offset
+    if base_table is None or layout_of(base_table) != layout:
+        raise CodecError("Delta does not match the layout of the base snapshot")
+    indices, offset = _from_bytes("I", data, offset, count)
+    if any(i >= len(base_table.values) for i in indices):
+        raise CodecError("Delta point index out of range")
+    values, stamps, offset = _decode_values(kind, flags, data, offset, count)
+    if not count:
+        return base_table, offset
+    table = PointTable(base_table.channels, base_table.addrs)
+    table.values = list(base_table.values)
+    table.changed = array("d", base_table.changed)
+    for i, value, ts in zip(indices, values, stamps):
+        table.values[i] = value
+        table.changed[i] = ts
+    return table.freeze(), offset
+
+
+def _decode_snapshot(data, offset, base):
+    magic, version, flags, seq, taken_at = _unpack(_HEADER, data, offset)
+    if magic != SNAPSHOT_MAGIC:
+        raise CodecError("Not a controller snapshot")
+    if version != VERSION:
+        raise CodecError(f"Unsupported snapshot version {version}")
+    offset += _HEADER.size
+    delta = bool(flags & FLAG_DELTA)
+    if delta:
+        base_seq, = _unpack(_BASE, data, offset)
+        offset += _BASE.size
+        if base is None or base.seq != base_seq:
+            raise CodecError(f"Delta requires base snapshot seq={base_seq}")
+    tables = []
+    for typ in TYPES:
+        table, offset = _decode_table(
+            data, offset, base.get_table(typ) if delta else None, delta)
+        tables.append(table)
+    return ControllerSnapshot(*tables, seq=seq, taken_at=taken_at), offset
+
+
+def decode_snapshot(data, base=None):
+    """
+    Восстановить ControllerSnapshot из байтов encode_snapshot. Для дельты
+    нужен base - снимок, против которого она закодирована (по seq).
+    """
+    data = memoryview(data)
+    snapshot, offset = _decode_snapshot(data, 0, base)
+    if offset != len(data):
+        raise CodecError(f"{len(data) - offset} trailing bytes after snapshot")
+    return snapshot
+
+
+def encode_fleet(snapshots, base=None):
+    """
+    Снимки парка {имя: ControllerSnapshot} (FleetOperator.get_points())
+    одним сообщением; base - прошлый отправленный словарь снимков.
+    """
+    base = base or {}
+    chunks = [_FLEET.pack(FLEET_MAGIC, VERSION, len(snapshots))]
+    for name, snapshot in snapshots.items():
+        encoded_name = name.encode()
+        payload = encode_snapshot(snapshot, base.get(name))
+        chunks += [_NAME.pack(len(encoded_name)), encoded_name,
+                   _LENGTH.pack(len(payload)), payload]
+    return b"".join(chunks)
+
+
+def decode_fleet(data, base=None):
+    base = base or {}
+    data = memoryview(data)
+    magic, version, count = _unpack(_FLEET, data, 0, "fleet")
+    if magic != FLEET_MAGIC:
+        raise CodecError("Not a fleet snapshot")
+    if version != VERSION:
+        raise CodecError(f"Unsupported fleet version {version}")
+    offset = _FLEET.size
+    snapshots = {}
+    for _ in range(count):
+        size, = _unpack(_NAME, data, offset, "fleet")
+        offset += _NAME.size
+        if offset + size > len(data):
+            raise CodecError("Truncated fleet data")
+        try:
+            name = bytes(data[offset:offset + size]).decode()
+        except UnicodeDecodeError as e:
+            raise CodecError(f"Bad device name in fleet data: {e}") from None
+        offset += size
+        length, = _unpack(_LENGTH, data, offset, "fleet")
+        offset += _LENGTH.size
+        if offset + length > len(data):
+            raise CodecError(f"Truncated fleet data for {name!r}")
+        # Каждый снимок - в границах своей длины, без выхода в соседний
+        entry = data[offset:offset + length]
+        snapshots[name], consumed = _decode_snapshot(entry, 0, base.get(name))
+        if consumed != length:
+            raise CodecError(f"Snapshot of {name!r} is {consumed} bytes, "
+                             f"fleet entry says {length}")
+        offset += length
+    if offset != len(data):
+        raise CodecError(f"{len(data) - offset} trailing bytes after fleet data")
+    return snapshots
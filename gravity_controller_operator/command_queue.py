@@ -0,0 +1,110 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class RelayCommandQueue:
+    """
+    Очередь команд реле одного устройства. submit() не ждёт записи и сразу
+    возвращает concurrent.futures.Future. Ещё не отправленная команда
+    каналу заменяется более новой: в устройство уходит только последнее
+    состояние. Всё накопленное за время предыдущей записи отправляется
+    одной групповой записью write({канал: состояние}), каналы - в порядке
+    первых команд (повторная команда меняет состояние, но не место
+    канала); future всех вошедших команд завершаются её результатом
+    или исключением.
+
+    Порядок между групповыми записями сохраняется, внутри одной - зависит
+    от драйвера: Modbus (ARM K210, WB-MR6LV) пишет участками по возрастанию
+    адреса, Moxa - одним PUT, NetPing - параллельными запросами. Если
+    порядок каналов важен (блокировки ворот), следующую команду ставьте
+    после future.result() предыдущей.
+
+        queue = RelayCommandQueue(operator.change_relays_state)
+        queue.submit(2, 1)
+        queue.submit(2, 0).result(timeout=1)   # в устройство ушёл только 0
+
+    executor - где выполнять запись (по умолчанию собственный поток,
+    создаётся при первой команде). Отмена future не отзывает команду.
+    """
+    def __init__(self, write, executor=None):
+        self.write = write
+        self._executor = executor
+        self._own_executor = executor is None
+        self._lock = threading.Lock()
+        # канал -> состояние; повторная команда оставляет канал на месте
+        self._pending = {}
+        self._futures = []
+        self._draining = False
+        self._closed = False
+        self.submitted = 0
+        self.coalesced = 0
+        self.writes = 0
+
+    def submit(self, ch, state):
+        return self.submit_many({ch: state})
+
+    def submit_many(self, states: dict):
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Command queue is closed")
+            for ch, state in states.items():
+                if ch in self._pending:
+                    self.coalesced += 1
+                self._pending[ch] = state
+            self.submitted += len(states)
+            self._futures.append(future)
+            start = not self._draining
+            self._draining = True
+        if start:
+            try:
+                self._get_executor().submit(self._drain)
+            except RuntimeError:
+                # Пул уже остановлен (например, FleetOperator.stop())
+                with self._lock:
+                    self._draining = False
+                raise
+        return future
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix="relay-commands")
+        return self._executor
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._futures:
+                    self._draining = False
+                    return
+                states, futures = self._pending, self._futures
+                self._pending, self._futures = {}, []
+            futures = [f for f in futures if f.set_running_or_notify_cancel()]
+            try:
+                result = None
+                if states:
+                    self.writes += 1
+                    result = self.write(states)
+            except BaseException as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future in futures:
+                    future.set_result(result)
+
+    def get_stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {"pending": pending, "submitted": self.submitted,
+                "coalesced": self.coalesced, "writes": self.writes}
+
+    def close(self, wait=True):
+        """Не принимать новые команды; wait - дождаться отправки очереди."""
+        with self._lock:
+            self._closed = True
+            executor = self._executor if self._own_executor else None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -1,28 +1,124 @@
-from gravity_controller_operator.controllers.emulator_contr import EmulatorController
-from gravity_controller_operator.controllers.netping_relay import NetPing2Controller
-from gravity_controller_operator.controllers.arm_k210 import ARMK210Controller
-from gravity_controller_operator.controllers.wb_mr6lv import WBMR6LV
+from importlib import import_module
+
 from gravity_controller_operator.exceptions import UnknownController
-from gravity_controller_operator.controllers.moxa import MoxaE1214
-from gravity_controller_operator.controllers.sigur import Sigur
 
 
-AVAILABLE_CONTROLLERS = [
-    ARMK210Controller,
-    WBMR6LV,
-    NetPing2Controller,
-    EmulatorController,
-    Sigur,
-    MoxaE1214
-]
+# Модель (в нижнем регистре) -> "модуль:Класс". Модуль драйвера
+# импортируется при первом обращении к модели: развёртывание только
+# с Moxa не тянет pymodbus, а без netping_contr падает лишь NetPing.
+CONTROLLERS = {
+    "arm_k210": "gravity_controller_operator.controllers.arm_k210:ARMK210Controller",
+    "wb_mr6lv": "gravity_controller_operator.controllers.wb_mr6lv:WBMR6LV",
+    "netping_relay": "gravity_controller_operator.controllers.netping_relay:NetPing2Controller",
+    "emulator_controller": "gravity_controller_operator.controllers.emulator_contr:EmulatorController",
+    "sigur": "gravity_controller_operator.controllers.sigur:Sigur",
+    "moxa_e1214": "gravity_controller_operator.controllers.moxa:MoxaE1214",
+}
+
+ASYNC_CONTROLLERS = {
+    "arm_k210": "gravity_controller_operator.controllers.arm_k210_async:AsyncARMK210Controller",
+    "wb_mr6lv": "gravity_controller_operator.controllers.wb_mr6lv_async:AsyncWBMR6LV",
+    "netping_relay": "gravity_controller_operator.controllers.netping_relay_async:AsyncNetPing2Controller",
+    "emulator_controller": "gravity_controller_operator.controllers.emulator_contr:AsyncEmulatorController",
+    "moxa_e1214": "gravity_controller_operator.controllers.moxa_async:AsyncMoxaE1214",
+}
+
+# Сторонние драйверы регистрируются через entry points пакета:
+#   [project.entry-points."gravity_controller_operator.controllers"]
+#   my_model = "my_package.my_module:MyController"
+ENTRY_POINT_GROUP = "gravity_controller_operator.controllers"
+ASYNC_ENTRY_POINT_GROUP = "gravity_controller_operator.async_controllers"
+
+_entry_points_loaded = False
+
+
+def _registry(asynchronous):
+    return ASYNC_CONTROLLERS if asynchronous else CONTROLLERS
+
+
+def register_controller(model, target, asynchronous=False):
+    """
+    Зарегистрировать драйвер: target - класс контроллера, строка
+    "модуль:Класс" или EntryPoint (импортируются при первом использовании).
+    """
+    _registry(asynchronous)[model.lower()] = target
+
+
+def _select_entry_points(group):
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        # Python 3.7: бэкпорт ставится зависимостью пакета
+        try:
+            from importlib_metadata import entry_points
+        except ImportError:
+            raise ImportError("Для драйверов из entry points на Python 3.7 "
+                              "требуется пакет importlib_metadata") from None
+    found = entry_points()
+    if hasattr(found, "select"):
+        return found.select(group=group)
+    return found.get(group, [])
+
+
+def load_entry_points():
+    """Добавить в реестр драйверы из entry points (один раз)."""
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    for group, asynchronous in ((ENTRY_POINT_GROUP, False),
+                                (ASYNC_ENTRY_POINT_GROUP, True)):
+        registry = _registry(asynchronous)
+        for entry_point in _select_entry_points(group):
+            # Встроенные модели не переопределяются; цель разбирает
+            # сам EntryPoint.load() (атрибуты через точку, extras)
+            registry.setdefault(entry_point.name.lower(), entry_point)
+
+
+def get_controller_class(model, asynchronous=False):
+    registry = _registry(asynchronous)
+    key = model.lower()
+    target = registry.get(key)
+    if target is None:
+        load_entry_points()
+        target = registry.get(key)
+        if target is None:
+            raise UnknownController(model, sorted(registry))
+    if isinstance(target, str):
+        module, _, name = target.partition(":")
+        target = registry[key] = getattr(import_module(module), name)
+    elif not isinstance(target, type) and hasattr(target, "load"):
+        target = registry[key] = target.load()
+    return target
+
+
+def available_models(asynchronous=False):
+    load_entry_points()
+    return sorted(_registry(asynchronous))
+
+
+def __getattr__(name):
+    # Совместимость: списки классов импортируют все драйверы
+    if name == "AVAILABLE_CONTROLLERS":
+        return [get_controller_class(model) for model in available_models()]
+    if name == "AVAILABLE_ASYNC_CONTROLLERS":
+        return [get_controller_class(model, True)
+                for model in available_models(True)]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class ControllerCreator:
     @staticmethod
     def get_controller(model, emulator=False, *args, **kwargs):
-        for contr in AVAILABLE_CONTROLLERS:
-            if emulator:
-                return EmulatorController(*args, **kwargs)
-            if contr.model.lower() == model.lower():
-                return contr(*args, **kwargs)
-        raise UnknownController(model, [contr.model for contr in AVAILABLE_CONTROLLERS])
+        if emulator:
+            model = "emulator_controller"
+        return get_controller_class(model)(*args, **kwargs)
+
+    @staticmethod
+    def get_async_controller(model, emulator=False, *args, **kwargs):
+        """
+        То же, что get_controller, но для AsyncControllerOperator.
+        """
+        if emulator:
+            model = "emulator_controller"
+        return get_controller_class(model, asynchronous=True)(*args, **kwargs)
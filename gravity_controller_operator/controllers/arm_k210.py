@@ -1,54 +1,69 @@
 from gravity_controller_operator.controllers_super import DIInterface, RelayInterface, ControllerInterface
+from gravity_controller_operator.modbus_planner import ModbusReadMixin, \
+    ModbusReadPlanner, PyModbusTCPReader, READ_INPUT_REGISTERS, \
+    READ_HOLDING_REGISTERS, contiguous_runs
+from gravity_controller_operator.exceptions import DeviceError
+from gravity_controller_operator.retry import attempt_timeout
 from pyModbusTCP.client import ModbusClient
-import time
 
-class ARMK210ControllerDI(DIInterface):
+
+class DeadlineModbusClient(ModbusClient):
+    """
+    ModbusClient, у которого таймаут каждого запроса (подключение и
+    ожидание ответа) не больше остатка бюджета повторов
+    (retry.attempt_timeout). Сеттер timeout закрывает сокет, поэтому
+    таймаут меняется на открытом сокете, без переподключения.
+    """
+    @ModbusClient.timeout.getter
+    def timeout(self):
+        return attempt_timeout(self._timeout)
+
+    def _send(self, frame):
+        if self.is_open:
+            self._sock.settimeout(self.timeout)
+        return super()._send(frame)
+
+
+class ARMK210ControllerDI(ModbusReadMixin, DIInterface):
     map_keys_amount = 8
     starts_with = 0
+    read_function = READ_INPUT_REGISTERS
 
-    def __init__(self, client):
+    def __init__(self, client, planner=None):
         self.client = client
+        self.planner = planner or ModbusReadPlanner(PyModbusTCPReader(client))
         super().__init__()
 
-    def get_phys_dict(self):
-        for _ in range(5):
-            response = self.client.read_input_registers(self.starts_with, self.map_keys_amount)
-            if response:
-                return {i: val for i, val in enumerate(response)}
-            time.sleep(0.1)  # Не грузим CPU и даём контроллеру время
-        return {"error": "No response from controller"}
 
-
-class ARMK210ControllerRelay(RelayInterface):
+class ARMK210ControllerRelay(ModbusReadMixin, RelayInterface):
     map_keys_amount = 8
     starts_with = 0
+    read_function = READ_HOLDING_REGISTERS
 
-    def __init__(self, client):
+    def __init__(self, client, planner=None):
         self.client = client
+        self.planner = planner or ModbusReadPlanner(PyModbusTCPReader(client))
         super().__init__()
 
-    def get_phys_dict(self):
-        for _ in range(5):
-            response = self.client.read_holding_registers(self.starts_with, self.map_keys_amount)
-            if response:
-                return {i: val for i, val in enumerate(response)}
-            time.sleep(0.1)  # Не грузим CPU и даём контроллеру время
-        return {"error": "No response from controller"}
-
+    # Одна попытка на вызов: повторы и паузы делает device_guard
     def change_phys_relay_state(self, addr, state: bool):
-        for _ in range(5):
-            result = self.client.write_single_coil(addr, state)
-            if result:
-                return
-            time.sleep(0.1)
-        raise Exception("Failed to change relay state after 5 tries")
+        if not self.client.write_single_coil(addr, state):
+            raise DeviceError("Failed to change relay state")
+
+    def change_phys_relays_state(self, states: dict):
+        # Write Multiple Coils (0x0F) на каждый непрерывный участок адресов
+        for start, values in contiguous_runs(states):
+            if not self.client.write_multiple_coils(start, values):
+                raise DeviceError("Failed to change relays state")
 
 
 class ARMK210Controller:
     model = "arm_k210"
 
-    def __init__(self, ip: str, port: int = 8234, name="ARM_K210_Controller", *args, **kwargs):
-        client = ModbusClient(host=ip, port=port)
-        di = ARMK210ControllerDI(client)
-        relay = ARMK210ControllerRelay(client)
+    def __init__(self, ip: str, port: int = 8234, name="ARM_K210_Controller",
+                 timeout: float = 30.0, *args, **kwargs):
+        client = DeadlineModbusClient(host=ip, port=port, timeout=timeout)
+        planner = ModbusReadPlanner(PyModbusTCPReader(client))
+        di = ARMK210ControllerDI(client, planner)
+        relay = ARMK210ControllerRelay(client, planner)
         self.interface = ControllerInterface(di_interface=di, relay_interface=relay)
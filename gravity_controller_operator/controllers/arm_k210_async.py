@@ -0,0 +1,70 @@
+from gravity_controller_operator.controllers_super import AsyncDIInterface, \
+    AsyncRelayInterface, AsyncControllerInterface
+from gravity_controller_operator.exceptions import DeviceError
+from gravity_controller_operator.modbus_planner import contiguous_runs
+from pymodbus.client import AsyncModbusTcpClient
+
+
+class AsyncARMK210ControllerDI(AsyncDIInterface):
+    map_keys_amount = 8
+    starts_with = 0
+
+    def __init__(self, client, slave_id=1):
+        self.client = client
+        self.slave_id = slave_id
+        super().__init__()
+
+    async def get_phys_dict(self):
+        response = await self.client.read_input_registers(
+            self.starts_with, self.map_keys_amount, slave=self.slave_id)
+        if not response or response.isError():
+            raise DeviceError(f"No response from controller: {response}")
+        return {i: val for i, val in enumerate(response.registers)}
+
+
+class AsyncARMK210ControllerRelay(AsyncRelayInterface):
+    map_keys_amount = 8
+    starts_with = 0
+
+    def __init__(self, client, slave_id=1):
+        self.client = client
+        self.slave_id = slave_id
+        super().__init__()
+
+    async def get_phys_dict(self):
+        response = await self.client.read_holding_registers(
+            self.starts_with, self.map_keys_amount, slave=self.slave_id)
+        if not response or response.isError():
+            raise DeviceError(f"No response from controller: {response}")
+        return {i: val for i, val in enumerate(response.registers)}
+
+    # Одна попытка на вызов: повторы и паузы делает device_guard
+    async def change_phys_relay_state(self, addr, state: bool):
+        result = await self.client.write_coil(addr, state, slave=self.slave_id)
+        if not result or result.isError():
+            raise DeviceError(f"Failed to change relay state: {result}")
+
+    async def change_phys_relays_state(self, states: dict):
+        for start, values in contiguous_runs(states):
+            result = await self.client.write_coils(
+                start, values, slave=self.slave_id)
+            if not result or result.isError():
+                raise DeviceError(f"Failed to change relays state: {result}")
+
+
+class AsyncARMK210Controller:
+    model = "arm_k210"
+
+    def __init__(self, ip: str, port: int = 8234, name="ARM_K210_Controller",
+                 *args, **kwargs):
+        # unit id 1 - как у pyModbusTCP.ModbusClient в синхронном драйвере
+        self.client = AsyncModbusTcpClient(ip, port=port)
+        di = AsyncARMK210ControllerDI(self.client)
+        relay = AsyncARMK210ControllerRelay(self.client)
+        self.interface = AsyncControllerInterface(di_interface=di, relay_interface=relay)
+
+    async def connect(self):
+        await self.client.connect()
+
+    async def close(self):
+        self.client.close()
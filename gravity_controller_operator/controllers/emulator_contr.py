@@ -1,37 +1,296 @@
+import asyncio
+import math
+import random
+import threading
+import time
+
 from gravity_controller_operator.controllers_super import DIInterface, \
-    RelayInterface, ControllerInterface
+    RelayInterface, ControllerInterface, AsyncDIInterface, \
+    AsyncRelayInterface, AsyncControllerInterface
+
+
+PATTERNS = ("static", "random", "periodic", "bursty")
+
+
+def poisson(rng, lam):
+    """Случайное число событий пуассоновского потока со средним lam."""
+    if lam <= 0:
+        return 0
+    if lam > 30:
+        return max(0, round(rng.gauss(lam, math.sqrt(lam))))
+    # Алгоритм Кнута
+    limit = math.exp(-lam)
+    k = 0
+    p = rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+class EmulatedDevice:
+    """
+    Состояние эмулируемого контроллера. Входы и реле - битовые маски
+    (бит i - физический адрес starts_with + i), реле хранят записанное.
+    Входы меняются по шаблону pattern со средней частотой rate
+    переключений в секунду на канал:
+      static   - не меняются;
+      random   - независимые случайные переключения (пуассоновский поток);
+      periodic - каждый канал переключается раз в 1/rate с, со своей фазой;
+      bursty   - пачки: в среднем раз в burst_interval с на burst_duration с
+                 случайные переключения учащаются, между пачками - тишина.
+    Каждое обращение задерживается на latency + uniform(0, jitter) секунд.
+    seed делает последовательность воспроизводимой; задержки берутся из
+    отдельного генератора, и входы не зависят от числа и порядка обращений.
+    """
+    def __init__(self, di_count=4, relay_count=4, pattern="static", rate=1.0,
+                 seed=None, latency=0.0, jitter=0.0, burst_interval=5.0,
+                 burst_duration=0.5, clock=time.monotonic):
+        if pattern not in PATTERNS:
+            raise ValueError(f"Unknown pattern {pattern!r}, expected one of {PATTERNS}")
+        self.di_count = di_count
+        self.relay_count = relay_count
+        self.pattern = pattern
+        self.rate = rate
+        self.latency = latency
+        self.jitter = jitter
+        self.burst_interval = burst_interval
+        self.burst_duration = burst_duration
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self.latency_rng = random.Random(
+            None if seed is None else f"{seed}:latency")
+        self.di_mask = 0
+        self.relay_mask = 0
+        self.reads = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        self._last = clock()
+        self._phases = [self.rng.random() for _ in range(di_count)] \
+            if pattern == "periodic" else None
+        self._burst_start = self._last + self._next_burst()
+
+    def _next_burst(self):
+        return self.rng.expovariate(1 / self.burst_interval) \
+            if self.burst_interval > 0 else 0.0
+
+    def delay(self):
+        """Задержка очередного обращения, секунды."""
+        if self.jitter:
+            with self._lock:
+                return self.latency + self.latency_rng.uniform(0, self.jitter)
+        return self.latency
+
+    def wait(self):
+        delay = self.delay()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _flip_random(self, per_channel):
+        count = self.di_count
+        mask = self.di_mask
+        randrange = self.rng.randrange
+        for _ in range(poisson(self.rng, per_channel * count)):
+            mask ^= 1 << randrange(count)
+        self.di_mask = mask
+
+    def _advance(self, now):
+        elapsed = now - self._last
+        if elapsed <= 0 or not self.di_count:
+            return
+        start, self._last = self._last, now
+        if self.pattern == "random":
+            self._flip_random(self.rate * elapsed)
+        elif self.pattern == "periodic":
+            mask = 0
+            for i, phase in enumerate(self._phases):
+                if int(now * self.rate + phase) & 1:
+                    mask |= 1 << i
+            self.di_mask = mask
+        elif self.pattern == "bursty":
+            # Средняя частота та же, но сосредоточена в пачках
+            burst_rate = self.rate * self.burst_interval / self.burst_duration
+            t = start
+            while t < now:
+                if t < self._burst_start:
+                    t = min(now, self._burst_start)
+                    continue
+                end = self._burst_start + self.burst_duration
+                segment_end = min(now, end)
+                self._flip_random(burst_rate * (segment_end - t))
+                t = segment_end
+                if t >= end:
+                    self._burst_start = end + self._next_burst()
+
+    def read_di(self):
+        with self._lock:
+            self._advance(self.clock())
+            self.reads += 1
+            return self.di_mask
+
+    def read_relays(self):
+        with self._lock:
+            self.reads += 1
+            return self.relay_mask
+
+    def write_relays(self, bits: dict):
+        """Записать реле {номер бита: состояние}."""
+        with self._lock:
+            mask = self.relay_mask
+            for bit, state in bits.items():
+                if 0 <= bit < self.relay_count:
+                    if state:
+                        mask |= 1 << bit
+                    else:
+                        mask &= ~(1 << bit)
+            self.relay_mask = mask
+            self.writes += 1
+
+
+def mask_to_phys_dict(mask, count, starts_with):
+    return {starts_with + i: mask >> i & 1 for i in range(count)}
 
 
 class EmulatorDI(DIInterface):
     map_keys_amount = 4
     starts_with = 1
 
-    def __init__(self):
+    def __init__(self, device=None, starts_with=None, spec_addr=None,
+                 bitmask=False):
+        self.device = device or EmulatedDevice(di_count=self.map_keys_amount)
+        self.map_keys_amount = self.device.di_count
+        if starts_with is not None:
+            self.starts_with = starts_with
+        if spec_addr is not None:
+            self.spec_addr = spec_addr
+        self.bitmask = bitmask
         super().__init__()
 
+    def get_phys_mask(self):
+        self.device.wait()
+        return self.device.read_di()
+
     def get_phys_dict(self):
-        return {1: 0, 2: 0, 3: 0, 4: 0}
+        return mask_to_phys_dict(self.get_phys_mask(), self.map_keys_amount,
+                                 self.starts_with)
 
 
 class EmulatorRelay(RelayInterface):
     map_keys_amount = 4
     starts_with = 1
 
-    def __init__(self):
+    def __init__(self, device=None, starts_with=None, spec_addr=None,
+                 bitmask=False):
+        self.device = device or EmulatedDevice(relay_count=self.map_keys_amount)
+        self.map_keys_amount = self.device.relay_count
+        if starts_with is not None:
+            self.starts_with = starts_with
+        if spec_addr is not None:
+            self.spec_addr = spec_addr
+        self.bitmask = bitmask
         super().__init__()
 
+    def get_phys_mask(self):
+        self.device.wait()
+        return self.device.read_relays()
+
     def get_phys_dict(self):
-        return {1: 0, 2: 0, 3: 0, 4: 0}
+        return mask_to_phys_dict(self.get_phys_mask(), self.map_keys_amount,
+                                 self.starts_with)
 
     def change_phys_relay_state(self, addr, state: bool):
-        # Ничего не делает, просто имитация
-        pass
+        self.change_phys_relays_state({addr: state})
+
+    def change_phys_relays_state(self, states: dict):
+        self.device.wait()
+        self.device.write_relays({addr - self.starts_with: state
+                                  for addr, state in states.items()})
 
 
 class EmulatorController:
+    """
+    Эмулятор контроллера для тестов и нагрузочных прогонов без железа.
+    По умолчанию - 4 DI и 4 реле с адресов 1, входы не меняются.
+
+        EmulatorController(di_count=10000, relay_count=2000, pattern="random",
+                           rate=0.5, seed=1, latency=0.002, jitter=0.001)
+
+    Параметры входов и задержек - см. EmulatedDevice; starts_with,
+    di_spec_addr/relay_spec_addr - раскладка каналов как у драйверов;
+    bitmask=True - чтения битовыми масками (apply_phys_mask).
+    Прочие аргументы (ip, port...) игнорируются.
+    """
+    model = "emulator_controller"
+
+    def __init__(self, *args, di_count=4, relay_count=4, starts_with=1,
+                 di_spec_addr=None, relay_spec_addr=None, pattern="static",
+                 rate=1.0, seed=None, latency=0.0, jitter=0.0,
+                 burst_interval=5.0, burst_duration=0.5, bitmask=False,
+                 **kwargs):
+        self.device = EmulatedDevice(
+            di_count, relay_count, pattern, rate, seed, latency, jitter,
+            burst_interval, burst_duration)
+        di = EmulatorDI(self.device, starts_with, di_spec_addr, bitmask)
+        relay = EmulatorRelay(self.device, starts_with, relay_spec_addr, bitmask)
+        self.interface = ControllerInterface(di_interface=di, relay_interface=relay)
+
+
+class AsyncEmulatorDI(AsyncDIInterface):
+    map_keys_amount = 4
+    starts_with = 1
+
+    def __init__(self, device=None, starts_with=None, spec_addr=None):
+        self.device = device or EmulatedDevice(di_count=self.map_keys_amount)
+        self.map_keys_amount = self.device.di_count
+        if starts_with is not None:
+            self.starts_with = starts_with
+        if spec_addr is not None:
+            self.spec_addr = spec_addr
+        super().__init__()
+
+    async def get_phys_dict(self):
+        await asyncio.sleep(self.device.delay())
+        return mask_to_phys_dict(self.device.read_di(), self.map_keys_amount,
+                                 self.starts_with)
+
+
+class AsyncEmulatorRelay(AsyncRelayInterface):
+    map_keys_amount = 4
+    starts_with = 1
+
+    def __init__(self, device=None, starts_with=None, spec_addr=None):
+        self.device = device or EmulatedDevice(relay_count=self.map_keys_amount)
+        self.map_keys_amount = self.device.relay_count
+        if starts_with is not None:
+            self.starts_with = starts_with
+        if spec_addr is not None:
+            self.spec_addr = spec_addr
+        super().__init__()
+
+    async def get_phys_dict(self):
+        await asyncio.sleep(self.device.delay())
+        return mask_to_phys_dict(self.device.read_relays(),
+                                 self.map_keys_amount, self.starts_with)
+
+    async def change_phys_relay_state(self, addr, state: bool):
+        await self.change_phys_relays_state({addr: state})
+
+    async def change_phys_relays_state(self, states: dict):
+        await asyncio.sleep(self.device.delay())
+        self.device.write_relays({addr - self.starts_with: state
+                                  for addr, state in states.items()})
+
+
+class AsyncEmulatorController:
     model = "emulator_controller"
 
-    def __init__(self, *args, **kwargs):
-        di = EmulatorDI()
-        relay = EmulatorRelay()
-        self.interface = ControllerInterface(di_interface=di, relay_interface=relay)
\ No newline at end of file
+    def __init__(self, *args, di_count=4, relay_count=4, starts_with=1,
+                 di_spec_addr=None, relay_spec_addr=None, pattern="static",
+                 rate=1.0, seed=None, latency=0.0, jitter=0.0,
+                 burst_interval=5.0, burst_duration=0.5, **kwargs):
+        self.device = EmulatedDevice(
+            di_count, relay_count, pattern, rate, seed, latency, jitter,
+            burst_interval, burst_duration)
+        di = AsyncEmulatorDI(self.device, starts_with, di_spec_addr)
+        relay = AsyncEmulatorRelay(self.device, starts_with, relay_spec_addr)
+        self.interface = AsyncControllerInterface(di_interface=di, relay_interface=relay)
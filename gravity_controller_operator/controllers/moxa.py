@@ -1,26 +1,75 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
 from gravity_controller_operator.controllers_super import DIInterface, RelayInterface, ControllerInterface
+from gravity_controller_operator.retry import attempt_timeout
 
 
 class MoxaClient:
-    def __init__(self, ip: str):
+    """
+    Клиент RESTful API Moxa ioLogik (vdn.dac.v1) на одной keep-alive сессии.
+    get_io() читает всё дерево /api/slot/0/io одним запросом; если прошивка
+    его не отдаёт, DI и реле читаются параллельно (DI - в собственном потоке
+    клиента, соседние устройства его не занимают). Длительность последнего
+    запроса каждого этапа доступна через get_timings(). Таймаут запроса -
+    timeout, но не больше остатка бюджета повторов (retry.attempt_timeout).
+    """
+    def __init__(self, ip: str, timeout=2):
         self.base_url = f"http://{ip}/api/slot/0/io"
         self.headers = {
             "Content-Type": "application/json",
             "Accept": "vdn.dac.v1"
         }
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        # None - ещё не известно, поддерживает ли прошивка общий запрос /io
+        self.combined_io = None
+        self.timings = {}
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"moxa-{ip}")
+
+    def _get(self, url, stage):
+        started = time.perf_counter()
+        r = self.session.get(url, timeout=attempt_timeout(self.timeout))
+        r.raise_for_status()
+        data = r.json()
+        self.timings[stage] = time.perf_counter() - started
+        return data
 
     def get_di(self):
-        url = f"{self.base_url}/di"
-        r = requests.get(url, headers=self.headers, timeout=2)
-        r.raise_for_status()
-        return r.json()["io"]["di"]
+        return self._get(f"{self.base_url}/di", "di")["io"]["di"]
 
     def get_relays(self):
-        url = f"{self.base_url}/relay"
-        r = requests.get(url, headers=self.headers, timeout=2)
-        r.raise_for_status()
-        return r.json()["io"]["relay"]
+        return self._get(f"{self.base_url}/relay", "relay")["io"]["relay"]
+
+    def get_io(self):
+        """
+        Вернуть {"di": [...], "relay": [...]}.
+        """
+        if self.combined_io is not False:
+            try:
+                io = self._get(self.base_url, "io")["io"]
+            except requests.HTTPError as e:
+                if self.combined_io is not None or e.response is None \
+                        or e.response.status_code >= 500:
+                    raise
+                io = {}
+            if "di" in io and "relay" in io:
+                self.combined_io = True
+                return {"di": io["di"], "relay": io["relay"]}
+            self.combined_io = False
+        started = time.perf_counter()
+        # Остаток бюджета повторов - в контексте вызывающего потока
+        di = self.executor.submit(contextvars.copy_context().run, self.get_di)
+        relays = self.get_relays()
+        result = {"di": di.result(), "relay": relays}
+        self.timings["io"] = time.perf_counter() - started
+        return result
 
     def set_relay(self, channel: int, state: int):
         url = f"{self.base_url}/relay/{channel}/relayStatus"
@@ -36,45 +85,142 @@ class MoxaClient:
         }
         headers = self.headers.copy()
         headers["Content-Length"] = str(len(str(payload)))
-        r = requests.put(url, headers=headers, json=payload, timeout=2)
+        started = time.perf_counter()
+        r = self.session.put(url, headers=headers, json=payload,
+                             timeout=attempt_timeout(self.timeout))
+        r.raise_for_status()
+        self.timings["set_relay"] = time.perf_counter() - started
+        return r.status_code == 200
+
+    def set_relays(self, states: dict):
+        """
+        Изменить несколько реле одним PUT {канал: состояние}.
+        """
+        url = f"{self.base_url}/relay"
+        payload = {
+            "slot": 0,
+            "io": {
+                "relay": [
+                    {"relayIndex": channel, "relayStatus": int(state)}
+                    for channel, state in sorted(states.items())
+                ]
+            }
+        }
+        started = time.perf_counter()
+        r = self.session.put(url, json=payload,
+                             timeout=attempt_timeout(self.timeout))
         r.raise_for_status()
+        self.timings["set_relays"] = time.perf_counter() - started
         return r.status_code == 200
 
+    def get_timings(self):
+        return dict(self.timings)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+
+class MoxaIOPlanner:
+    """
+    Планировщик чтения для ControllerInterface.update_all: если в опросе
+    участвуют и DI, и реле - один вызов MoxaClient.get_io().
+    """
+    def __init__(self, client):
+        self.client = client
+
+    def execute(self, spans):
+        spans = set(spans)
+        if {"di", "relay"} <= spans:
+            return self.client.get_io()
+        reads = {}
+        if "di" in spans:
+            reads["di"] = self.client.get_di()
+        if "relay" in spans:
+            reads["relay"] = self.client.get_relays()
+        return reads
+
+
+def list_to_mask(items, index_key, status_key):
+    """Список каналов API Moxa [{"diIndex": i, "diStatus": s}] -> маска."""
+    mask = 0
+    for item in items:
+        if int(item[status_key]):
+            mask |= 1 << int(item[index_key])
+    return mask
+
 
 class MoxaDI(DIInterface):
     map_keys_amount = 16
     starts_with = 0
+    bitmask = True
 
-    def __init__(self, client):
+    def __init__(self, client, planner=None):
         self.client = client
+        self.planner = planner or MoxaIOPlanner(client)
         super().__init__()
 
+    def read_spans(self):
+        return ["di"]
+
+    def phys_dict_from_reads(self, reads):
+        return {int(item["diIndex"]): item["diStatus"] for item in reads["di"]}
+
+    def phys_mask_from_reads(self, reads):
+        return list_to_mask(reads["di"], "diIndex", "diStatus")
+
     def get_phys_dict(self):
-        data = self.client.get_di()
-        return {int(item["diIndex"]): item["diStatus"] for item in data}
+        return self.phys_dict_from_reads(self.planner.execute(self.read_spans()))
+
+    def get_phys_mask(self):
+        return self.phys_mask_from_reads(self.planner.execute(self.read_spans()))
 
 
 class MoxaRelay(RelayInterface):
     map_keys_amount = 4
     starts_with = 0
+    bitmask = True
 
-    def __init__(self, client):
+    def __init__(self, client, planner=None):
         self.client = client
+        self.planner = planner or MoxaIOPlanner(client)
         super().__init__()
 
+    def read_spans(self):
+        return ["relay"]
+
+    def phys_dict_from_reads(self, reads):
+        return {int(item["relayIndex"]): int(item["relayStatus"])
+                for item in reads["relay"]}
+
+    def phys_mask_from_reads(self, reads):
+        return list_to_mask(reads["relay"], "relayIndex", "relayStatus")
+
     def get_phys_dict(self):
-        data = self.client.get_relays()
-        return {int(item["relayIndex"]): int(item["relayStatus"]) for item in data}
+        return self.phys_dict_from_reads(self.planner.execute(self.read_spans()))
+
+    def get_phys_mask(self):
+        return self.phys_mask_from_reads(self.planner.execute(self.read_spans()))
 
     def change_phys_relay_state(self, addr, state: bool):
         return self.client.set_relay(addr, int(state))
 
+    def change_phys_relays_state(self, states: dict):
+        return self.client.set_relays(states)
+
 
 class MoxaE1214:
     model = "moxa_e1214"
 
-    def __init__(self, ip, *args, **kwargs):
-        client = MoxaClient(ip)
-        di = MoxaDI(client)
-        relay = MoxaRelay(client)
+    def __init__(self, ip, timeout=2, *args, **kwargs):
+        self.client = MoxaClient(ip, timeout=timeout)
+        planner = MoxaIOPlanner(self.client)
+        di = MoxaDI(self.client, planner)
+        relay = MoxaRelay(self.client, planner)
         self.interface = ControllerInterface(di_interface=di, relay_interface=relay)
+
+    def get_timings(self):
+        return self.client.get_timings()
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,129 @@
+from gravity_controller_operator.controllers_super import AsyncDIInterface, \
+    AsyncRelayInterface, AsyncControllerInterface
+
+try:
+    import aiohttp
+except ImportError:  # опционально: pip install gravity_controller_operator[async]
+    aiohttp = None
+
+
+class AsyncMoxaClient:
+    """
+    Асинхронный клиент RESTful API Moxa ioLogik (vdn.dac.v1) на aiohttp.
+    Одна сессия на устройство, соединения переиспользуются.
+    """
+    def __init__(self, ip: str, timeout=2):
+        if aiohttp is None:
+            raise ImportError("Для AsyncMoxaClient требуется пакет aiohttp")
+        self.base_url = f"http://{ip}/api/slot/0/io"
+        self.headers = {
+            "Content-Type": "application/json",
+            "Accept": "vdn.dac.v1"
+        }
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session = None
+
+    async def connect(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                headers=self.headers, timeout=self.timeout)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _get(self, url):
+        await self.connect()
+        async with self.session.get(url) as r:
+            r.raise_for_status()
+            # Moxa отдаёт нестандартный Content-Type, проверку отключаем
+            return await r.json(content_type=None)
+
+    async def get_di(self):
+        data = await self._get(f"{self.base_url}/di")
+        return data["io"]["di"]
+
+    async def get_relays(self):
+        data = await self._get(f"{self.base_url}/relay")
+        return data["io"]["relay"]
+
+    async def set_relay(self, channel: int, state: int):
+        await self.connect()
+        url = f"{self.base_url}/relay/{channel}/relayStatus"
+        payload = {
+            "slot": "0",
+            "io": {
+                "relay": {
+                    str(channel): {
+                        "relayStatus": str(state)
+                    }
+                }
+            }
+        }
+        async with self.session.put(url, json=payload) as r:
+            r.raise_for_status()
+            return r.status == 200
+
+    async def set_relays(self, states: dict):
+        await self.connect()
+        payload = {
+            "slot": 0,
+            "io": {
+                "relay": [
+                    {"relayIndex": channel, "relayStatus": int(state)}
+                    for channel, state in sorted(states.items())
+                ]
+            }
+        }
+        async with self.session.put(f"{self.base_url}/relay", json=payload) as r:
+            r.raise_for_status()
+            return r.status == 200
+
+
+class AsyncMoxaDI(AsyncDIInterface):
+    map_keys_amount = 16
+    starts_with = 0
+
+    def __init__(self, client):
+        self.client = client
+        super().__init__()
+
+    async def get_phys_dict(self):
+        data = await self.client.get_di()
+        return {int(item["diIndex"]): item["diStatus"] for item in data}
+
+
+class AsyncMoxaRelay(AsyncRelayInterface):
+    map_keys_amount = 4
+    starts_with = 0
+
+    def __init__(self, client):
+        self.client = client
+        super().__init__()
+
+    async def get_phys_dict(self):
+        data = await self.client.get_relays()
+        return {int(item["relayIndex"]): int(item["relayStatus"]) for item in data}
+
+    async def change_phys_relay_state(self, addr, state: bool):
+        return await self.client.set_relay(addr, int(state))
+
+    async def change_phys_relays_state(self, states: dict):
+        return await self.client.set_relays(states)
+
+
+class AsyncMoxaE1214:
+    model = "moxa_e1214"
+
+    def __init__(self, ip, *args, **kwargs):
+        self.client = AsyncMoxaClient(ip)
+        di = AsyncMoxaDI(self.client)
+        relay = AsyncMoxaRelay(self.client)
+        self.interface = AsyncControllerInterface(di_interface=di, relay_interface=relay)
+
+    async def connect(self):
+        await self.client.connect()
+
+    async def close(self):
+        await self.client.close()
@@ -1,43 +1,102 @@
+import contextvars
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
 from gravity_controller_operator.controllers_super import DIInterface, RelayInterface, ControllerInterface
+from gravity_controller_operator.exceptions import DeviceError
+from gravity_controller_operator.retry import attempt_timeout
 from netping_contr import mixins
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
 
+# io_result('ok', <маска входов>, ...)
+IO_RESULT = re.compile(r"io_result\(\s*['\"](\w+)['\"]\s*,\s*(\d+)")
+
+
 class NetPingDevice(mixins.NetPingResponseParser):
-    def __init__(self, ip, port=80, username="visor", password="ping"):
+    """
+    HTTP-клиент NetPing. Соединения держатся открытыми в одной сессии
+    (keep-alive, Basic auth в сессии). В прошивке нет запроса состояния
+    всех реле сразу, поэтому relay.cgi?rN опрашиваются параллельно
+    с общим бюджетом времени timeout, не больше остатка бюджета повторов
+    (retry.attempt_timeout) (concurrent_relay_reads=False -
+    последовательно, для прошивок, плохо держащих несколько соединений).
+    Пул потоков свой у каждого устройства, по потоку на реле: медленный
+    NetPing не занимает потоки и бюджет времени соседних.
+    """
+    relays = range(1, 5)
+
+    def __init__(self, ip, port=80, username="visor", password="ping",
+                 timeout=2, concurrent_relay_reads=True):
         self.ip = ip
         self.port = port
         self.username = username
         self.password = password
         self.schema = "http://"
+        self.timeout = timeout
+        self.concurrent_relay_reads = concurrent_relay_reads
+        self.session = requests.Session()
+        self.session.auth = HTTPBasicAuth(self.username, self.password)
+        self.session.mount(self.schema, HTTPAdapter(
+            pool_connections=1, pool_maxsize=len(self.relays)))
+        self.executor = ThreadPoolExecutor(
+            max_workers=len(self.relays), thread_name_prefix=f"netping-{ip}")
 
     def get_full_url(self):
         return f"{self.schema}{self.ip}:{self.port}"
 
+    def _get(self, query, timeout=None):
+        return self.session.get(
+            url=f"{self.get_full_url()}/{query}",
+            timeout=attempt_timeout(self.timeout) if timeout is None else timeout)
+
     def get_all_di_status(self):
-        return requests.get(
-            url=f"{self.get_full_url()}/io.cgi?io",
-            auth=HTTPBasicAuth(self.username, self.password))
+        return self._get("io.cgi?io")
+
+    def get_di_mask(self):
+        """Маска линий из io.cgi?io как есть (бит 0 - линия 1, 0 - замкнута)."""
+        text = self.get_decoded_res(self.get_all_di_status())
+        match = IO_RESULT.search(text)
+        if match is None or match.group(1) == "error":
+            raise DeviceError(f"NetPing {self.ip}: bad io.cgi response {text!r}")
+        return int(match.group(2))
 
     def get_all_relay_states(self):
+        if not self.concurrent_relay_reads:
+            return {i: self.parse_relay_state(self._get(f"relay.cgi?r{i}"))
+                    for i in self.relays}
+        timeout = attempt_timeout(self.timeout)
+        deadline = time.monotonic() + timeout
+        futures = {i: self.executor.submit(self._get, f"relay.cgi?r{i}", timeout)
+                   for i in self.relays}
         states = {}
-        for i in range(1, 5):
-            r = requests.get(
-                url=f"{self.get_full_url()}/relay.cgi?r{i}",
-                auth=HTTPBasicAuth(self.username, self.password))
-            states[i] = self.parse_relay_state(r)
+        try:
+            for i, future in futures.items():
+                response = future.result(max(deadline - time.monotonic(), 0))
+                states[i] = self.parse_relay_state(response)
+        except TimeoutError:
+            for future in futures.values():
+                future.cancel()
+            raise requests.Timeout(
+                f"NetPing {self.ip}: relay states not received in {timeout:.2f}s")
         return states
 
     def change_relay_status(self, relay_num, state):
-        return requests.get(
-            url=f"{self.get_full_url()}/relay.cgi?r{relay_num}={state}",
-            auth=HTTPBasicAuth(self.username, self.password))
+        return self._get(f"relay.cgi?r{relay_num}={state}")
+
+    def close(self):
+        # Зависшие запросы завершатся по своему таймауту
+        self.executor.shutdown(wait=False)
+        self.session.close()
 
 
 class NetPingDI(DIInterface):
     map_keys_amount = 4
     starts_with = 1
+    bitmask = True
 
     def __init__(self, controller):
         self.controller = controller
@@ -47,10 +106,16 @@ class NetPingDI(DIInterface):
         raw = self.controller.get_all_di_status()
         return self.controller.parse_all_lines_request(raw)
 
+    def get_phys_mask(self):
+        # Как parse_all_lines_request: замкнутая линия (0) - состояние 1.
+        # Прошивка не отдаёт старшие нулевые биты, маска их восстанавливает
+        return ~self.controller.get_di_mask() & ((1 << self.map_keys_amount) - 1)
+
 
 class NetPingRelay(RelayInterface):
     map_keys_amount = 4
     starts_with = 1
+    bitmask = True
 
     def __init__(self, controller):
         self.controller = controller
@@ -59,18 +124,46 @@ class NetPingRelay(RelayInterface):
     def get_phys_dict(self):
         return self.controller.get_all_relay_states()
 
+    def get_phys_mask(self):
+        mask = 0
+        for relay, state in self.controller.get_all_relay_states().items():
+            if "error" in state:
+                raise DeviceError(f"Failed to read relay {relay}: {state}")
+            if int(state):
+                mask |= 1 << (relay - self.starts_with)
+        return mask
+
+    # Одна попытка на вызов: повторы и паузы делает device_guard
     def change_phys_relay_state(self, addr, state: bool):
-        result = self.controller.change_relay_status(addr, state)
-        while "error" in result:
-            result = self.controller.change_relay_status(addr, state)
+        # Прошивка понимает только 0/1, не True/False
+        response = self.controller.change_relay_status(addr, int(state))
+        response.raise_for_status()
+        if "error" in response.text:
+            raise DeviceError(f"Failed to change relay state: {response.text}")
+
+    def change_phys_relays_state(self, states: dict):
+        # Группового relay.cgi нет - команды уходят параллельно
+        futures = [self.controller.executor.submit(
+                       contextvars.copy_context().run,
+                       self.change_phys_relay_state, addr, state)
+                   for addr, state in states.items()]
+        for future in futures:
+            future.result()
 
 
 class NetPing2Controller:
     model = "netping_relay"
 
     def __init__(self, ip, port=80, username="visor", password="ping",
-                 name="netping_relay2", *args, **kwargs):
-        device = NetPingDevice(ip=ip, port=port, username=username, password=password)
-        di = NetPingDI(device)
-        relay = NetPingRelay(device)
+                 name="netping_relay2", timeout=2, concurrent_relay_reads=True,
+                 *args, **kwargs):
+        self.device = NetPingDevice(
+            ip=ip, port=port, username=username, password=password,
+            timeout=timeout, concurrent_relay_reads=concurrent_relay_reads)
+        di = NetPingDI(self.device)
+        relay = NetPingRelay(self.device)
         self.interface = ControllerInterface(di_interface=di, relay_interface=relay)
+
+    def close(self):
+        """Остановить пул потоков устройства и закрыть HTTP-сессию."""
+        self.device.close()
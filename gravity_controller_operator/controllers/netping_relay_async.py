@@ -0,0 +1,113 @@
+import asyncio
+
+from gravity_controller_operator.controllers_super import AsyncDIInterface, \
+    AsyncRelayInterface, AsyncControllerInterface
+from gravity_controller_operator.exceptions import DeviceError
+from netping_contr import mixins
+
+try:
+    import aiohttp
+except ImportError:  # опционально: pip install gravity_controller_operator[async]
+    aiohttp = None
+
+
+class AsyncNetPingDevice(mixins.NetPingResponseParser):
+    """
+    Асинхронный клиент NetPing на aiohttp. Парсеры netping_contr
+    переиспользуются: они получают уже прочитанный текст ответа.
+    """
+    relays = range(1, 5)
+
+    def __init__(self, ip, port=80, username="visor", password="ping", timeout=2):
+        if aiohttp is None:
+            raise ImportError("Для AsyncNetPingDevice требуется пакет aiohttp")
+        self.ip = ip
+        self.port = port
+        self.username = username
+        self.password = password
+        self.schema = "http://"
+        self.auth = aiohttp.BasicAuth(username, password)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session = None
+
+    def get_full_url(self):
+        return f"{self.schema}{self.ip}:{self.port}"
+
+    def get_decoded_res(self, response):
+        if isinstance(response, bytes):
+            return response.decode()
+        return response
+
+    async def connect(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(auth=self.auth, timeout=self.timeout)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _get(self, query):
+        await self.connect()
+        async with self.session.get(f"{self.get_full_url()}/{query}") as r:
+            return await r.read()
+
+    async def get_all_di_status(self):
+        return await self._get("io.cgi?io")
+
+    async def get_all_relay_states(self):
+        raw = await asyncio.gather(
+            *(self._get(f"relay.cgi?r{i}") for i in self.relays))
+        return {i: self.parse_relay_state(r) for i, r in zip(self.relays, raw)}
+
+    async def change_relay_status(self, relay_num, state):
+        return self.get_decoded_res(
+            await self._get(f"relay.cgi?r{relay_num}={state}"))
+
+
+class AsyncNetPingDI(AsyncDIInterface):
+    map_keys_amount = 4
+    starts_with = 1
+
+    def __init__(self, controller):
+        self.controller = controller
+        super().__init__()
+
+    async def get_phys_dict(self):
+        raw = await self.controller.get_all_di_status()
+        return self.controller.parse_all_lines_request(raw)
+
+
+class AsyncNetPingRelay(AsyncRelayInterface):
+    map_keys_amount = 4
+    starts_with = 1
+
+    def __init__(self, controller):
+        self.controller = controller
+        super().__init__()
+
+    async def get_phys_dict(self):
+        return await self.controller.get_all_relay_states()
+
+    async def change_phys_relay_state(self, addr, state: bool):
+        result = await self.controller.change_relay_status(addr, int(state))
+        if "error" in result:
+            raise DeviceError(f"Failed to change relay state: {result}")
+
+
+class AsyncNetPing2Controller:
+    model = "netping_relay"
+
+    def __init__(self, ip, port=80, username="visor", password="ping",
+                 name="netping_relay2", *args, **kwargs):
+        self.device = AsyncNetPingDevice(
+            ip=ip, port=port, username=username, password=password)
+        di = AsyncNetPingDI(self.device)
+        relay = AsyncNetPingRelay(self.device)
+        self.interface = AsyncControllerInterface(di_interface=di, relay_interface=relay)
+
+    async def connect(self):
+        await self.device.connect()
+
+    async def close(self):
+        await self.device.close()
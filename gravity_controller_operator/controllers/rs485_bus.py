@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+from pymodbus.client import ModbusSerialClient
+from pymodbus import Framer
+
+
+PRIORITY_WRITE = 0      # команды реле
+PRIORITY_POLL = 1       # фоновый опрос
+
+
+class RS485Bus:
+    """
+    Одна шина RS-485: единственный ModbusSerialClient на путь устройства
+    и очередь запросов к нему. Запросы разных slave обслуживаются по кругу,
+    запись реле идёт раньше фонового опроса, между кадрами выдерживается
+    пауза 3.5 символа (Modbus RTU).
+
+        bus = RS485Bus.get("/dev/ttyRS485", baudrate=9600)
+        client = bus.get_client()   # вместо ModbusSerialClient в драйвере
+    """
+    _buses = {}
+    _buses_lock = threading.Lock()
+
+    def __init__(self, device, baudrate=9600, stopbits=2, bytesize=8,
+                 parity="N", client=None):
+        self.device = device
+        self.params = (baudrate, stopbits, bytesize, parity)
+        self.client = client or ModbusSerialClient(
+            device,
+            framer=Framer.RTU,
+            baudrate=baudrate,
+            stopbits=stopbits,
+            bytesize=bytesize,
+            parity=parity,
+        )
+        # Старт + данные + чётность + стоп; на скоростях выше 19200
+        # спецификация фиксирует паузу 1.75 мс
+        char_time = (1 + bytesize + (parity != "N") + stopbits) / baudrate
+        self.frame_gap = 1.75e-3 if baudrate > 19200 else 3.5 * char_time
+        self._queues = {PRIORITY_WRITE: OrderedDict(), PRIORITY_POLL: OrderedDict()}
+        self._cond = threading.Condition()
+        self._last_frame_end = 0.0
+        self._closed = False
+        self.requests_done = 0
+        self._worker = threading.Thread(
+            target=self._work, name=f"rs485:{device}", daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def get(cls, device, baudrate=9600, stopbits=2, bytesize=8, parity="N"):
+        """
+        Общая шина для пути устройства; создаётся при первом обращении.
+        """
+        with cls._buses_lock:
+            bus = cls._buses.get(device)
+            if bus is None or bus._closed:
+                bus = cls._buses[device] = cls(
+                    device, baudrate, stopbits, bytesize, parity)
+            elif bus.params != (baudrate, stopbits, bytesize, parity):
+                raise ValueError(
+                    f"Bus {device} is already open with other serial settings "
+                    f"{bus.params}")
+            return bus
+
+    def get_client(self):
+        return BusClient(self)
+
+    def submit(self, slave, priority, method, args=(), kwargs=None):
+        """
+        Поставить вызов method(*args, **kwargs) в очередь шины -> Future.
+        """
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"Bus {self.device} is closed")
+            queue = self._queues[priority]
+            queue.setdefault(slave, deque()).append(
+                (future, method, args, kwargs or {}))
+            self._cond.notify()
+        return future
+
+    def call(self, slave, priority, method, args=(), kwargs=None):
+        return self.submit(slave, priority, method, args, kwargs).result()
+
+    def _next_request(self):
+        for priority in (PRIORITY_WRITE, PRIORITY_POLL):
+            queue = self._queues[priority]
+            if not queue:
+                continue
+            # Круговой обход slave: обслуженный уходит в конец очереди
+            slave, requests = queue.popitem(last=False)
+            request = requests.popleft()
+            if requests:
+                queue[slave] = requests
+            return request
+        return None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                request = self._next_request()
+                while request is None:
+                    if self._closed:
+                        return
+                    self._cond.wait()
+                    request = self._next_request()
+            future, method, args, kwargs = request
+            if not future.set_running_or_notify_cancel():
+                continue
+            gap = self._last_frame_end + self.frame_gap - time.monotonic()
+            if gap > 0:
+                time.sleep(gap)
+            try:
+                future.set_result(method(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._last_frame_end = time.monotonic()
+                self.requests_done += 1
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+        self.client.close()
+        with self._buses_lock:
+            if self._buses.get(self.device) is self:
+                del self._buses[self.device]
+
+
+class BusClient:
+    """
+    Заменяет ModbusSerialClient в драйверах: read_*/write_* ставятся
+    в очередь шины, write_* - с приоритетом команд.
+    """
+    def __init__(self, bus):
+        self.bus = bus
+
+    def __getattr__(self, name):
+        method = getattr(self.bus.client, name)
+        if not name.startswith(("read_", "write_")):
+            return method
+        priority = PRIORITY_WRITE if name.startswith("write_") else PRIORITY_POLL
+
+        def call(*args, slave=0, **kwargs):
+            kwargs["slave"] = slave
+            return self.bus.call(slave, priority, method, args, kwargs)
+        return call
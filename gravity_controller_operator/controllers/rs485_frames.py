@@ -0,0 +1,47 @@
+import struct
+
+
+# Кадры и параметры поиска модулей на шине RS-485 (rs485_scan). Модуль
+# не зависит от pyserial: его используют симулятор шины и diagnostics_cli
+BAUDRATES = (9600, 19200, 38400, 57600, 115200)
+PARITIES = ("N", "E", "O")
+STOPBITS = (2, 1)
+SLAVE_IDS = range(1, 248)
+
+# Модули Wiren Board: модель - ASCII по символу в input registers 200-219
+MODEL_REGISTER = 200
+MODEL_LENGTH = 20
+READ_INPUT_REGISTERS = 4
+# Ответ: slave, функция, счётчик байт, данные, CRC
+REPLY_SIZE = 5 + 2 * MODEL_LENGTH
+EXCEPTION_SIZE = 5
+
+def crc16(frame):
+    crc = 0xFFFF
+    for byte in frame:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return struct.pack("<H", crc)
+
+
+def probe_frame(slave):
+    pdu = struct.pack(">BBHH", slave, READ_INPUT_REGISTERS, MODEL_REGISTER,
+                      MODEL_LENGTH)
+    return pdu + crc16(pdu)
+
+
+def decode_model(data):
+    registers = struct.unpack(f">{MODEL_LENGTH}H", data)
+    return "".join(chr(r) for r in registers if 0 < r < 128).strip() or None
+
+
+def parse_slave_ids(spec):
+    """'1-16,32,100-110' -> [1, ..., 16, 32, 100, ..., 110]."""
+    ids = []
+    for part in spec.split(","):
+        first, _, last = part.strip().partition("-")
+        ids.extend(range(int(first), int(last or first) + 1))
+    if not all(1 <= slave <= 247 for slave in ids):
+        raise ValueError(f"Slave ids must be in 1..247: {spec!r}")
+    return ids
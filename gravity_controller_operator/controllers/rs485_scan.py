@@ -0,0 +1,133 @@
+import itertools
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import serial
+
+from gravity_controller_operator.controllers.rs485_frames import BAUDRATES, \
+    EXCEPTION_SIZE, PARITIES, READ_INPUT_REGISTERS, REPLY_SIZE, SLAVE_IDS, \
+    STOPBITS, crc16, decode_model, probe_frame
+
+
+ScanResult = namedtuple(
+    "ScanResult", "device slave baudrate parity stopbits model rtt")
+
+
+class BusScanner:
+    """
+    Поиск модулей на шине RS-485 перебором slave id и параметров порта.
+    Пробный запрос - чтение строки модели (Read Input Registers 200-219);
+    ответ-исключение тоже считается откликом (модуль есть, модели нет).
+
+    Шина полудуплексная, поэтому запросы идут строго по одному, но без
+    простоев: молчание ждётся timeout плюс время передачи заголовка
+    ответа на текущей скорости, следующий запрос уходит сразу после
+    ответа и паузы 3.5 символа. Стоп-биты приёмник не проверяет, поэтому
+    найденный модуль при других stopbits повторно не опрашивается.
+    Искажённые кадры (скорость или чётность не те) считаются в noise
+    по параметрам порта.
+    """
+    def __init__(self, device, timeout=0.05, serial_factory=serial.Serial):
+        self.device = device
+        self.timeout = timeout
+        self.noise = {}
+        self._port = serial_factory(device, timeout=timeout)
+        self._char_time = 0.0
+        self._head_timeout = timeout
+        self._last_frame_end = 0.0
+
+    def configure(self, baudrate, parity, stopbits, bytesize=8):
+        self._port.apply_settings({
+            "baudrate": baudrate, "parity": parity, "stopbits": stopbits,
+            "bytesize": bytesize})
+        self._char_time = (1 + bytesize + (parity != "N") + stopbits) / baudrate
+        self._head_timeout = self.timeout + EXCEPTION_SIZE * self._char_time
+        self._port.timeout = self._head_timeout
+        self._port.reset_input_buffer()
+
+    def probe(self, slave):
+        """
+        -> (модель или None, время ответа) или None, если slave молчит.
+        Искажённый ответ возвращает None и увеличивает noise.
+        """
+        gap = self._last_frame_end + 3.5 * self._char_time - time.monotonic()
+        if gap > 0:
+            time.sleep(gap)
+        started = time.monotonic()
+        self._port.write(probe_frame(slave))
+        head = self._port.read(EXCEPTION_SIZE)
+        try:
+            if not head:
+                return None
+            if len(head) < EXCEPTION_SIZE or head[0] != slave:
+                return self._garbled()
+            if head[1] == READ_INPUT_REGISTERS | 0x80:
+                if crc16(head[:3]) != head[3:]:
+                    return self._garbled()
+                return None, time.monotonic() - started
+            # Остаток ответа уже в пути: ждать только время его передачи
+            self._port.timeout = self.timeout + REPLY_SIZE * self._char_time
+            try:
+                frame = head + self._port.read(REPLY_SIZE - EXCEPTION_SIZE)
+            finally:
+                self._port.timeout = self._head_timeout
+            if head[1] != READ_INPUT_REGISTERS or len(frame) < REPLY_SIZE \
+                    or crc16(frame[:-2]) != frame[-2:]:
+                return self._garbled()
+            return decode_model(frame[3:-2]), time.monotonic() - started
+        finally:
+            self._last_frame_end = time.monotonic()
+
+    def _garbled(self):
+        self._port.reset_input_buffer()
+        settings = (self._port.baudrate, self._port.parity, self._port.stopbits)
+        self.noise[settings] = self.noise.get(settings, 0) + 1
+        return None
+
+    def scan(self, slave_ids=SLAVE_IDS, baudrates=BAUDRATES, parities=PARITIES,
+             stopbits=STOPBITS, bytesize=8, on_found=None):
+        """
+        Перебрать все сочетания параметров -> [ScanResult].
+        on_found(result) вызывается для каждого найденного модуля сразу.
+        """
+        results = []
+        found = set()
+        for baudrate, parity, stop in itertools.product(
+                baudrates, parities, stopbits):
+            self.configure(baudrate, parity, stop, bytesize)
+            for slave in slave_ids:
+                if (baudrate, parity, slave) in found:
+                    continue
+                reply = self.probe(slave)
+                if reply is None:
+                    continue
+                found.add((baudrate, parity, slave))
+                result = ScanResult(self.device, slave, baudrate, parity, stop,
+                                    *reply)
+                results.append(result)
+                if on_found:
+                    on_found(result)
+        return results
+
+    def close(self):
+        self._port.close()
+
+
+def scan_buses(devices, timeout=0.05, on_found=None, **scan_options):
+    """
+    Просканировать несколько портов одновременно (по потоку на порт)
+    -> ([ScanResult], {путь: noise}).
+    """
+    def scan_one(device):
+        scanner = BusScanner(device, timeout)
+        try:
+            return scanner.scan(on_found=on_found, **scan_options), scanner.noise
+        finally:
+            scanner.close()
+
+    with ThreadPoolExecutor(max_workers=len(devices),
+                            thread_name_prefix="rs485-scan") as pool:
+        scans = list(pool.map(scan_one, devices))
+    results = [result for found, _ in scans for result in found]
+    return results, {device: noise for device, (_, noise) in zip(devices, scans)}
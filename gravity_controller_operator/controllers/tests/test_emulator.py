@@ -0,0 +1,109 @@
+import time
+
+import pytest
+
+from gravity_controller_operator.controllers.emulator_contr import \
+    EmulatedDevice, EmulatorController
+from gravity_controller_operator.main import ControllerOperator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_defaults_are_backward_compatible():
+    operator = ControllerOperator(EmulatorController(ip="ignored"),
+                                  auto_update_points=False)
+    points = operator.get_points()
+    assert list(points["di"]) == [1, 2, 3, 4]
+    assert all(point["state"] == 0 for point in points["relays"].values())
+
+
+def test_relay_writes_read_back():
+    operator = ControllerOperator(
+        EmulatorController(relay_count=8, starts_with=0, relay_spec_addr={7: 0}),
+        auto_update_points=False)
+    operator.change_relays_state({3: 1, 5: 1})
+    operator.update_points()
+    relays = operator.get_points()["relays"]
+    assert [relays[ch]["state"] for ch in range(7)] == [0, 0, 0, 1, 0, 1, 0]
+    operator.change_relay_state(7, 1)
+    operator.update_points()
+    # Канал 7 смотрит на физический адрес 0
+    assert operator.get_point("relays", 0)["state"] == 1
+
+
+def test_random_pattern_is_seeded_and_near_rate():
+    masks = []
+    for _ in range(2):
+        clock = FakeClock()
+        device = EmulatedDevice(di_count=1000, pattern="random", rate=0.5,
+                                seed=42, clock=clock)
+        flips = 0
+        previous = device.read_di()
+        for _ in range(10):
+            clock.now += 1.0
+            mask = device.read_di()
+            flips += bin(mask ^ previous).count("1")
+            previous = mask
+        masks.append(previous)
+    assert masks[0] == masks[1]
+    # 1000 каналов * 0.5 1/с * 10 с = 5000 переключений (чётные взаимно гасятся)
+    assert 2000 < flips < 5000
+
+
+def test_jitter_does_not_change_di_sequence():
+    sequences = []
+    for delays in (0, 1, 7):
+        clock = FakeClock()
+        device = EmulatedDevice(di_count=64, pattern="random", rate=0.5,
+                                seed=42, jitter=0.01, clock=clock)
+        masks = []
+        for _ in range(10):
+            for _ in range(delays):
+                device.delay()
+            clock.now += 1.0
+            masks.append(device.read_di())
+        sequences.append(masks)
+    assert sequences[0] == sequences[1] == sequences[2]
+
+
+def test_periodic_and_bursty_patterns():
+    clock = FakeClock()
+    device = EmulatedDevice(di_count=4, pattern="periodic", rate=1.0, seed=1,
+                            clock=clock)
+    first = device.read_di()
+    clock.now += 1.0
+    assert device.read_di() == first ^ 0b1111
+    clock = FakeClock()
+    device = EmulatedDevice(di_count=100, pattern="bursty", rate=1.0, seed=1,
+                            burst_interval=10.0, burst_duration=1.0, clock=clock)
+    changes = []
+    previous = device.read_di()
+    for _ in range(200):
+        clock.now += 0.5
+        mask = device.read_di()
+        changes.append(mask != previous)
+        previous = mask
+    # Между пачками входы стоят
+    assert 0 < sum(changes) < len(changes) / 2
+
+
+def test_latency_and_bitmask_mode():
+    controller = EmulatorController(di_count=20000, pattern="random", rate=0.1,
+                                    seed=3, latency=0.01, bitmask=True)
+    operator = ControllerOperator(controller, auto_update_points=False)
+    started = time.monotonic()
+    operator.update_points()
+    assert time.monotonic() - started >= 0.02
+    assert len(operator.get_points()["di"]) == 20000
+    assert controller.interface.di_interface.phys_mask is not None
+
+
+def test_unknown_pattern():
+    with pytest.raises(ValueError):
+        EmulatedDevice(pattern="sine")
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+import requests
+
+from gravity_controller_operator.controllers.moxa import MoxaClient, MoxaE1214
+from gravity_controller_operator.simulators.moxa import MoxaSimulator
+
+
+def make_client(simulator):
+    return MoxaClient(**simulator.controller_kwargs(0))
+
+
+def test_combined_io_request():
+    with MoxaSimulator() as simulator:
+        simulator.relays[2] = 1
+        client = make_client(simulator)
+        io = client.get_io()
+        assert io["relay"][2]["relayStatus"] == 1 and len(io["di"]) == 16
+        assert client.combined_io is True
+        assert simulator.faults.get_stats()["reply"] == 1
+        assert set(client.get_timings()) == {"io"}
+        client.close()
+
+
+def test_fallback_without_combined_io():
+    with MoxaSimulator(combined_io=False, delay=0.2) as simulator:
+        client = make_client(simulator)
+        io = client.get_io()
+        assert len(io["di"]) == 16 and len(io["relay"]) == 4
+        # /io ответил 404 - прошивка без общего запроса, это запоминается
+        assert client.combined_io is False
+        assert simulator.faults.get_stats()["reply"] == 3
+        started = time.monotonic()
+        client.get_io()
+        # DI и реле читаются параллельно, /io больше не запрашивается
+        assert time.monotonic() - started < 0.35
+        assert simulator.faults.get_stats()["reply"] == 5
+        assert set(client.get_timings()) == {"io", "di", "relay"}
+        client.close()
+
+
+def test_server_error_is_not_learned():
+    with MoxaSimulator(error_rate=1.0) as simulator:
+        client = make_client(simulator)
+        with pytest.raises(requests.HTTPError):
+            client.get_io()
+        assert client.combined_io is None
+        client.close()
+
+
+def test_write_timings():
+    with MoxaSimulator() as simulator:
+        controller = MoxaE1214(**simulator.controller_kwargs(0))
+        relay = controller.interface.relay_interface
+        relay.change_relay_state(1, 1)
+        relay.change_relays_state({2: 1, 3: 1})
+        assert simulator.relays == [0, 1, 1, 1]
+        controller.interface.update_all()
+        timings = controller.get_timings()
+        assert set(timings) == {"di", "relay", "io", "set_relay", "set_relays"}
+        assert all(value > 0 for value in timings.values())
+        controller.client.close()
@@ -1,3 +1,5 @@
+from collections.abc import Mapping
+
 import pytest
 from gravity_controller_operator.main import ControllerOperator
 from gravity_controller_operator.controllers.moxa import MoxaE1214
@@ -11,13 +13,13 @@ def moxa_operator():
 
 def test_di_states(moxa_operator):
     di = moxa_operator.get_points()["di"]
-    assert isinstance(di, dict)
+    assert isinstance(di, Mapping)
     assert all(isinstance(v["state"], (int, type(None))) for v in di.values())
 
 
 def test_relay_states(moxa_operator):
     relays = moxa_operator.get_points()["relays"]
-    assert isinstance(relays, dict)
+    assert isinstance(relays, Mapping)
     assert all(isinstance(v["state"], (int, type(None))) for v in relays.values())
 
 
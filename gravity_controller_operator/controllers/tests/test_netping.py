@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from gravity_controller_operator.controllers.netping_relay import \
+    NetPing2Controller, NetPingDevice
+from gravity_controller_operator.fleet import FleetOperator
+from gravity_controller_operator.main import ControllerOperator
+from gravity_controller_operator.simulators.netping import NetPingSimulator
+
+
+def make_device(simulator, **kwargs):
+    kwargs = dict(simulator.controller_kwargs(0), **kwargs)
+    return NetPingDevice(kwargs.pop("ip"), **kwargs)
+
+
+def test_keep_alive_session():
+    with NetPingSimulator() as simulator:
+        controller = NetPing2Controller(**simulator.controller_kwargs(0))
+        for _ in range(10):
+            controller.interface.update_all()
+        controller.interface.relay_interface.change_relays_state({1: 1, 2: 1})
+        # Не больше соединения на реле за все опросы и записи
+        assert simulator.connections <= len(NetPingDevice.relays)
+        assert simulator.relays[1:3] == [1, 1]
+
+
+def test_relay_reads_are_concurrent():
+    with NetPingSimulator(delay=0.2) as simulator:
+        device = make_device(simulator)
+        simulator.relays[3] = 1
+        started = time.monotonic()
+        states = device.get_all_relay_states()
+        assert {i: int(state) for i, state in states.items()} == \
+            {1: 0, 2: 0, 3: 1, 4: 0}
+        assert time.monotonic() - started < 0.5
+        device.close()
+
+
+def test_relay_reads_time_out_within_budget():
+    with NetPingSimulator(delay=0.5) as simulator:
+        device = make_device(simulator, timeout=0.2)
+        started = time.monotonic()
+        with pytest.raises(requests.Timeout):
+            device.get_all_relay_states()
+        assert time.monotonic() - started < 0.4
+        # Зависшие запросы не держат потоки устройства дольше таймаута
+        simulator.faults.configure(delay=0.0)
+        time.sleep(0.3)
+        assert len(device.get_all_relay_states()) == 4
+        device.close()
+
+
+def test_devices_do_not_share_time_budget():
+    with NetPingSimulator(delay=0.4) as simulator:
+        devices = [make_device(simulator, timeout=1.0) for _ in range(12)]
+        errors = []
+
+        def poll(device):
+            try:
+                device.get_all_relay_states()
+            except requests.RequestException as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=poll, args=(device,))
+                   for device in devices]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        for device in devices:
+            device.close()
+
+
+def netping_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("netping-")]
+
+
+def test_operators_close_device_executors():
+    with NetPingSimulator() as simulator:
+        before = len(netping_threads())
+        with ControllerOperator(NetPing2Controller(**simulator.controller_kwargs(0)),
+                                update_cooldown=0.01) as operator:
+            time.sleep(0.1)
+            assert len(netping_threads()) > before
+        assert operator.controller.device.executor._shutdown
+
+        with FleetOperator(max_workers=2, update_cooldown=0.01) as fleet:
+            for i in range(3):
+                fleet.register(f"np_{i}", "netping_relay",
+                               **simulator.controller_kwargs(0))
+            time.sleep(0.1)
+            removed = fleet.remove_controller("np_0")
+            assert removed.controller.device.executor._shutdown
+        assert all(device.controller.device.executor._shutdown
+                   for device in fleet.devices.values())
+        time.sleep(0.1)
+        assert len(netping_threads()) == before
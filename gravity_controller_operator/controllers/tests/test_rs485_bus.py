@@ -0,0 +1,58 @@
+import threading
+import time
+
+from gravity_controller_operator.controllers.rs485_bus import RS485Bus, \
+    PRIORITY_POLL, PRIORITY_WRITE
+
+
+class FakeSerialClient:
+    def __init__(self):
+        self.calls = []
+        self.gate = threading.Event()
+
+    def read_coils(self, address, count, slave=0):
+        self.gate.wait(1)
+        self.calls.append(("read", slave))
+        return [False] * count
+
+    def write_coil(self, address, value, slave=0):
+        self.calls.append(("write", slave))
+        return True
+
+    def close(self):
+        pass
+
+
+def test_writes_first_and_slaves_round_robin():
+    client = FakeSerialClient()
+    bus = RS485Bus("/dev/null", baudrate=115200, client=client)
+    # Первый запрос держит шину, пока очередь наполняется
+    blocker = bus.submit(9, PRIORITY_POLL, client.read_coils, (0, 1), {"slave": 9})
+    while not blocker.running():
+        time.sleep(0.001)
+    futures = [bus.submit(slave, PRIORITY_POLL, client.read_coils, (0, 1),
+                          {"slave": slave})
+               for slave in (1, 1, 1, 2, 2, 3)]
+    futures.append(bus.submit(2, PRIORITY_WRITE, client.write_coil, (0, True),
+                              {"slave": 2}))
+    client.gate.set()
+    for future in [blocker] + futures:
+        future.result(timeout=2)
+    bus.close()
+    assert client.calls == [
+        ("read", 9), ("write", 2),
+        ("read", 1), ("read", 2), ("read", 3), ("read", 1), ("read", 2), ("read", 1),
+    ]
+
+
+def test_bus_client_routes_through_queue():
+    client = FakeSerialClient()
+    client.gate.set()
+    bus = RS485Bus("/dev/null", client=client)
+    proxy = bus.get_client()
+    assert proxy.read_coils(0, 2, slave=5) == [False, False]
+    assert proxy.write_coil(1, True, slave=5) is True
+    assert bus.requests_done == 2
+    # 3.5 символа по 11 бит (8N2) на 9600
+    assert abs(bus.frame_gap - 3.5 * 11 / 9600) < 1e-9
+    bus.close()
@@ -0,0 +1,53 @@
+import subprocess
+import sys
+
+import pytest
+
+from gravity_controller_operator.controllers.rs485_frames import \
+    parse_slave_ids
+from gravity_controller_operator.controllers.rs485_scan import BusScanner, \
+    scan_buses
+from gravity_controller_operator.simulators.rtu import RTUSimulator
+
+
+def test_parse_slave_ids():
+    assert parse_slave_ids("1-3,7,10-11") == [1, 2, 3, 7, 10, 11]
+    with pytest.raises(ValueError):
+        parse_slave_ids("0-5")
+
+
+def test_scan_finds_responding_modules():
+    with RTUSimulator(slaves={3, 17}) as bus:
+        found = []
+        results, noise = scan_buses(
+            [bus.path], timeout=0.02, on_found=found.append,
+            slave_ids=range(1, 21), baudrates=(9600,), parities=("N",),
+            stopbits=(2, 1))
+    # На второй настройке стоп-битов найденные не переопрашиваются
+    assert [(r.slave, r.stopbits) for r in results] == [(3, 2), (17, 2)]
+    assert found == results
+    assert all(r.model == "WBMR6LV" and r.rtt < 0.02 for r in results)
+    assert noise == {bus.path: {}}
+
+
+def test_garbled_replies_count_as_noise():
+    with RTUSimulator(slaves={5}) as bus:
+        scanner = BusScanner(bus.path, timeout=0.02)
+        scanner.configure(19200, "N", 1)
+        assert scanner.probe(5) is not None
+        bus.faults.configure(error_rate=1.0)
+        # Исключение Modbus - модуль есть, модели нет
+        assert scanner.probe(5)[0] is None
+        bus.faults.configure(error_rate=0.0, reset_rate=1.0)
+        assert scanner.probe(5) is None
+        assert scanner.probe(6) is None
+        assert scanner.noise == {(19200, "N", 1): 1}
+        scanner.close()
+
+
+def test_cli_and_simulator_import_without_pyserial():
+    # Без pyserial недоступен только режим scan
+    code = ("import sys; sys.modules['serial'] = None; "
+            "import gravity_controller_operator.diagnostics_cli, "
+            "gravity_controller_operator.simulators.rtu")
+    subprocess.run([sys.executable, "-c", code], check=True)
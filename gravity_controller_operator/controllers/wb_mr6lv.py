@@ -1,63 +1,71 @@
 from gravity_controller_operator.controllers_super import DIInterface, RelayInterface, ControllerInterface
+from gravity_controller_operator.modbus_planner import ModbusReadMixin, \
+    ModbusReadPlanner, PymodbusReader, READ_DISCRETE_INPUTS, READ_COILS, \
+    contiguous_runs
+from gravity_controller_operator.exceptions import DeviceError
 from pymodbus.client import ModbusSerialClient
 from pymodbus import Framer
+from gravity_controller_operator.controllers.rs485_bus import RS485Bus
 
 
-class WBMR6LVDI(DIInterface):
+class WBMR6LVDI(ModbusReadMixin, DIInterface):
     map_keys_amount = 8
     starts_with = 0
     spec_addr = {0: 7, 1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5}
+    read_function = READ_DISCRETE_INPUTS
 
-    def __init__(self, client, slave_id):
+    def __init__(self, client, slave_id, planner=None):
         self.client = client
         self.slave_id = slave_id
+        self.planner = planner or ModbusReadPlanner(PymodbusReader(client))
         super().__init__()
 
-    def get_phys_dict(self):
-        response = self.client.read_discrete_inputs(
-            self.starts_with, self.map_keys_amount, slave=self.slave_id)
-        while not response or response.isError():
-            response = self.client.read_discrete_inputs(
-                self.starts_with, self.map_keys_amount, slave=self.slave_id)
-        return {i: bit for i, bit in enumerate(response.bits)}
 
-
-class WBMR6LVRelay(RelayInterface):
+class WBMR6LVRelay(ModbusReadMixin, RelayInterface):
     map_keys_amount = 6
     starts_with = 0
     spec_addr = {1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5}
+    read_function = READ_COILS
 
-    def __init__(self, client, slave_id):
+    def __init__(self, client, slave_id, planner=None):
         self.client = client
         self.slave_id = slave_id
+        self.planner = planner or ModbusReadPlanner(PymodbusReader(client))
         super().__init__()
 
-    def get_phys_dict(self):
-        response = self.client.read_coils(
-            self.starts_with, self.map_keys_amount, slave=self.slave_id)
-        while not response or response.isError():
-            response = self.client.read_coils(
-                self.starts_with, self.map_keys_amount, slave=self.slave_id)
-        return {i: bit for i, bit in enumerate(response.bits)}
-
+    # Одна попытка на вызов: повторы и паузы делает device_guard
     def change_phys_relay_state(self, addr, state: bool):
         result = self.client.write_coil(addr, state, slave=self.slave_id)
-        while not result or result.isError():
-            result = self.client.write_coil(addr, state, slave=self.slave_id)
+        if not result or result.isError():
+            raise DeviceError(f"Failed to change relay state: {result}")
+
+    def change_phys_relays_state(self, states: dict):
+        # Write Multiple Coils (0x0F) на каждый непрерывный участок адресов
+        for start, values in contiguous_runs(states):
+            result = self.client.write_coils(start, values, slave=self.slave_id)
+            if not result or result.isError():
+                raise DeviceError(f"Failed to change relays state: {result}")
 
 
 class WBMR6LV:
     model = "wb_mr6lv"
 
     def __init__(self, device, slave_id, baudrate=9600, stopbits=2, bytesize=8,
-                 name="WBMR6LV", *args, **kwargs):
-        client = ModbusSerialClient(
-            device,
-            framer=Framer.RTU,
-            baudrate=baudrate,
-            stopbits=stopbits,
-            bytesize=bytesize,
-        )
-        di = WBMR6LVDI(client, slave_id)
-        relay = WBMR6LVRelay(client, slave_id)
+                 name="WBMR6LV", shared_bus=True, *args, **kwargs):
+        if shared_bus:
+            # Все модули на одном порту ходят через общую очередь шины
+            self.bus = RS485Bus.get(device, baudrate, stopbits, bytesize)
+            client = self.bus.get_client()
+        else:
+            self.bus = None
+            client = ModbusSerialClient(
+                device,
+                framer=Framer.RTU,
+                baudrate=baudrate,
+                stopbits=stopbits,
+                bytesize=bytesize,
+            )
+        planner = ModbusReadPlanner(PymodbusReader(client))
+        di = WBMR6LVDI(client, slave_id, planner)
+        relay = WBMR6LVRelay(client, slave_id, planner)
         self.interface = ControllerInterface(di_interface=di, relay_interface=relay)
@@ -0,0 +1,78 @@
+from gravity_controller_operator.controllers_super import AsyncDIInterface, \
+    AsyncRelayInterface, AsyncControllerInterface
+from gravity_controller_operator.exceptions import DeviceError
+from gravity_controller_operator.modbus_planner import contiguous_runs
+from pymodbus.client import AsyncModbusSerialClient
+from pymodbus import Framer
+
+
+class AsyncWBMR6LVDI(AsyncDIInterface):
+    map_keys_amount = 8
+    starts_with = 0
+    spec_addr = {0: 7, 1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5}
+
+    def __init__(self, client, slave_id):
+        self.client = client
+        self.slave_id = slave_id
+        super().__init__()
+
+    async def get_phys_dict(self):
+        response = await self.client.read_discrete_inputs(
+            self.starts_with, self.map_keys_amount, slave=self.slave_id)
+        if not response or response.isError():
+            raise DeviceError(f"No response from controller: {response}")
+        return {i: bit for i, bit in enumerate(response.bits)}
+
+
+class AsyncWBMR6LVRelay(AsyncRelayInterface):
+    map_keys_amount = 6
+    starts_with = 0
+    spec_addr = {1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5}
+
+    def __init__(self, client, slave_id):
+        self.client = client
+        self.slave_id = slave_id
+        super().__init__()
+
+    async def get_phys_dict(self):
+        response = await self.client.read_coils(
+            self.starts_with, self.map_keys_amount, slave=self.slave_id)
+        if not response or response.isError():
+            raise DeviceError(f"No response from controller: {response}")
+        return {i: bit for i, bit in enumerate(response.bits)}
+
+    # Одна попытка на вызов: повторы и паузы делает device_guard
+    async def change_phys_relay_state(self, addr, state: bool):
+        result = await self.client.write_coil(addr, state, slave=self.slave_id)
+        if not result or result.isError():
+            raise DeviceError(f"Failed to change relay state: {result}")
+
+    async def change_phys_relays_state(self, states: dict):
+        for start, values in contiguous_runs(states):
+            result = await self.client.write_coils(
+                start, values, slave=self.slave_id)
+            if not result or result.isError():
+                raise DeviceError(f"Failed to change relays state: {result}")
+
+
+class AsyncWBMR6LV:
+    model = "wb_mr6lv"
+
+    def __init__(self, device, slave_id, baudrate=9600, stopbits=2, bytesize=8,
+                 name="WBMR6LV", *args, **kwargs):
+        self.client = AsyncModbusSerialClient(
+            device,
+            framer=Framer.RTU,
+            baudrate=baudrate,
+            stopbits=stopbits,
+            bytesize=bytesize,
+        )
+        di = AsyncWBMR6LVDI(self.client, slave_id)
+        relay = AsyncWBMR6LVRelay(self.client, slave_id)
+        self.interface = AsyncControllerInterface(di_interface=di, relay_interface=relay)
+
+    async def connect(self):
+        await self.client.connect()
+
+    async def close(self):
+        self.client.close()
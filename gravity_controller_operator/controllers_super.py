@@ -1,5 +1,199 @@
 from abc import ABC, abstractmethod
+from array import array
+import asyncio
+from collections.abc import Mapping
 import datetime
+import time
+
+from gravity_controller_operator.bitmask import MaskDebouncer
+from gravity_controller_operator.exceptions import DeviceError
+from gravity_controller_operator.metrics import DeviceMetrics
+from gravity_controller_operator.retry import DeviceGuard
+
+
+POINT_KEYS = ("state", "changed", "addr")
+
+
+class PointTable:
+    """
+    Компактная таблица точек: параллельные массивы состояний и меток
+    времени изменения плюс индекс физический адрес -> логические каналы.
+    Строится один раз, при опросе новые объекты не создаются.
+    """
+    __slots__ = ("channels", "addrs", "index", "addr_index", "values",
+                 "changed", "version", "_frozen")
+
+    def __init__(self, channels, addrs):
+        self.channels = tuple(channels)
+        self.addrs = tuple(addrs)
+        self.index = {ch: i for i, ch in enumerate(self.channels)}
+        addr_index = {}
+        for i, addr in enumerate(self.addrs):
+            addr_index.setdefault(addr, []).append(i)
+        # Несколько логических каналов могут смотреть на один адрес
+        self.addr_index = {addr: tuple(ix) for addr, ix in addr_index.items()}
+        self.values = [None] * len(self.channels)
+        # Метка времени (time.time()), 0.0 - точка ещё не менялась
+        self.changed = array("d", bytes(8 * len(self.channels)))
+        # Растёт при каждой записи - по нему кэшируется freeze()
+        self.version = 0
+        self._frozen = None
+
+    def __len__(self):
+        return len(self.channels)
+
+    def changed_at(self, idx):
+        ts = self.changed[idx]
+        return datetime.datetime.fromtimestamp(ts) if ts else None
+
+    def set(self, idx, value, now, force=False):
+        """
+        Записать значение в точку. Метка времени ставится при фактическом
+        изменении значения (или всегда, если force=True).
+        Возвращает True, если значение изменилось.
+        """
+        changed = self.values[idx] != value
+        if changed or force:
+            self.values[idx] = value
+            self.changed[idx] = now
+            self.version += 1
+        return changed
+
+    def apply(self, values, now):
+        """
+        Применить словарь {физический адрес: значение} за один проход.
+        Возвращает список (индекс, прежнее значение) изменившихся точек.
+        """
+        changed = []
+        get = values.get
+        points = self.values
+        stamps = self.changed
+        for addr, idxs in self.addr_index.items():
+            value = get(addr)
+            if value is None:
+                continue
+            for idx in idxs:
+                old = points[idx]
+                if old != value:
+                    points[idx] = value
+                    stamps[idx] = now
+                    changed.append((idx, old))
+        if changed:
+            self.version += 1
+        return changed
+
+    def apply_bits(self, mask, diff, base, now, cast=int):
+        """
+        Применить чтение битовой маской: бит i - физический адрес base + i.
+        Проходятся только биты diff (изменившиеся по XOR с прошлым чтением).
+        """
+        changed = []
+        points = self.values
+        stamps = self.changed
+        while diff:
+            low = diff & -diff
+            diff ^= low
+            bit = low.bit_length() - 1
+            value = cast(mask >> bit & 1)
+            for idx in self.addr_index.get(base + bit, ()):
+                old = points[idx]
+                if old != value:
+                    points[idx] = value
+                    stamps[idx] = now
+                    changed.append((idx, old))
+        if changed:
+            self.version += 1
+        return changed
+
+    def freeze(self):
+        """
+        Неизменяемая копия таблицы. Пока таблица не менялась,
+        возвращается одна и та же копия.
+        """
+        frozen = self._frozen
+        if frozen is None or frozen.version != self.version:
+            frozen = self._frozen = FrozenPointTable(self)
+        return frozen
+
+
+class FrozenPointTable:
+    """
+    Неизменяемая копия PointTable для снимков состояния.
+    Каналы, адреса и индексы общие с исходной таблицей.
+    """
+    __slots__ = ("channels", "addrs", "index", "values", "changed", "version")
+
+    def __init__(self, table):
+        self.channels = table.channels
+        self.addrs = table.addrs
+        self.index = table.index
+        self.values = tuple(table.values)
+        self.changed = array("d", table.changed)
+        self.version = table.version
+
+    def __len__(self):
+        return len(self.channels)
+
+    def changed_at(self, idx):
+        ts = self.changed[idx]
+        return datetime.datetime.fromtimestamp(ts) if ts else None
+
+
+class PointView(Mapping):
+    """
+    Представление одной точки таблицы в виде
+    {"state": ..., "changed": datetime | None, "addr": ...}.
+    """
+    __slots__ = ("_table", "_idx")
+
+    def __init__(self, table, idx):
+        self._table = table
+        self._idx = idx
+
+    def __getitem__(self, key):
+        if key == "state":
+            return self._table.values[self._idx]
+        if key == "changed":
+            return self._table.changed_at(self._idx)
+        if key == "addr":
+            return self._table.addrs[self._idx]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(POINT_KEYS)
+
+    def __len__(self):
+        return len(POINT_KEYS)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class StateView(Mapping):
+    """
+    Представление таблицы точек в виде {логический канал: PointView}.
+    Совместимо с прежним словарём состояний по чтению.
+    """
+    __slots__ = ("_table",)
+
+    def __init__(self, table):
+        self._table = table
+
+    def __getitem__(self, ch):
+        return PointView(self._table, self._table.index[ch])
+
+    def __iter__(self):
+        return iter(self._table.channels)
+
+    def __len__(self):
+        return len(self._table)
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def to_dict(self):
+        """Обычный словарь словарей (например, для сериализации)."""
+        return {ch: dict(point) for ch, point in self.items()}
 
 
 class SoftStateMixin:
@@ -10,30 +204,102 @@ class SoftStateMixin:
     spec_addr = {}      # переназначение адресов (если физический != логическому)
     map_keys_amount = 0
     starts_with = 0
+    mask_value = int    # тип значения точки при чтении битовой маской
 
     def __init__(self):
+        # Слушатели изменений: listener(channel, old, new, timestamp)
+        self.listeners = []
+        # Последняя применённая маска и биты, изменённые в обход устройства
+        # (set_point), - их нужно сверить со следующим чтением
+        self.phys_mask = None
+        self._mask_dirty = 0
+        self.debouncer = None
         self.state = self._init_state()
 
     def _init_state(self):
-        points = {}
-        for i in range(self.map_keys_amount):
-            logical_ch = self.starts_with + i
-            addr = self.spec_addr.get(logical_ch, logical_ch)
-            points[logical_ch] = {"state": None, "changed": None, "addr": addr}
-        return points
+        channels = [self.starts_with + i for i in range(self.map_keys_amount)]
+        addrs = [self.spec_addr.get(ch, ch) for ch in channels]
+        self.point_table = PointTable(channels, addrs)
+        return StateView(self.point_table)
 
     def update_state(self, addr, value, mark_time=True):
-        now = datetime.datetime.now() if mark_time else None
-        for logical_ch, info in self.state.items():
-            if info["addr"] == addr:
-                info["state"] = value
-                info["changed"] = now
+        """
+        Обновить все логические каналы, привязанные к физическому адресу.
+        mark_time=False - метка времени ставится только при изменении.
+        """
+        now = time.time()
+        for idx in self.point_table.addr_index.get(addr, ()):
+            self._set_idx(idx, value, now, mark_time)
+
+    def set_point(self, logical_ch, value, mark_time=True):
+        idx = self.point_table.index.get(logical_ch)
+        if idx is not None:
+            self._set_idx(idx, value, time.time(), mark_time)
+
+    def set_points(self, values: dict, mark_time=True):
+        for logical_ch, value in values.items():
+            self.set_point(logical_ch, value, mark_time)
+
+    def _set_idx(self, idx, value, now, mark_time):
+        old = self.point_table.values[idx]
+        if self.point_table.set(idx, value, now, force=mark_time):
+            bit = self.point_table.addrs[idx] - self.starts_with
+            if bit >= 0:
+                self._mask_dirty |= 1 << bit
+            self._notify([(idx, old)], now)
+
+    def apply_phys_dict(self, values):
+        """
+        Применить полное чтение устройства {физический адрес: значение}.
+        """
+        now = time.time()
+        changed = self.point_table.apply(values, now)
+        if changed:
+            self._notify(changed, now)
+        return changed
+
+    def apply_phys_mask(self, mask):
+        """
+        Применить чтение устройства битовой маской (бит i - физический
+        адрес starts_with + i). Изменения ищутся одним XOR с прошлой маской;
+        если задан debouncer, маска сначала проходит фильтр дребезга.
+        """
+        now = time.time()
+        if self.debouncer is not None:
+            mask = self.debouncer.filter(mask, now)
+        if self.phys_mask is None:
+            diff = 0
+            for addr in self.point_table.addr_index:
+                if addr >= self.starts_with:
+                    diff |= 1 << (addr - self.starts_with)
+        else:
+            diff = (mask ^ self.phys_mask) | self._mask_dirty
+        self.phys_mask = mask
+        self._mask_dirty = 0
+        if not diff:
+            return []
+        changed = self.point_table.apply_bits(
+            mask, diff, self.starts_with, now, self.mask_value)
+        if changed:
+            self._notify(changed, now)
+        return changed
+
+    def _notify(self, changed, now):
+        if not self.listeners:
+            return
+        table = self.point_table
+        for idx, old in changed:
+            for listener in self.listeners:
+                listener(table.channels[idx], old, table.values[idx], now)
 
     def get_state(self):
         return self.state
 
     def get_point(self, num):
-        return self.state.get(num, {"error": f"channel {num} not found"})
+        idx = self.point_table.index.get(num)
+        if idx is None:
+            return {"error": f"channel {num} not found"}
+        return PointView(self.point_table, idx)
 
 
 class BasePhysInterface(ABC):
@@ -57,34 +323,130 @@ class RelayPhysInterface(BasePhysInterface):
         """
         pass
 
-class DIInterface(SoftStateMixin, BasePhysInterface):
+    def change_phys_relays_state(self, states: dict):
+        """
+        Изменить состояния нескольких реле {физический адрес: состояние}.
+        По умолчанию - по одному; драйверы с групповой записью
+        переопределяют этот метод.
+        """
+        for addr, state in states.items():
+            self.change_phys_relay_state(addr, state)
+
+def check_phys_dict(values):
+    """
+    Драйверы сообщают об отсутствии ответа словарем {"error": ...};
+    для DeviceGuard это неудачная попытка.
+    """
+    if "error" in values:
+        raise DeviceError(values["error"])
+    return values
+
+
+class GuardedInterface(SoftStateMixin):
+    """
+    Все обращения к устройству идут через device_guard (retry.DeviceGuard):
+    повторы в пределах бюджета времени и предохранитель. Длительность
+    каждой попытки пишется в metrics (metrics.DeviceMetrics).
+
+    Драйвер с bitmask = True отдаёт чтения битовой маской:
+    get_phys_mask() (и phys_mask_from_reads(reads) при общем планировщике)
+    вместо get_phys_dict().
+    """
+    bitmask = False
+
     def __init__(self):
         super().__init__()
-        self.update_from_device()
+        self.device_guard = DeviceGuard(name=type(self).__name__)
+        self.metrics = DeviceMetrics()
+        self.metrics.guard = self.device_guard
+
+    def read_phys_dict(self):
+        return self.metrics.call("read", self._checked_phys_dict)
+
+    def _checked_phys_dict(self):
+        return check_phys_dict(self.get_phys_dict())
+
+    def read_device(self):
+        if self.bitmask:
+            return self.metrics.call("read", self.get_phys_mask)
+        return self.read_phys_dict()
+
+    def apply_device_read(self, value):
+        if self.bitmask:
+            return self.apply_phys_mask(value)
+        return self.apply_phys_dict(value)
+
+    def from_planned_reads(self, reads):
+        if self.bitmask:
+            return self.phys_mask_from_reads(reads)
+        return check_phys_dict(self.phys_dict_from_reads(reads))
 
     def update_from_device(self):
-        values = self.get_phys_dict()
-        for logical_ch in self.state:
-            phys_addr = self.spec_addr.get(logical_ch, logical_ch)
-            value = values.get(phys_addr)
-            if value is not None:
-                self.update_state(phys_addr, value, mark_time=False)
+        self.apply_device_read(self.device_guard.call(self.read_device))
 
+    def set_debounce(self, delay, channels=None):
+        """
+        Фильтр дребезга: новое состояние точки принимается, если держится
+        delay секунд; channels {логический канал: секунды} - отдельно
+        для каналов. delay=0 без channels - выключить.
+        """
+        if not self.bitmask:
+            raise TypeError(f"{type(self).__name__} does not read bitmasks, "
+                            "debounce is not supported")
+        per_bit = {self.spec_addr.get(ch, ch) - self.starts_with: seconds
+                   for ch, seconds in (channels or {}).items()}
+        if not delay and not per_bit:
+            self.debouncer = None
+        else:
+            self.debouncer = MaskDebouncer(delay, per_bit, self.phys_mask)
+
+    def get_health(self):
+        return self.device_guard.get_health()
 
-class RelayInterface(SoftStateMixin, RelayPhysInterface):
+
+class DIInterface(GuardedInterface, BasePhysInterface):
     def __init__(self):
         super().__init__()
-        self.update_from_device()
+        try:
+            self.update_from_device()
+        except DeviceError:
+            # Устройство недоступно: точки остаются None, ошибка видна
+            # в get_health(), опрос оператора повторит чтение
+            pass
 
-    def update_from_device(self):
-        values = self.get_phys_dict()
-        for addr, value in values.items():
-            self.update_state(addr, value, mark_time=False)
+
+class RelayInterface(GuardedInterface, RelayPhysInterface):
+    def __init__(self):
+        super().__init__()
+        try:
+            self.update_from_device()
+        except DeviceError:
+            pass
 
     def change_relay_state(self, logical_ch: int, state: bool):
-        self.update_state(logical_ch, state)
+        # Точка меняется только после успешной записи: при ошибке или
+        # разомкнутом предохранителе снимок остаётся как на устройстве
         phys_addr = self.spec_addr.get(logical_ch, logical_ch)
-        return self.change_phys_relay_state(phys_addr, state)
+        result = self.device_guard.call(
+            self.metrics.call, "write", self.change_phys_relay_state,
+            phys_addr, state)
+        self.set_point(logical_ch, state)
+        return result
+
+    def change_relays_state(self, states: dict):
+        """
+        Изменить состояния нескольких реле {логический канал: состояние}
+        одной групповой операцией драйвера.
+        """
+        result = self.device_guard.call(
+            self.metrics.call, "write", self.change_phys_relays_state,
+            self.to_phys_states(states))
+        self.set_points(states)
+        return result
+
+    def to_phys_states(self, states: dict):
+        return {self.spec_addr.get(logical_ch, logical_ch): state
+                for logical_ch, state in states.items()}
 
 
 class ControllerInterface:
@@ -94,15 +456,143 @@ class ControllerInterface:
     def __init__(self, di_interface=None, relay_interface=None):
         self.di_interface = di_interface
         self.relay_interface = relay_interface
+        # DI и реле - одно устройство: общий предохранитель, чтобы
+        # недоступный контроллер не опрашивался дважды за цикл,
+        # и общие метрики
+        if di_interface and relay_interface:
+            relay_interface.device_guard = di_interface.device_guard
+            relay_interface.metrics = di_interface.metrics
+        interface = di_interface or relay_interface
+        self.metrics = interface.metrics if interface else DeviceMetrics()
 
     def update_all(self):
-        if self.di_interface:
-            self.di_interface.update_from_device()
-        if self.relay_interface:
-            self.relay_interface.update_from_device()
+        return self.metrics.call("update_all", self._update_all)
+
+    def _update_all(self):
+        # Интерфейсы с общим планировщиком чтения (modbus_planner,
+        # moxa.MoxaIOPlanner) читаются вместе минимальным числом запросов
+        planned = {}
+        for interface in (self.di_interface, self.relay_interface):
+            if not interface:
+                continue
+            planner = getattr(interface, "planner", None)
+            if planner is None:
+                interface.update_from_device()
+            else:
+                planned.setdefault(id(planner), (planner, []))[1].append(interface)
+        for planner, interfaces in planned.values():
+            spans = [span for interface in interfaces
+                     for span in interface.read_spans()]
+            values = interfaces[0].device_guard.call(
+                self.metrics.call, "read", self._planned_read,
+                planner, interfaces, spans)
+            for interface, value in zip(interfaces, values):
+                interface.apply_device_read(value)
+
+    @staticmethod
+    def _planned_read(planner, interfaces, spans):
+        reads = planner.execute(spans)
+        return [interface.from_planned_reads(reads) for interface in interfaces]
+
+    def set_device_name(self, name):
+        """Имя устройства в ошибках DeviceError и get_health()."""
+        for interface in (self.di_interface, self.relay_interface):
+            if interface:
+                interface.device_guard.name = name
+
+    def get_health(self):
+        """
+        Состояние связи с устройством: предохранитель, последняя ошибка,
+        число вызовов и повторов.
+        """
+        interface = self.di_interface or self.relay_interface
+        if interface is None:
+            return {}
+        return interface.get_health()
 
     def get_all_states(self):
         return {
             "di": self.di_interface.get_state() if self.di_interface else {},
             "relays": self.relay_interface.get_state() if self.relay_interface else {}
         }
+
+
+class AsyncBasePhysInterface(ABC):
+    """
+    Асинхронный аналог BasePhysInterface для драйверов на asyncio.
+    """
+    @abstractmethod
+    async def get_phys_dict(self) -> dict:
+        """
+        Вернуть словарь {канал: значение} с физического устройства.
+        """
+        pass
+
+
+class AsyncRelayPhysInterface(AsyncBasePhysInterface):
+    @abstractmethod
+    async def change_phys_relay_state(self, addr: int, state: bool):
+        """
+        Изменить состояние реле на физическом устройстве.
+        """
+        pass
+
+    async def change_phys_relays_state(self, states: dict):
+        """
+        Изменить состояния нескольких реле {физический адрес: состояние}.
+        По умолчанию записи по каналам запускаются конкурентно.
+        """
+        await asyncio.gather(*(self.change_phys_relay_state(addr, state)
+                               for addr, state in states.items()))
+
+
+class AsyncGuardedInterface(GuardedInterface):
+    async def read_phys_dict(self):
+        return await self.metrics.call_async("read", self._checked_phys_dict)
+
+    async def _checked_phys_dict(self):
+        return check_phys_dict(await self.get_phys_dict())
+
+    async def update_from_device(self):
+        self.apply_phys_dict(
+            await self.device_guard.call_async(self.read_phys_dict))
+
+
+class AsyncDIInterface(AsyncGuardedInterface, AsyncBasePhysInterface):
+    """
+    Первое чтение не выполняется в конструкторе (в нём нельзя ждать),
+    его делает AsyncControllerOperator.start().
+    """
+
+
+class AsyncRelayInterface(AsyncGuardedInterface, AsyncRelayPhysInterface):
+    async def change_relay_state(self, logical_ch: int, state: bool):
+        phys_addr = self.spec_addr.get(logical_ch, logical_ch)
+        result = await self.device_guard.call_async(
+            self.metrics.call_async, "write", self.change_phys_relay_state,
+            phys_addr, state)
+        self.set_point(logical_ch, state)
+        return result
+
+    async def change_relays_state(self, states: dict):
+        result = await self.device_guard.call_async(
+            self.metrics.call_async, "write", self.change_phys_relays_state,
+            self.to_phys_states(states))
+        self.set_points(states)
+        return result
+
+    to_phys_states = RelayInterface.to_phys_states
+
+
+class AsyncControllerInterface(ControllerInterface):
+    """
+    Комбинирует доступ к асинхронным DI и Relay интерфейсам.
+    """
+    async def update_all(self):
+        return await self.metrics.call_async("update_all", self._update_all)
+
+    async def _update_all(self):
+        if self.di_interface:
+            await self.di_interface.update_from_device()
+        if self.relay_interface:
+            await self.relay_interface.update_from_device()
@@ -2,8 +2,11 @@
 import argparse
 import sys
 import time
+from collections.abc import Mapping
 
 from gravity_controller_operator.controller_factory import ControllerCreator
+from gravity_controller_operator.controllers.rs485_frames import BAUDRATES, \
+    PARITIES, STOPBITS, parse_slave_ids
 from gravity_controller_operator.main import ControllerOperator
 
 
@@ -12,26 +15,70 @@ RELAY_CHANNELS = list(range(1, 7))
 
 def parse_args():
     parser = argparse.ArgumentParser(
-        description="Диагностика контроллера: дискретные входы и реле."
+        description="Диагностика контроллера: дискретные входы и реле; "
+                    "scan - поиск модулей на шине RS-485, monitor - живой "
+                    "опрос одного или многих контроллеров."
     )
-    parser.add_argument("--device", required=True, help="Путь к /dev/tty")
-    parser.add_argument("--slave-id", required=True, type=int, help="Modbus slave id")
+    parser.add_argument("--device", nargs="+",
+                        help="Путь к /dev/tty (для scan и monitor можно несколько)")
+    parser.add_argument("--slave-id", type=int, help="Modbus slave id")
     parser.add_argument(
         "--mode",
-        choices=("full", "di", "relays"),
+        choices=("full", "di", "relays", "scan", "monitor"),
         default="full",
-        help="Режим: полный, только DI или только реле",
+        help="Режим: полный, только DI, только реле, поиск модулей или мониторинг",
     )
     parser.add_argument("--model", default="wb_mr6lv", help="Модель контроллера")
     parser.add_argument("--baudrate", type=int, default=9600)
     parser.add_argument("--stopbits", type=int, default=2)
     parser.add_argument("--bytesize", type=int, default=8)
     parser.add_argument("--timeout", type=int, default=60, help="Таймаут ожидания, сек")
-    return parser.parse_args()
+    scan = parser.add_argument_group("scan")
+    scan.add_argument("--scan-slaves", type=parse_slave_ids, default="1-247",
+                      help="Slave id для перебора, например 1-16,32")
+    scan.add_argument("--scan-baudrates", type=int, nargs="+",
+                      default=list(BAUDRATES))
+    scan.add_argument("--scan-parities", nargs="+", choices=PARITIES,
+                      default=list(PARITIES))
+    scan.add_argument("--scan-stopbits", type=int, nargs="+", choices=(1, 2),
+                      default=list(STOPBITS))
+    scan.add_argument("--probe-timeout", type=float, default=0.05,
+                      help="Ожидание ответа на пробный запрос, сек")
+    monitor = parser.add_argument_group("monitor")
+    monitor.add_argument("--ip", nargs="+",
+                         help="Адреса сетевых контроллеров вместо --device")
+    monitor.add_argument("--port", type=int, help="Порт сетевых контроллеров")
+    monitor.add_argument("--monitor-slaves", type=parse_slave_ids,
+                         help="Slave id на каждом --device, например 1-8")
+    monitor.add_argument("--interval", type=float, default=1.0,
+                         help="Период обновления таблицы, сек")
+    monitor.add_argument("--duration", type=float,
+                         help="Остановиться через столько секунд")
+    monitor.add_argument("--max-workers", type=int, default=16)
+    monitor.add_argument("--csv", help="Писать статистику в CSV")
+    monitor.add_argument("--jsonl", help="Писать статистику в JSON lines")
+    args = parser.parse_args()
+    if args.mode == "monitor":
+        if not args.device and not args.ip:
+            parser.error("monitor mode requires --device or --ip")
+        if args.device and args.monitor_slaves is None:
+            if args.slave_id is None:
+                parser.error("--slave-id or --monitor-slaves is required")
+            args.monitor_slaves = [args.slave_id]
+        return args
+    if not args.device:
+        parser.error("--device is required for this mode")
+    if args.mode != "scan":
+        if args.slave_id is None:
+            parser.error("--slave-id is required for this mode")
+        if len(args.device) > 1:
+            parser.error("only scan and monitor modes accept several devices")
+        args.device = args.device[0]
+    return args
 
 
 def get_state_value(point):
-    if not isinstance(point, dict):
+    if not isinstance(point, Mapping):
         return None
     return point.get("state")
 
@@ -39,7 +86,7 @@ def get_state_value(point):
 def snapshot_logical_states(di_interface):
     states = {}
     for ch, info in di_interface.get_state().items():
-        states[ch] = info.get("state") if isinstance(info, dict) else None
+        states[ch] = info.get("state") if isinstance(info, Mapping) else None
     return states
 
 
@@ -114,7 +161,7 @@ def get_di_mapping(operator):
         return []
     mapping_by_phys = {}
     for logical_ch, info in di_interface.get_state().items():
-        phys_addr = info.get("addr", logical_ch) if isinstance(info, dict) else logical_ch
+        phys_addr = info.get("addr", logical_ch) if isinstance(info, Mapping) else logical_ch
         if phys_addr not in mapping_by_phys:
             mapping_by_phys[phys_addr] = logical_ch
     return sorted(mapping_by_phys.items(), key=lambda item: item[0])
@@ -212,8 +259,93 @@ def run_relay_test(operator):
     return True
 
 
+def format_scan_result(result):
+    model = result.model or "-"
+    return (f"{result.device:<16}{result.slave:>6}{result.baudrate:>8}  "
+            f"8{result.parity}{result.stopbits}  {model:<12}"
+            f"{result.rtt * 1e3:>8.1f}")
+
+
+def run_scan(args):
+    # pyserial нужен только для поиска: остальные режимы работают без него
+    from gravity_controller_operator.controllers.rs485_scan import scan_buses
+
+    combinations = len(args.scan_baudrates) * len(args.scan_parities) \
+        * len(args.scan_stopbits)
+    print(f"Поиск модулей: slave id - {len(args.scan_slaves)}, "
+          f"сочетаний параметров порта - {combinations}.")
+    header = f"{'device':<16}{'slave':>6}{'baud':>8}  port  {'model':<12}{'rtt, ms':>8}"
+    print(header)
+    started = time.monotonic()
+    results, noise = scan_buses(
+        args.device, args.probe_timeout,
+        on_found=lambda result: print(format_scan_result(result), flush=True),
+        slave_ids=args.scan_slaves, baudrates=args.scan_baudrates,
+        parities=args.scan_parities, stopbits=args.scan_stopbits,
+        bytesize=args.bytesize)
+    print(f"\nНайдено модулей: {len(results)} за "
+          f"{time.monotonic() - started:.1f} с.")
+    for device, counts in noise.items():
+        for (baudrate, parity, stopbits), count in sorted(counts.items()):
+            print(f"{device}: искажённых ответов {count} при {baudrate} "
+                  f"8{parity}{stopbits} - возможно, модули с другой скоростью "
+                  f"или чётностью.")
+    return bool(results)
+
+
+def monitor_targets(args):
+    """[(имя, аргументы ControllerCreator.get_controller)] для monitor."""
+    if args.ip:
+        port = {"port": args.port} if args.port else {}
+        return [(ip, dict(ip=ip, **port)) for ip in args.ip]
+    return [(f"{device}:{slave}",
+             dict(device=device, slave_id=slave, baudrate=args.baudrate,
+                  stopbits=args.stopbits, bytesize=args.bytesize))
+            for device in args.device for slave in args.monitor_slaves]
+
+
+def run_monitor(args):
+    from gravity_controller_operator.fleet import FleetOperator
+    from gravity_controller_operator.monitor import Monitor, MonitorWriter
+
+    targets = monitor_targets(args)
+    fleet = FleetOperator(max_workers=min(len(targets), args.max_workers),
+                          update_cooldown=0)
+    for name, kwargs in targets:
+        fleet.register(name, args.model, **kwargs)
+    monitor = Monitor(fleet)
+    files = [open(path, "w", encoding="utf-8", newline="") if path else None
+             for path in (args.csv, args.jsonl)]
+    writer = MonitorWriter(*files)
+    # На терминале таблица перерисовывается на месте
+    clear = "\033[H\033[J" if sys.stdout.isatty() else ""
+    started = time.monotonic()
+    fleet.start()
+    try:
+        while args.duration is None \
+                or time.monotonic() - started < args.duration:
+            time.sleep(args.interval)
+            stats = monitor.get_stats()
+            print(clear + monitor.render(stats), flush=True)
+            if not clear:
+                print()
+            writer.write(stats)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fleet.stop()
+        for f in files:
+            if f is not None:
+                f.close()
+    return True
+
+
 def main():
     args = parse_args()
+    if args.mode == "scan":
+        sys.exit(0 if run_scan(args) else 1)
+    if args.mode == "monitor":
+        sys.exit(0 if run_monitor(args) else 1)
     controller = ControllerCreator.get_controller(
         args.model,
         device=args.device,
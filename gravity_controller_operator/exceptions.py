@@ -3,6 +3,32 @@ class UnknownController(Exception):
     def __init__(self, contr_name=None, contr_list=[]):
         text = f'Контроллер {contr_name} не обнаружен! Создайте класс с контроллером ' \
                'в директории controllers, укажите его модель через атрибут ' \
-               'model, затем добавьте этот класс в список ' \
-               f'AVAILABLE_CONTROLLERS {tuple(contr_list)}'
+               'model, затем зарегистрируйте его в controller_factory ' \
+               f'(register_controller или entry point). Доступны: {tuple(contr_list)}'
         super().__init__(text)
+
+
+class DeviceError(Exception):
+    # Ошибка обмена с устройством: нет ответа или ответ с ошибкой
+    pass
+
+
+class DeviceUnavailable(DeviceError):
+    # Исключение, возникающее, пока предохранитель (circuit breaker)
+    # не пропускает запросы к неисправному устройству
+    def __init__(self, device=None, retry_in=0.0):
+        name = f' {device}' if device else ''
+        text = f'Устройство{name} временно исключено из опроса ' \
+               f'после серии ошибок, следующая проверка через {retry_in:.1f} с'
+        self.device = device
+        self.retry_in = retry_in
+        super().__init__(text)
+
+    def __reduce__(self):
+        # Для передачи между процессами (sharded.py)
+        return type(self), (self.device, self.retry_in)
+
+
+class CodecError(ValueError):
+    # Повреждённые или несовместимые данные двоичного снимка (codec.py)
+    pass
@@ -0,0 +1,309 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gravity_controller_operator.command_queue import RelayCommandQueue
+from gravity_controller_operator.controller_factory import ControllerCreator
+from gravity_controller_operator.exceptions import DeviceUnavailable
+from gravity_controller_operator.metrics import REGISTRY, TimedLock
+from gravity_controller_operator.polling import FixedPollRate, AdaptivePollRate
+from gravity_controller_operator.snapshot import ControllerSnapshot
+
+
+logger = logging.getLogger(__name__)
+
+
+class FleetDevice:
+    """
+    Контроллер, зарегистрированный в FleetOperator, и его расписание опроса.
+    """
+    def __init__(self, name, controller, poll_rate, max_concurrency):
+        self.name = name
+        self.controller = controller
+        self.interface = controller.interface
+        self.poll_rate = poll_rate
+        # Ограничивает одновременные обращения к устройству (опрос + запись)
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.next_due = 0.0
+        # Запись в куче действительна, только если её token совпадает
+        self.token = 0
+        self.polling = False
+        self.removed = False
+        self.polls = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_poll_duration = None
+        self.snapshot = ControllerSnapshot.from_interface(self.interface)
+        self.metrics = self.interface.metrics
+        # Ожидание semaphore попадает в гистограмму lock_wait
+        self.access = TimedLock(self.semaphore, self.metrics)
+        # Очередь команд реле (RelayCommandQueue), задаёт FleetOperator
+        self.commands = None
+        # on_snapshot(snapshot) - после каждой публикации снимка
+        self.on_snapshot = None
+        # on_poll(duration, error) - после каждого опроса, error - исключение или None
+        self.on_poll = None
+        self.metrics.gauges["snapshot_age_seconds"] = lambda: self.snapshot.age()
+        self.interface.set_device_name(name)
+
+    def publish_snapshot(self):
+        # Вызывается, пока удерживается semaphore устройства
+        self.snapshot = ControllerSnapshot.from_interface(
+            self.interface, self.snapshot.seq + 1)
+        if self.on_snapshot is not None:
+            self.on_snapshot(self.snapshot)
+        return self.snapshot
+
+    @property
+    def update_cooldown(self):
+        return self.poll_rate.effective_interval
+
+    def get_model(self):
+        return self.controller.model
+
+    def close(self):
+        """Не принимать команды и освободить ресурсы драйвера (пулы, сессии)."""
+        self.commands.close(wait=False)
+        close = getattr(self.controller, "close", None)
+        if close:
+            close()
+
+
+class FleetOperator:
+    """
+    Опрашивает много контроллеров одним планировщиком через общий
+    ограниченный пул потоков, вместо потока на каждый ControllerOperator.
+    Очередной опрос устройства ставится в кучу по времени готовности.
+
+        fleet = FleetOperator(max_workers=16)
+        fleet.register("gate_1", "moxa_e1214", ip="192.168.60.103")
+        fleet.register("gate_2", "arm_k210", ip="192.168.60.104")
+        fleet.start()
+        print(fleet.get_points())
+        fleet.change_relay_state("gate_1", 0, 1)
+        fleet.submit_relay_state("gate_1", 0, 0)   # Future, без ожидания записи
+
+    adaptive_polling=True - у каждого устройства своя адаптивная пауза
+    (см. AdaptivePollRate) в пределах min/max_update_cooldown.
+    """
+    def __init__(self, max_workers=8, update_cooldown=0.3,
+                 max_concurrency_per_device=1, adaptive_polling=False,
+                 min_update_cooldown=0.05, max_update_cooldown=2.0):
+        self.update_cooldown = update_cooldown
+        self.max_concurrency_per_device = max_concurrency_per_device
+        self.adaptive_polling = adaptive_polling
+        self.min_update_cooldown = min_update_cooldown
+        self.max_update_cooldown = max_update_cooldown
+        self.devices = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="fleet")
+        self._running = False
+        self._thread = None
+
+    def register(self, name, model, emulator=False, update_cooldown=None,
+                 **kwargs):
+        """
+        Создать контроллер через ControllerCreator и добавить его в опрос.
+        """
+        controller = ControllerCreator.get_controller(model, emulator, **kwargs)
+        return self.add_controller(name, controller, update_cooldown)
+
+    def add_controller(self, name, controller, update_cooldown=None):
+        if self.adaptive_polling:
+            poll_rate = AdaptivePollRate(self.min_update_cooldown,
+                                         self.max_update_cooldown)
+        else:
+            poll_rate = FixedPollRate(
+                self.update_cooldown if update_cooldown is None else update_cooldown)
+        device = FleetDevice(name, controller, poll_rate,
+                             self.max_concurrency_per_device)
+        # Команды из очереди пишутся тем же пулом, что и опрос
+        device.commands = RelayCommandQueue(
+            lambda states: self._write_relays(device, states), self._executor)
+        with self._cond:
+            if name in self.devices:
+                raise ValueError(f"Controller {name} already registered")
+            self.devices[name] = device
+            self._schedule(device, time.monotonic())
+        REGISTRY.register(name, device.metrics)
+        return device
+
+    def remove_controller(self, name):
+        with self._cond:
+            device = self.devices.pop(name)
+            # Запись в куче удаляется лениво, при извлечении
+            device.removed = True
+        REGISTRY.unregister(device.metrics.name)
+        # Дождаться идущего опроса или записи
+        with device.access:
+            device.close()
+        return device
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._scheduler_loop, name="fleet-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, wait=True):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=wait)
+        for device in list(self.devices.values()):
+            device.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _schedule(self, device, due):
+        device.next_due = due
+        device.token += 1
+        heapq.heappush(self._heap, (due, next(self._seq), device.token, device))
+        self._cond.notify()
+
+    def _scheduler_loop(self):
+        with self._cond:
+            while self._running:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, _, token, device = self._heap[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                if device.removed or device.polling or token != device.token:
+                    continue
+                device.polling = True
+                self._executor.submit(self._poll, device)
+
+    def _poll(self, device):
+        started = time.monotonic()
+        changed = False
+        retry_in = 0.0
+        error = None
+        try:
+            with device.access:
+                device.interface.update_all()
+                previous = device.snapshot
+                changed = device.publish_snapshot().differs_from(previous)
+            device.polls += 1
+        except Exception as e:
+            error = e
+            device.errors += 1
+            device.last_error = e
+            if isinstance(e, DeviceUnavailable):
+                retry_in = e.retry_in
+        finally:
+            now = time.monotonic()
+            device.last_poll_duration = now - started
+            if device.on_poll is not None:
+                # Ошибка хука не должна снимать устройство с расписания
+                try:
+                    device.on_poll(device.last_poll_duration, error)
+                except Exception:
+                    logger.exception("on_poll hook of %s failed", device.name)
+            # Пока предохранитель разомкнут, раньше пробы опрашивать незачем
+            interval = max(device.poll_rate.observe_poll(
+                changed, device.last_poll_duration), retry_in)
+            with self._cond:
+                device.polling = False
+                if device.removed:
+                    return
+                if device.poll_rate.mode == "fixed":
+                    # Фиксированный шаг от прошлого срока, чтобы не копить
+                    # дрейф; если опрос не успел - следующий сразу
+                    self._schedule(device, max(device.next_due + interval, now))
+                else:
+                    self._schedule(device, now + interval)
+
+    def get_device(self, name):
+        return self.devices[name]
+
+    def get_points(self):
+        return {name: device.snapshot
+                for name, device in list(self.devices.items())}
+
+    def get_controller_points(self, name):
+        return self.devices[name].snapshot
+
+    def get_point(self, name, typ, ch):
+        return self.devices[name].snapshot.get_point(typ, ch)
+
+    def change_relay_state(self, name, ch: int, value: int):
+        device = self.devices[name]
+        with device.access:
+            try:
+                return device.interface.relay_interface.change_relay_state(
+                    ch, value)
+            finally:
+                device.publish_snapshot()
+                self._after_command(device)
+
+    def change_relays_state(self, name, states: dict):
+        return self._write_relays(self.devices[name], states)
+
+    def _write_relays(self, device, states):
+        with device.access:
+            try:
+                return device.interface.relay_interface.change_relays_state(states)
+            finally:
+                device.publish_snapshot()
+                self._after_command(device)
+
+    def submit_relay_state(self, name, ch: int, value: int):
+        """
+        Команда реле через очередь устройства (см. RelayCommandQueue):
+        сразу возвращает Future, повторные команды каналу схлопываются.
+        """
+        return self.devices[name].commands.submit(ch, value)
+
+    def submit_relays_state(self, name, states: dict):
+        return self.devices[name].commands.submit_many(states)
+
+    def _after_command(self, device):
+        device.poll_rate.notify_activity()
+        with self._cond:
+            if device.removed or device.polling:
+                return
+            due = time.monotonic() + device.poll_rate.effective_interval
+            if due < device.next_due:
+                self._schedule(device, due)
+
+    def get_metrics(self):
+        """{имя устройства: метрики} (см. metrics.DeviceMetrics.to_dict)."""
+        return {name: device.metrics.to_dict()
+                for name, device in list(self.devices.items())}
+
+    def get_stats(self):
+        return {
+            name: {
+                "model": device.get_model(),
+                "polls": device.polls,
+                "errors": device.errors,
+                "last_error": repr(device.last_error) if device.last_error else None,
+                "last_poll_duration": device.last_poll_duration,
+                "polling": device.poll_rate.get_stats(),
+                "health": device.interface.get_health(),
+                "commands": device.commands.get_stats(),
+            }
+            for name, device in list(self.devices.items())
+        }
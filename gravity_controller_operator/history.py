@@ -0,0 +1,135 @@
+import math
+import threading
+import time
+from array import array
+from collections import Counter
+
+
+TYPES = ("di", "relays")
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class PointHistory:
+    """
+    Кольцевой буфер изменений точек контроллера фиксированного размера.
+    Каждое изменение - метка времени, ключ (канал << 1 | тип) и значения
+    до/после в параллельных массивах array; при заполнении затираются
+    самые старые записи.
+
+        history = PointHistory(capacity=10000).bind(operator.interface)
+        history.get_transitions("di", 3, since=time.time() - 600)
+        history.get_counts("di", since=t)
+
+    Поиск по времени - бинарный (метки идут по возрастанию), по каналу -
+    просмотр сегмента, подсчёт - Counter по срезу ключей.
+    """
+    def __init__(self, capacity=4096):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.keys = array("l", bytes(array("l").itemsize * capacity))
+        self.old_values = array("d", bytes(8 * capacity))
+        self.new_values = array("d", bytes(8 * capacity))
+        self.size = 0
+        self.total = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def bind(self, interface):
+        """Подписаться на изменения DI и реле ControllerInterface."""
+        for typ_code, part in enumerate((interface.di_interface,
+                                         interface.relay_interface)):
+            if part is not None:
+                part.listeners.append(self._listener(typ_code))
+        return self
+
+    def _listener(self, typ_code):
+        def record(channel, old, new, timestamp):
+            self.record(typ_code, channel, old, new, timestamp)
+        return record
+
+    def record(self, typ_code, channel, old, new, timestamp=None):
+        with self._lock:
+            i = self._next
+            self.timestamps[i] = time.time() if timestamp is None else timestamp
+            self.keys[i] = channel << 1 | typ_code
+            self.old_values[i] = _as_float(old)
+            self.new_values[i] = _as_float(new)
+            self._next = (i + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+            self.total += 1
+
+    @property
+    def dropped(self):
+        """Сколько записей затёрто из-за переполнения."""
+        return self.total - self.size
+
+    def __len__(self):
+        return self.size
+
+    def _physical(self, pos):
+        return (self._next - self.size + pos) % self.capacity
+
+    def _bisect(self, timestamp):
+        # Первая логическая позиция с меткой >= timestamp
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamps[self._physical(mid)] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _segments(self, since, until):
+        """Физические диапазоны [start, end) записей в интервале времени."""
+        lo = self._bisect(since) if since is not None else 0
+        hi = self._bisect(until) if until is not None else self.size
+        if lo >= hi:
+            return []
+        start, end = self._physical(lo), self._physical(hi - 1) + 1
+        if start < end:
+            return [(start, end)]
+        return [(start, self.capacity), (0, end)]
+
+    def get_transitions(self, typ, channel, since=None, until=None):
+        """
+        Изменения точки [(timestamp, old, new)] в интервале [since, until)
+        по возрастанию времени. Нечисловые значения - nan.
+        """
+        key = channel << 1 | TYPES.index(typ)
+        result = []
+        with self._lock:
+            for start, end in self._segments(since, until):
+                for i in range(start, end):
+                    if self.keys[i] == key:
+                        result.append((self.timestamps[i], self.old_values[i],
+                                       self.new_values[i]))
+        return result
+
+    def get_counts(self, typ=None, since=None, until=None):
+        """
+        Число изменений по каналам: {канал: n} для typ или
+        {"di": {...}, "relays": {...}} для всех типов.
+        """
+        counter = Counter()
+        with self._lock:
+            for start, end in self._segments(since, until):
+                counter.update(self.keys[start:end])
+        counts = {name: {} for name in TYPES}
+        for key, n in counter.items():
+            counts[TYPES[key & 1]][key >> 1] = n
+        return counts if typ is None else counts[typ]
+
+    def clear(self):
+        with self._lock:
+            self.size = 0
+            self._next = 0
+            self.total = 0
@@ -1,50 +1,460 @@
+import asyncio
+import logging
 import threading
 import time
+from concurrent.futures import Future
 from threading import Lock
 
+from gravity_controller_operator.command_queue import RelayCommandQueue
+from gravity_controller_operator.exceptions import DeviceError
+from gravity_controller_operator.history import PointHistory
+from gravity_controller_operator.metrics import REGISTRY, TimedLock, \
+    AsyncTimedLock
+from gravity_controller_operator.polling import FixedPollRate, AdaptivePollRate
+from gravity_controller_operator.snapshot import ControllerSnapshot
+from gravity_controller_operator.subscriptions import SubscriptionHub
 
-class ControllerOperator:
-    def __init__(self, controller, auto_update_points=True, update_cooldown=0.3):
+
+logger = logging.getLogger(__name__)
+
+# Пауза фонового опроса после неожиданных ошибок (не DeviceError) подряд:
+# удваивается от max(update_cooldown, минимум) до максимума
+ERROR_BACKOFF_MIN = 0.5
+ERROR_BACKOFF_MAX = 30.0
+
+
+class BaseControllerOperator:
+    """
+    Общая часть синхронного и асинхронного операторов: снимки точек,
+    метрики, режим опроса, подписки, health и история изменений.
+    Обращения к устройству и фоновый опрос реализуют потомки.
+    """
+    def __init__(self, controller, auto_update_points=True, update_cooldown=0.3,
+                 adaptive_polling=False, min_update_cooldown=0.05,
+                 max_update_cooldown=2.0, name=None, history_size=0):
         self.controller = controller
         self.interface = controller.interface
-        self.mutex = Lock()
-        self.update_cooldown = update_cooldown
+        if adaptive_polling:
+            self.poll_rate = AdaptivePollRate(min_update_cooldown, max_update_cooldown)
+        else:
+            self.poll_rate = FixedPollRate(update_cooldown)
         self.auto_update_points_enabled = auto_update_points
+        self.subscriptions = SubscriptionHub(self.interface)
+        self.history = PointHistory(history_size).bind(self.interface) \
+            if history_size else None
+        self._snapshot_seq = 0
+        self._snapshot = ControllerSnapshot.from_interface(self.interface)
+        self._register_metrics(name)
+
+    def _register_metrics(self, name):
+        self.metrics = self.interface.metrics
+        self.name = REGISTRY.register(name or self.get_model(), self.metrics)
+        self.interface.set_device_name(self.name)
+        self.metrics.gauges["snapshot_age_seconds"] = lambda: self._snapshot.age()
+
+    def get_metrics(self):
+        """
+        Гистограммы длительностей опроса, чтений, записей и ожидания
+        доступа к устройству, ошибки, health и возраст снимка.
+        """
+        return self.metrics.to_dict()
+
+    def _publish_snapshot(self):
+        # Вызывается под self.mutex; замена ссылки атомарна
+        self._snapshot_seq += 1
+        self._snapshot = ControllerSnapshot.from_interface(
+            self.interface, self._snapshot_seq)
+        return self._snapshot
+
+    @property
+    def update_cooldown(self):
+        """Текущая пауза между опросами (в адаптивном режиме меняется)."""
+        return self.poll_rate.effective_interval
+
+    @update_cooldown.setter
+    def update_cooldown(self, value):
+        self.poll_rate.interval = value
+
+    def get_poll_stats(self):
+        return self.poll_rate.get_stats()
+
+    def _error_backoff(self, failures):
+        delay = max(self.update_cooldown, ERROR_BACKOFF_MIN) * 2 ** (failures - 1)
+        return min(delay, ERROR_BACKOFF_MAX)
+
+    def get_snapshot(self):
+        return self._snapshot
+
+    def subscribe(self, callback, channels=None, types=None):
+        """
+        Подписка на изменения точек: callback(PointEvent) вызывается при
+        каждом фактическом изменении. types - ("di", "relays").
+        """
+        return self.subscriptions.subscribe(callback, channels, types)
+
+    def subscribe_queue(self, channels=None, types=None, maxsize=0):
+        """
+        Подписка с потокобезопасной очередью: sub.get(timeout=...).
+        """
+        return self.subscriptions.subscribe_queue(channels, types, maxsize)
+
+    def iter_events(self, channels=None, types=None):
+        """
+        Асинхронный итератор событий: async for event in operator.iter_events().
+        """
+        return self.subscriptions.events(channels, types)
+
+    def get_health(self):
+        """
+        Состояние связи с устройством: предохранитель (closed/open/half_open),
+        последняя ошибка, число обращений и повторов.
+        """
+        return self.interface.get_health()
+
+    def get_transitions(self, typ, ch, since=None, until=None):
+        """
+        Изменения точки из истории [(timestamp, old, new)], например
+        все переключения DI 3 за 10 минут:
+        operator.get_transitions("di", 3, since=time.time() - 600)
+        """
+        return self._get_history().get_transitions(typ, ch, since, until)
+
+    def get_transition_counts(self, typ=None, since=None, until=None):
+        """Число изменений по каналам из истории (см. PointHistory.get_counts)."""
+        return self._get_history().get_counts(typ, since, until)
+
+    def _get_history(self):
+        if self.history is None:
+            raise RuntimeError("History is disabled, pass history_size > 0")
+        return self.history
+
+    def get_model(self):
+        return self.controller.model
+
+
+class ControllerOperator(BaseControllerOperator):
+    """
+    Фоновый опрос контроллера и потокобезопасный доступ к нему.
+    После каждого опроса публикуется неизменяемый ControllerSnapshot,
+    get_points/get_point читают его без блокировок и задержек.
+    mutex сериализует только обращения к самому устройству (опрос и
+    запись реле): клиенты pyModbusTCP/pymodbus не потокобезопасны.
+
+    adaptive_polling=True включает адаптивную паузу между опросами
+    (см. AdaptivePollRate) в пределах min/max_update_cooldown.
+
+    Метрики устройства регистрируются в metrics.REGISTRY под именем name
+    (по умолчанию - модель контроллера), см. get_metrics().
+
+    history_size > 0 включает историю изменений точек (PointHistory)
+    на history_size записей, см. get_transitions()/get_transition_counts().
+
+    submit_relay_state()/submit_relays_state() ставят команды реле
+    в очередь (RelayCommandQueue) и не ждут записи в устройство.
+
+    get_points(max_age=...)/get_point(..., max_age=...) читают устройство,
+    только если данные старше max_age секунд; одновременные вызовы ждут
+    одного общего чтения.
+    """
+    def __init__(self, controller, auto_update_points=True, update_cooldown=0.3,
+                 adaptive_polling=False, min_update_cooldown=0.05,
+                 max_update_cooldown=2.0, name=None, history_size=0):
+        super().__init__(controller, auto_update_points, update_cooldown,
+                         adaptive_polling, min_update_cooldown,
+                         max_update_cooldown, name, history_size)
+        self.mutex = Lock()
+        self._wakeup = threading.Event()
+        self._timed_mutex = TimedLock(self.mutex, self.metrics)
+        self.commands = RelayCommandQueue(self.change_relays_state)
+        # monotonic начала последнего успешного чтения устройства
+        self._read_started = None
+        # Future текущего чтения по запросу get_points(max_age)
+        self._flight = None
+        self._flight_lock = Lock()
+        self._thread = None
 
         if auto_update_points:
-            threading.Thread(target=self._auto_update_loop, daemon=True).start()
+            self._thread = threading.Thread(target=self._auto_update_loop,
+                                            daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """
+        Остановить фоновый опрос и очередь команд, освободить ресурсы
+        драйвера (controller.close(): пулы потоков, HTTP-сессии).
+        """
+        self.auto_update_points_enabled = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.commands.close()
+        close = getattr(self.controller, "close", None)
+        if close:
+            close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
     def _auto_update_loop(self):
+        failures = 0
         while self.auto_update_points_enabled:
-            self.update_points()
-            #time.sleep(self.update_cooldown)
+            try:
+                self.update_points()
+                failures = 0
+            except DeviceError as e:
+                logger.warning("Poll of %s failed: %s", self.get_model(), e)
+                # Пока предохранитель разомкнут, раньше пробы опрашивать незачем
+                self._wakeup.wait(max(self.update_cooldown,
+                                      getattr(e, "retry_in", 0.0)))
+                self._wakeup.clear()
+            except Exception:
+                # Ошибка снимка, подписок или истории не должна молча
+                # останавливать опрос
+                failures += 1
+                logger.exception("Poll of %s failed", self.get_model())
+                self._wakeup.wait(self._error_backoff(failures))
+                self._wakeup.clear()
+
+    def _read_points(self):
+        # Вызывается под self.mutex
+        started = time.monotonic()
+        self.interface.update_all()
+        rtt = time.monotonic() - started
+        self._read_started = started
+        previous = self._snapshot
+        changed = self._publish_snapshot().differs_from(previous)
+        return changed, rtt
 
     def update_points(self):
-        with self.mutex:
-            self.interface.update_all()
-        time.sleep(self.update_cooldown)
+        with self._timed_mutex:
+            changed, rtt = self._read_points()
+        # Команда реле прерывает паузу (см. change_relay_state)
+        self._wakeup.wait(self.poll_rate.observe_poll(changed, rtt))
+        self._wakeup.clear()
 
-    def get_points(self):
-        time.sleep(0.1)
-        with self.mutex:
-            return self.interface.get_all_states()
+    def _read_since(self, not_before):
+        return self._read_started is not None \
+            and self._read_started >= not_before
+
+    def _refresh(self, not_before):
+        """
+        Прочитать устройство, если последнее чтение началось раньше
+        not_before. Чтение одно на всех: кто пришёл во время чужого
+        чтения, ждёт его результата (или его исключения).
+        """
+        while not self._read_since(not_before):
+            with self._flight_lock:
+                flight = self._flight
+                leader = flight is None
+                if leader:
+                    flight = self._flight = Future()
+            if not leader:
+                flight.result()
+                # Чужое чтение могло начаться раньше not_before
+                continue
+            error = None
+            try:
+                with self._timed_mutex:
+                    # Пока ждали mutex, мог пройти опрос update_points
+                    if not self._read_since(not_before):
+                        self._read_points()
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                with self._flight_lock:
+                    self._flight = None
+                if error is None:
+                    flight.set_result(None)
+                else:
+                    flight.set_exception(error)
+
+    def get_points(self, max_age=None):
+        """
+        Последний снимок. С max_age (секунды) снимок гарантированно не
+        старше: если устройство читалось раньше, чем max_age назад,
+        выполняется одно общее чтение (см. _refresh).
+        """
+        if max_age is not None:
+            self._refresh(time.monotonic() - max_age)
+        return self._snapshot
 
     def change_relay_state(self, ch: int, value: int):
-        time.sleep(0.1)
-        with self.mutex:
-            return self.interface.relay_interface.change_relay_state(ch, value)
+        with self._timed_mutex:
+            try:
+                return self.interface.relay_interface.change_relay_state(ch, value)
+            finally:
+                self._publish_snapshot()
+                self.poll_rate.notify_activity()
+                self._wakeup.set()
+
+    def change_relays_state(self, states: dict):
+        """
+        Изменить несколько реле {канал: состояние} одной групповой записью.
+        """
+        with self._timed_mutex:
+            try:
+                return self.interface.relay_interface.change_relays_state(states)
+            finally:
+                self._publish_snapshot()
+                self.poll_rate.notify_activity()
+                self._wakeup.set()
+
+    def submit_relay_state(self, ch: int, value: int):
+        """
+        Поставить команду реле в очередь и вернуть Future, не дожидаясь
+        записи. Неотправленные команды тому же каналу схлопываются,
+        накопленные уходят одной групповой записью.
+        """
+        return self.commands.submit(ch, value)
+
+    def submit_relays_state(self, states: dict):
+        return self.commands.submit_many(states)
+
+    def get_point(self, typ, ch, max_age=None):
+        return self.get_points(max_age).get_point(typ, ch)
+
+    def get_di_state(self, ch, max_age=None):
+        return self.get_point("di", ch, max_age)
+
+    def get_relay_state(self, ch, max_age=None):
+        return self.get_point("relays", ch, max_age)
+
+
+class AsyncControllerOperator(BaseControllerOperator):
+    """
+    Оператор для асинхронных контроллеров (Async* драйверы).
+    Опрос выполняется задачей в текущем event loop, без отдельных потоков.
+
+        operator = AsyncControllerOperator(AsyncMoxaE1214("192.168.60.103"))
+        await operator.start()
+        print(operator.get_points())
+        await operator.change_relay_state(0, 1)
+        await operator.stop()
+    """
+    def __init__(self, controller, auto_update_points=True, update_cooldown=0.3,
+                 adaptive_polling=False, min_update_cooldown=0.05,
+                 max_update_cooldown=2.0, name=None, history_size=0):
+        super().__init__(controller, auto_update_points, update_cooldown,
+                         adaptive_polling, min_update_cooldown,
+                         max_update_cooldown, name, history_size)
+        self.mutex = None
+        self._timed_mutex = None
+        self._wakeup = None
+        self._task = None
+
+    async def start(self):
+        # Lock создаётся здесь, чтобы он принадлежал работающему loop
+        self.mutex = asyncio.Lock()
+        self._timed_mutex = AsyncTimedLock(self.mutex, self.metrics)
+        self._wakeup = asyncio.Event()
+        connect = getattr(self.controller, "connect", None)
+        if connect:
+            await connect()
+        async with self.mutex:
+            try:
+                await self.interface.update_all()
+            except DeviceError as e:
+                # Как и синхронные интерфейсы: точки остаются None,
+                # опрос повторит чтение
+                logger.warning("Initial read of %s failed: %s", self.get_model(), e)
+            self._publish_snapshot()
+        if self.auto_update_points_enabled:
+            self._task = asyncio.ensure_future(self._auto_update_loop())
+        return self
+
+    async def stop(self):
+        self.auto_update_points_enabled = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        close = getattr(self.controller, "close", None)
+        if close:
+            await close()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def _auto_update_loop(self):
+        failures = 0
+        while self.auto_update_points_enabled:
+            try:
+                await self.update_points()
+                failures = 0
+                continue
+            except DeviceError as e:
+                logger.warning("Poll of %s failed: %s", self.get_model(), e)
+                delay = max(self.update_cooldown, getattr(e, "retry_in", 0.0))
+            except asyncio.CancelledError:
+                # До Python 3.8 CancelledError - подкласс Exception
+                raise
+            except Exception:
+                failures += 1
+                logger.exception("Poll of %s failed", self.get_model())
+                delay = self._error_backoff(failures)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def update_points(self):
+        async with self._timed_mutex:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            await self.interface.update_all()
+            rtt = loop.time() - started
+            previous = self._snapshot
+            changed = self._publish_snapshot().differs_from(previous)
+        interval = self.poll_rate.observe_poll(changed, rtt)
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    def get_points(self):
+        return self._snapshot
+
+    async def change_relay_state(self, ch: int, value: int):
+        async with self._timed_mutex:
+            try:
+                return await self.interface.relay_interface.change_relay_state(
+                    ch, value)
+            finally:
+                self._publish_snapshot()
+                self.poll_rate.notify_activity()
+                self._wakeup.set()
+
+    async def change_relays_state(self, states: dict):
+        """
+        Изменить несколько реле {канал: состояние} одной групповой записью.
+        """
+        async with self._timed_mutex:
+            try:
+                return await self.interface.relay_interface.change_relays_state(
+                    states)
+            finally:
+                self._publish_snapshot()
+                self.poll_rate.notify_activity()
+                self._wakeup.set()
 
     def get_point(self, typ, ch):
-        if typ == "di":
-            return self.interface.di_interface.get_point(ch)
-        elif typ == "relays":
-            return self.interface.relay_interface.get_point(ch)
+        return self._snapshot.get_point(typ, ch)
 
     def get_di_state(self, ch):
         return self.get_point("di", ch)
 
     def get_relay_state(self, ch):
         return self.get_point("relays", ch)
-
-    def get_model(self):
-        return self.controller.model
@@ -0,0 +1,323 @@
+import json
+import math
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+PREFIX = "gravity_controller_"
+# Границы корзин, секунды: от обмена по TCP до таймаутов RS-485
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HISTOGRAM_HELP = {
+    "update_all": "Full poll cycle of the device (ControllerInterface.update_all)",
+    "read": "Single device read attempt (get_phys_dict or planned read)",
+    "write": "Single relay write attempt (change_phys_relay(s)_state)",
+    "lock_wait": "Wait for exclusive access to the device",
+}
+BREAKER_STATES = ("closed", "open", "half_open")
+PERCENTILES = (50, 90, 99)
+
+
+def percentiles(samples, ps=PERCENTILES):
+    """
+    {"p50": ..., "p90": ..., "p99": ...} выборки по nearest rank:
+    наименьшее значение, не меньше которого p% выборки.
+    """
+    if not samples:
+        return dict.fromkeys(f"p{p}" for p in ps)
+    ordered = sorted(samples)
+    n = len(ordered)
+    return {f"p{p}": ordered[max(0, math.ceil(p * n / 100) - 1)] for p in ps}
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами. observe() - bisect и два
+    сложения без блокировок: гонка потоков может потерять единичное
+    наблюдение, что для мониторинга допустимо.
+    """
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """[(граница le, наблюдений <= le)], последняя граница - inf."""
+        total = 0
+        result = []
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def to_dict(self):
+        return {"count": self.count, "sum": self.sum,
+                "mean": self.sum / self.count if self.count else None,
+                "buckets": {str(bound): count for bound, count in self.cumulative()}}
+
+
+class DeviceMetrics:
+    """
+    Метрики одного устройства: гистограммы длительностей по операциям
+    (HISTOGRAM_HELP), счётчики ошибок, показатели DeviceGuard и gauges -
+    функции, вычисляемые при выгрузке (например, возраст снимка).
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.name = None
+        self.histograms = {op: Histogram(buckets) for op in HISTOGRAM_HELP}
+        self.errors = dict.fromkeys(HISTOGRAM_HELP, 0)
+        self.gauges = {}
+        self.guard = None
+
+    def observe(self, op, seconds):
+        self.histograms[op].observe(seconds)
+
+    def call(self, op, func, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            self.errors[op] += 1
+            raise
+        finally:
+            self.histograms[op].observe(time.perf_counter() - started)
+
+    async def call_async(self, op, func, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            self.errors[op] += 1
+            raise
+        finally:
+            self.histograms[op].observe(time.perf_counter() - started)
+
+    def get_gauges(self):
+        gauges = {}
+        for name, func in list(self.gauges.items()):
+            try:
+                gauges[name] = func()
+            except Exception:
+                gauges[name] = None
+        return gauges
+
+    def to_dict(self):
+        result = {
+            "histograms": {op: h.to_dict() for op, h in self.histograms.items()},
+            "errors": dict(self.errors),
+            "gauges": self.get_gauges(),
+        }
+        if self.guard is not None:
+            result["health"] = self.guard.get_health()
+        return result
+
+
+class TimedLock:
+    """
+    Обёртка над Lock/Semaphore: время ожидания захвата идёт
+    в гистограмму lock_wait.
+    """
+    __slots__ = ("lock", "metrics")
+
+    def __init__(self, lock, metrics):
+        self.lock = lock
+        self.metrics = metrics
+
+    def __enter__(self):
+        started = time.perf_counter()
+        self.lock.acquire()
+        self.metrics.observe("lock_wait", time.perf_counter() - started)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.lock.release()
+
+
+class AsyncTimedLock(TimedLock):
+    __slots__ = ()
+
+    async def __aenter__(self):
+        started = time.perf_counter()
+        await self.lock.acquire()
+        self.metrics.observe("lock_wait", time.perf_counter() - started)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.lock.release()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value is None:
+        return "NaN"
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик устройств по именам. Хранит слабые ссылки: метрики
+    исчезают из выгрузки вместе с интерфейсом устройства.
+    """
+    def __init__(self):
+        self._devices = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def register(self, name, metrics):
+        """
+        Зарегистрировать метрики под именем name; при занятом имени
+        добавляется суффикс _2, _3... Возвращает итоговое имя.
+        """
+        with self._lock:
+            unique = name
+            for i in range(2, 1 << 30):
+                current = self._devices.get(unique)
+                if current is None or current is metrics:
+                    break
+                unique = f"{name}_{i}"
+            self._devices[unique] = metrics
+            metrics.name = unique
+            return unique
+
+    def unregister(self, name):
+        with self._lock:
+            self._devices.pop(name, None)
+
+    def get(self, name):
+        return self._devices.get(name)
+
+    def items(self):
+        with self._lock:
+            return sorted(self._devices.items())
+
+    def to_dict(self):
+        return {name: metrics.to_dict() for name, metrics in self.items()}
+
+    def to_prometheus(self):
+        """Текстовый формат Prometheus (exposition format 0.0.4)."""
+        devices = self.items()
+        lines = []
+        for op, help_text in HISTOGRAM_HELP.items():
+            metric = f"{PREFIX}{op}_seconds"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, metrics in devices:
+                histogram = metrics.histograms[op]
+                label = f'device="{_escape(name)}"'
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{metric}_bucket{{{label},le="'
+                                 f'{_format_value(bound)}"}} {count}')
+                lines.append(f"{metric}_sum{{{label}}} {histogram.sum!r}")
+                lines.append(f"{metric}_count{{{label}}} {histogram.count}")
+        metric = f"{PREFIX}errors_total"
+        lines.append(f"# HELP {metric} Failed device operations")
+        lines.append(f"# TYPE {metric} counter")
+        for name, metrics in devices:
+            for op, count in metrics.errors.items():
+                lines.append(f'{metric}{{device="{_escape(name)}",op="{op}"}} {count}')
+        lines.extend(self._guard_lines(devices))
+        lines.extend(self._gauge_lines(devices))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _guard_lines(devices):
+        guarded = [(name, metrics.guard.get_health()) for name, metrics in devices
+                   if metrics.guard is not None]
+        if not guarded:
+            return []
+        retries = f"{PREFIX}retries_total"
+        state = f"{PREFIX}circuit_state"
+        lines = [f"# HELP {retries} Retried device calls",
+                 f"# TYPE {retries} counter"]
+        lines += [f'{retries}{{device="{_escape(name)}"}} {health["retries"]}'
+                  for name, health in guarded]
+        lines += [f"# HELP {state} Circuit breaker state of the device",
+                  f"# TYPE {state} gauge"]
+        for name, health in guarded:
+            for value in BREAKER_STATES:
+                lines.append(f'{state}{{device="{_escape(name)}",state="{value}"}} '
+                             f'{int(health["state"] == value)}')
+        return lines
+
+    @staticmethod
+    def _gauge_lines(devices):
+        gauges = {}
+        for name, metrics in devices:
+            for gauge, value in metrics.get_gauges().items():
+                gauges.setdefault(gauge, []).append((name, value))
+        lines = []
+        for gauge, values in sorted(gauges.items()):
+            metric = f"{PREFIX}{gauge}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines += [f'{metric}{{device="{_escape(name)}"}} {_format_value(value)}'
+                      for name, value in values]
+        return lines
+
+
+REGISTRY = MetricsRegistry()
+
+
+class MetricsServer:
+    """
+    Локальный HTTP endpoint: /metrics - текст Prometheus,
+    /metrics.json - то же словарём.
+
+        server = MetricsServer(port=9108).start()
+    """
+    def __init__(self, registry=REGISTRY, host="127.0.0.1", port=9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == "/metrics":
+                    body = registry.to_prometheus().encode()
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif path == "/metrics.json":
+                    body = json.dumps(registry.to_dict()).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="metrics",
+                         daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
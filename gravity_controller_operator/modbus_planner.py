@@ -0,0 +1,189 @@
+from collections import namedtuple
+
+from gravity_controller_operator.bitmask import bits_to_mask
+from gravity_controller_operator.exceptions import DeviceError
+
+
+READ_COILS = 1
+READ_DISCRETE_INPUTS = 2
+READ_HOLDING_REGISTERS = 3
+READ_INPUT_REGISTERS = 4
+
+BIT_FUNCTIONS = (READ_COILS, READ_DISCRETE_INPUTS)
+
+# Максимум элементов в одном запросе (PDU Modbus - 253 байта)
+MAX_READ_COUNT = {
+    READ_COILS: 2000,
+    READ_DISCRETE_INPUTS: 2000,
+    READ_HOLDING_REGISTERS: 125,
+    READ_INPUT_REGISTERS: 125,
+}
+
+# Диапазон чтения: код функции, slave id, начальный адрес, количество
+ReadSpan = namedtuple("ReadSpan", "function slave address count")
+
+
+def plan_reads(spans, max_gap=0):
+    """
+    Объединить диапазоны чтения в минимальный набор транзакций.
+    Сливаются перекрывающиеся и соседние диапазоны (или с разрывом
+    не больше max_gap) одной функции и одного slave, в пределах
+    максимального размера запроса.
+    """
+    groups = {}
+    for span in spans:
+        groups.setdefault((span.function, span.slave), []).append(span)
+    transactions = []
+    for (function, slave), group in groups.items():
+        limit = MAX_READ_COUNT[function]
+        group.sort(key=lambda span: span.address)
+        start = end = None
+        for span in group:
+            span_end = span.address + span.count
+            if start is not None and span.address <= end + max_gap \
+                    and max(end, span_end) - start <= limit:
+                end = max(end, span_end)
+                continue
+            if start is not None:
+                transactions.append(ReadSpan(function, slave, start, end - start))
+            start, end = span.address, span_end
+        if start is not None:
+            transactions.append(ReadSpan(function, slave, start, end - start))
+    return transactions
+
+
+def contiguous_runs(states):
+    """
+    Разбить {адрес: значение} на непрерывные участки [(старт, [значения])]
+    для групповой записи (write_coils / write_multiple_coils).
+    """
+    runs = []
+    for addr in sorted(states):
+        if runs and runs[-1][0] + len(runs[-1][1]) == addr:
+            runs[-1][1].append(states[addr])
+        else:
+            runs.append((addr, [states[addr]]))
+    return runs
+
+
+class ModbusReadPlanner:
+    """
+    Выполняет чтения нескольких интерфейсов минимальным числом транзакций
+    и раскладывает результаты обратно по исходным диапазонам.
+    reader(transaction: ReadSpan) -> list значений; нет ответа - DeviceError.
+    """
+    def __init__(self, reader, max_gap=0):
+        self.reader = reader
+        self.max_gap = max_gap
+        self.last_transactions = 0
+
+    def execute(self, spans):
+        """
+        Вернуть {span: list значений или None}.
+        """
+        transactions = plan_reads(spans, self.max_gap)
+        self.last_transactions = len(transactions)
+        results = [(tx, self.reader(tx)) for tx in transactions]
+        reads = {}
+        for span in spans:
+            reads[span] = None
+            for tx, values in results:
+                if tx.function != span.function or tx.slave != span.slave:
+                    continue
+                offset = span.address - tx.address
+                if 0 <= offset and offset + span.count <= tx.count:
+                    if values is not None:
+                        reads[span] = values[offset:offset + span.count]
+                    break
+        return reads
+
+
+class PymodbusReader:
+    """
+    Чтение через синхронный клиент pymodbus. Одна попытка на транзакцию:
+    повторы с паузами делает DeviceGuard интерфейса.
+    """
+    def __init__(self, client):
+        self.client = client
+        self.methods = {
+            READ_COILS: client.read_coils,
+            READ_DISCRETE_INPUTS: client.read_discrete_inputs,
+            READ_HOLDING_REGISTERS: client.read_holding_registers,
+            READ_INPUT_REGISTERS: client.read_input_registers,
+        }
+
+    def __call__(self, tx):
+        response = self.methods[tx.function](tx.address, tx.count, slave=tx.slave)
+        if not response or response.isError():
+            raise DeviceError(f"No response from controller: {response}")
+        if tx.function in BIT_FUNCTIONS:
+            # pymodbus дополняет биты до целого байта
+            return response.bits[:tx.count]
+        return response.registers
+
+
+class PyModbusTCPReader:
+    """
+    Чтение через pyModbusTCP.ModbusClient (slave задаётся unit_id клиента).
+    """
+    def __init__(self, client):
+        self.client = client
+        self.methods = {
+            READ_COILS: client.read_coils,
+            READ_DISCRETE_INPUTS: client.read_discrete_inputs,
+            READ_HOLDING_REGISTERS: client.read_holding_registers,
+            READ_INPUT_REGISTERS: client.read_input_registers,
+        }
+
+    def __call__(self, tx):
+        response = self.methods[tx.function](tx.address, tx.count)
+        if not response:
+            raise DeviceError("No response from controller")
+        return response
+
+
+class ModbusReadMixin:
+    """
+    Интерфейс, читающий устройство через ModbusReadPlanner.
+    Потомок объявляет read_function и slave_id; диапазон по умолчанию -
+    starts_with..starts_with + map_keys_amount. ControllerInterface.update_all
+    объединяет диапазоны всех интерфейсов с общим планировщиком.
+    Битовые функции (coils, discrete inputs) читаются битовой маской.
+    """
+    planner = None
+    read_function = None
+    slave_id = None
+    mask_value = bool   # как response.bits pymodbus
+
+    @property
+    def bitmask(self):
+        return self.read_function in BIT_FUNCTIONS
+
+    def read_spans(self):
+        return [ReadSpan(self.read_function, self.slave_id,
+                         self.starts_with, self.map_keys_amount)]
+
+    def phys_dict_from_reads(self, reads):
+        result = {}
+        for span in self.read_spans():
+            values = reads.get(span)
+            if values is None:
+                return {"error": "No response from controller"}
+            for i, value in enumerate(values):
+                result[span.address + i] = value
+        return result
+
+    def phys_mask_from_reads(self, reads):
+        mask = 0
+        for span in self.read_spans():
+            values = reads.get(span)
+            if values is None:
+                raise DeviceError("No response from controller")
+            mask |= bits_to_mask(values) << (span.address - self.starts_with)
+        return mask
+
+    def get_phys_dict(self):
+        return self.phys_dict_from_reads(self.planner.execute(self.read_spans()))
+
+    def get_phys_mask(self):
+        return self.phys_mask_from_reads(self.planner.execute(self.read_spans()))
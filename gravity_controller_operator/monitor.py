@@ -0,0 +1,175 @@
+import csv
+import json
+import threading
+import time
+from collections import deque
+
+from gravity_controller_operator.history import PointHistory
+from gravity_controller_operator.metrics import percentiles
+
+TYPES = ("di", "relays")
+
+
+def _state_char(value):
+    if value is None:
+        return "?"
+    try:
+        return "1" if int(value) else "0"
+    except (TypeError, ValueError):
+        return "?"
+
+
+class DeviceMonitor:
+    """
+    Статистика одного устройства FleetOperator: длительности последних
+    window опросов, опросов в секунду за rate_window секунд, ошибки и
+    число переключений по каналам - по истории изменений точек
+    (PointHistory, последние history_size изменений).
+    Уже заданный device.on_poll сохраняется и вызывается первым.
+    """
+    def __init__(self, device, window=1000, rate_window=5.0,
+                 history_size=4096, clock=time.monotonic):
+        self.device = device
+        self.rate_window = rate_window
+        self.clock = clock
+        self.started = clock()
+        self.polls = 0
+        self.errors = 0
+        self.last_error = None
+        # (время окончания, длительность) успешных опросов
+        self.samples = deque(maxlen=window)
+        self.history = PointHistory(history_size).bind(device.interface)
+        self._lock = threading.Lock()
+        previous = device.on_poll
+        if previous is None:
+            device.on_poll = self.on_poll
+        else:
+            def on_poll(duration, error):
+                previous(duration, error)
+                self.on_poll(duration, error)
+            device.on_poll = on_poll
+
+    def on_poll(self, duration, error):
+        with self._lock:
+            if error is not None:
+                self.errors += 1
+                self.last_error = error
+                return
+            self.polls += 1
+            self.samples.append((self.clock(), duration))
+
+    def get_stats(self):
+        now = self.clock()
+        with self._lock:
+            samples = list(self.samples)
+            polls, errors, last_error = self.polls, self.errors, self.last_error
+        since = now - self.rate_window
+        recent = sum(1 for finished, _ in samples if finished >= since)
+        span = min(self.rate_window, now - self.started) or None
+        snapshot = self.device.snapshot
+        return {
+            "polls": polls,
+            "errors": errors,
+            "last_error": repr(last_error) if last_error else None,
+            "polls_per_sec": recent / span if span else 0.0,
+            "latency": percentiles([duration for _, duration in samples]),
+            "states": {typ: {ch: point["state"] for ch, point in
+                             snapshot[typ].items()}
+                       for typ in TYPES},
+            "transitions": self.history.get_counts(),
+        }
+
+
+class Monitor:
+    """
+    Живой мониторинг устройств FleetOperator: опрос без пауз
+    (update_cooldown=0), таблица состояний и статистики, запись
+    CSV / JSON lines.
+
+        fleet = FleetOperator(max_workers=8, update_cooldown=0)
+        fleet.register("wb_1", "wb_mr6lv", device="/dev/ttyRS485", slave_id=1)
+        monitor = Monitor(fleet)
+        fleet.start()
+        print(monitor.render())
+    """
+    def __init__(self, fleet, window=1000, rate_window=5.0, history_size=4096):
+        self.fleet = fleet
+        self.devices = {name: DeviceMonitor(device, window, rate_window,
+                                            history_size)
+                        for name, device in fleet.devices.items()}
+
+    def get_stats(self):
+        return {name: monitor.get_stats()
+                for name, monitor in self.devices.items()}
+
+    def render(self, stats=None):
+        stats = self.get_stats() if stats is None else stats
+        header = "{:<20}{:>8}{:>9}{:>7}{:>9}{:>9}{:>9}  {}"
+        lines = [header.format("device", "polls/s", "polls", "errors",
+                               "p50, ms", "p90, ms", "p99, ms", "state")]
+        for name, item in stats.items():
+            latency = [f"{value * 1e3:.1f}" if value is not None else "-"
+                       for value in item["latency"].values()]
+            lines.append(header.format(
+                name, f"{item['polls_per_sec']:.1f}", item["polls"],
+                item["errors"], *latency, self._format_states(item)))
+            if item["last_error"]:
+                lines.append(f"{'':<20}{item['last_error']}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_states(item):
+        # DI 0101 (переключения 2,0,7,0) | R 10
+        parts = []
+        for typ, label in zip(TYPES, ("DI", "R")):
+            states = item["states"][typ]
+            if not states:
+                continue
+            transitions = item["transitions"][typ]
+            text = f"{label} " + "".join(_state_char(v) for v in states.values())
+            if transitions:
+                text += " (" + ",".join(str(transitions.get(ch, 0))
+                                        for ch in states) + ")"
+            parts.append(text)
+        return " | ".join(parts)
+
+
+class MonitorWriter:
+    """
+    Строка на устройство за каждую запись: CSV (состояния и переключения
+    каналов - строками) или JSON lines (как в Monitor.get_stats).
+    """
+    CSV_FIELDS = ("time", "device", "polls", "errors", "polls_per_sec",
+                  "p50_ms", "p90_ms", "p99_ms", "di", "relays", "di_transitions",
+                  "relays_transitions")
+
+    def __init__(self, csv_file=None, jsonl_file=None):
+        self.csv_file = csv_file
+        self.jsonl_file = jsonl_file
+        self._csv = None
+        if csv_file is not None:
+            self._csv = csv.DictWriter(csv_file, self.CSV_FIELDS)
+            self._csv.writeheader()
+
+    def write(self, stats, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        for name, item in stats.items():
+            if self._csv is not None:
+                row = {"time": f"{timestamp:.3f}", "device": name,
+                       "polls": item["polls"], "errors": item["errors"],
+                       "polls_per_sec": f"{item['polls_per_sec']:.2f}"}
+                for key, value in item["latency"].items():
+                    row[f"{key}_ms"] = f"{value * 1e3:.3f}" \
+                        if value is not None else ""
+                for typ in TYPES:
+                    states = item["states"][typ]
+                    row[typ] = "".join(_state_char(v) for v in states.values())
+                    row[f"{typ}_transitions"] = " ".join(
+                        str(item["transitions"][typ].get(ch, 0)) for ch in states)
+                self._csv.writerow(row)
+            if self.jsonl_file is not None:
+                record = dict(item, time=timestamp, device=name)
+                self.jsonl_file.write(json.dumps(record, default=str) + "\n")
+        for f in (self.csv_file, self.jsonl_file):
+            if f is not None:
+                f.flush()
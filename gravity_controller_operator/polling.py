@@ -0,0 +1,78 @@
+class FixedPollRate:
+    """
+    Постоянная пауза между опросами (прежнее поведение update_cooldown).
+    """
+    mode = "fixed"
+
+    def __init__(self, interval=0.3):
+        self.interval = interval
+        self.rtt = None
+
+    @property
+    def effective_interval(self):
+        return self.interval
+
+    def observe_poll(self, changed, rtt):
+        self.rtt = rtt
+        return self.interval
+
+    def notify_activity(self):
+        pass
+
+    def get_stats(self):
+        return {"mode": self.mode, "interval": self.effective_interval,
+                "rtt": self.rtt}
+
+
+class AdaptivePollRate(FixedPollRate):
+    """
+    Адаптивная пауза между опросами устройства.
+
+    После изменения точек или команды реле пауза сбрасывается до
+    min_interval, в тишине растёт в backoff раз за опрос до max_interval.
+    Пауза никогда не короче rtt_factor * RTT (сглаженное время опроса),
+    чтобы медленную линию (RS-485) не занимать опросом целиком.
+    """
+    mode = "adaptive"
+
+    def __init__(self, min_interval=0.05, max_interval=2.0, backoff=1.5,
+                 rtt_factor=1.0, rtt_smoothing=0.3):
+        if min_interval > max_interval:
+            raise ValueError("min_interval must not exceed max_interval")
+        super().__init__(min_interval)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.rtt_factor = rtt_factor
+        self.rtt_smoothing = rtt_smoothing
+
+    @property
+    def effective_interval(self):
+        if self.rtt is None:
+            return self.interval
+        return max(self.interval, self.rtt * self.rtt_factor)
+
+    def observe_poll(self, changed, rtt):
+        """
+        Учесть результат опроса: были ли изменения и сколько он длился.
+        Возвращает паузу до следующего опроса.
+        """
+        if self.rtt is None:
+            self.rtt = rtt
+        else:
+            self.rtt += self.rtt_smoothing * (rtt - self.rtt)
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return self.effective_interval
+
+    def notify_activity(self):
+        """Команда реле: ждём реакцию устройства, опрашиваем чаще."""
+        self.interval = self.min_interval
+
+    def get_stats(self):
+        stats = super().get_stats()
+        stats.update(min_interval=self.min_interval,
+                     max_interval=self.max_interval)
+        return stats
@@ -0,0 +1,214 @@
+import asyncio
+import contextvars
+import random
+import threading
+import time
+
+from gravity_controller_operator.exceptions import DeviceError, DeviceUnavailable
+
+
+# monotonic-срок текущего RetryPolicy.call (свой у потока и задачи asyncio)
+_call_deadline = contextvars.ContextVar("call_deadline", default=None)
+# Нулевой таймаут сокета означает неблокирующий режим
+MIN_ATTEMPT_TIMEOUT = 0.01
+
+
+def attempt_timeout(timeout):
+    """
+    Таймаут попытки для драйвера: его собственный timeout, но не больше
+    остатка бюджета RetryPolicy текущего вызова.
+    """
+    deadline = _call_deadline.get()
+    if deadline is None:
+        return timeout
+    return max(min(timeout, deadline - time.monotonic()), MIN_ATTEMPT_TIMEOUT)
+
+
+class RetryPolicy:
+    """
+    Повторы обращения к устройству в пределах бюджета времени deadline
+    с экспоненциальной паузой и случайным разбросом (jitter), чтобы
+    устройства одной площадки не повторяли запросы синхронно.
+
+    Бюджет ограничивает и саму попытку: синхронные драйверы берут таймаут
+    запроса из attempt_timeout(), асинхронная попытка прерывается
+    по остатку бюджета.
+    """
+    def __init__(self, deadline=1.0, base_delay=0.05, max_delay=0.5,
+                 multiplier=2.0, jitter=0.5, max_attempts=None):
+        self.deadline = deadline
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.max_attempts = max_attempts
+
+    def next_delay(self, attempt):
+        delay = min(self.base_delay * self.multiplier ** (attempt - 1), self.max_delay)
+        return delay * (1 - self.jitter * random.random())
+
+    def _give_up(self, attempt, delay, started):
+        if self.max_attempts is not None and attempt >= self.max_attempts:
+            return True
+        return time.monotonic() - started + delay > self.deadline
+
+    def call(self, func, *args, **kwargs):
+        """
+        Вызвать func до успеха; после исчерпания бюджета пробрасывается
+        последняя ошибка. Возвращает (результат, число повторов).
+        """
+        started = time.monotonic()
+        token = _call_deadline.set(started + self.deadline)
+        try:
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    return func(*args, **kwargs), attempt - 1
+                except Exception:
+                    delay = self.next_delay(attempt)
+                    if self._give_up(attempt, delay, started):
+                        raise
+                time.sleep(delay)
+        finally:
+            _call_deadline.reset(token)
+
+    async def call_async(self, func, *args, **kwargs):
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                remaining = max(started + self.deadline - time.monotonic(),
+                                MIN_ATTEMPT_TIMEOUT)
+                return await asyncio.wait_for(func(*args, **kwargs),
+                                              remaining), attempt - 1
+            except Exception:
+                delay = self.next_delay(attempt)
+                if self._give_up(attempt, delay, started):
+                    raise
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Предохранитель устройства. После failure_threshold неудачных вызовов
+    подряд размыкается: запросы не отправляются, раз в reset_timeout
+    пропускается одна пробная попытка. Каждая неудачная проба удваивает
+    паузу до max_reset_timeout, успешная - замыкает предохранитель.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=5.0,
+                 max_reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.current_timeout = reset_timeout
+        self.opened_at = None
+        self.last_error = None
+        self.last_success = None
+        self.last_failure = None
+        self._lock = threading.Lock()
+
+    def retry_in(self):
+        if self.state != self.OPEN:
+            return 0.0
+        return max(self.opened_at + self.current_timeout - time.monotonic(), 0.0)
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.retry_in() <= 0:
+                # Пропускаем одну пробу, остальные ждут её результата
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.current_timeout = self.reset_timeout
+            self.last_success = time.time()
+
+    def record_failure(self, error):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = error
+            self.last_failure = time.time()
+            if self.state == self.HALF_OPEN:
+                self.current_timeout = min(self.current_timeout * 2,
+                                           self.max_reset_timeout)
+                self._open()
+            elif self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+
+    def get_health(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": repr(self.last_error) if self.last_error else None,
+            "last_success": self.last_success,
+            "last_failure": self.last_failure,
+            "retry_in": self.retry_in(),
+        }
+
+
+class DeviceGuard:
+    """
+    Общий слой для всех get_phys_dict/change_phys_relay_state устройства:
+    повторы по RetryPolicy и CircuitBreaker. Любая ошибка драйвера
+    наружу выходит как DeviceError (исходная - в __cause__).
+    """
+    def __init__(self, retry_policy=None, breaker=None, name=None):
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.name = name
+        self.calls = 0
+        self.retries = 0
+
+    def _check(self):
+        if not self.breaker.allow():
+            raise DeviceUnavailable(self.name, self.breaker.retry_in())
+        self.calls += 1
+
+    def _failed(self, error):
+        self.breaker.record_failure(error)
+        if isinstance(error, DeviceError):
+            return error
+        return DeviceError(f"{self.name or 'device'}: {error!r}")
+
+    def call(self, func, *args, **kwargs):
+        self._check()
+        try:
+            result, retries = self.retry_policy.call(func, *args, **kwargs)
+        except Exception as e:
+            raise self._failed(e) from e
+        self.retries += retries
+        self.breaker.record_success()
+        return result
+
+    async def call_async(self, func, *args, **kwargs):
+        self._check()
+        try:
+            result, retries = await self.retry_policy.call_async(func, *args, **kwargs)
+        except Exception as e:
+            raise self._failed(e) from e
+        self.retries += retries
+        self.breaker.record_success()
+        return result
+
+    def get_health(self):
+        health = self.breaker.get_health()
+        health.update(calls=self.calls, retries=self.retries)
+        return health
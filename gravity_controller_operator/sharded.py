@@ -0,0 +1,447 @@
+import itertools
+import multiprocessing
+import threading
+import time
+from array import array
+from concurrent.futures import Future
+from multiprocessing.shared_memory import SharedMemory
+
+from gravity_controller_operator.controller_factory import get_controller_class
+from gravity_controller_operator.controllers_super import PointTable
+from gravity_controller_operator.exceptions import DeviceError
+from gravity_controller_operator.fleet import FleetOperator
+from gravity_controller_operator.snapshot import ControllerSnapshot
+
+
+TYPES = ("di", "relays")
+# Тип значения точки в общей памяти
+KIND_NONE, KIND_BOOL, KIND_INT = 0, 1, 2
+
+
+def _align(size):
+    return (size + 7) & ~7
+
+
+def _kind(value):
+    if value is True or value is False:
+        return KIND_BOOL
+    if isinstance(value, int):
+        return KIND_INT
+    # В общую память попадают только bool/int
+    return KIND_NONE
+
+
+class SharedSlot:
+    """
+    Область одного устройства в общей памяти:
+    seq:i64 taken_at:f64, затем для каждой таблицы точек
+    типы i8[n] (с выравниванием), значения i64[n], changed f64[n].
+    Запись и чтение согласуются по seq (seqlock): нечётный seq -
+    идёт запись, читатель повторяет попытку, но не дольше read_timeout
+    секунд. writer_alive() - жив ли процесс-писатель: если он умер
+    посреди записи, seq остаётся нечётным и чтение сразу даёт DeviceError.
+    Писатели внутри процесса сериализуются блокировкой слота.
+    """
+    read_timeout = 1.0
+
+    def __init__(self, buf, offset, layout, writer_alive=None):
+        self.layout = layout
+        self.writer_alive = writer_alive
+        self._write_lock = threading.Lock()
+        self._views = []
+        self.seq = self._view(buf, offset, 8, "q")
+        self.taken_at = self._view(buf, offset + 8, 8, "d")
+        pos = offset + 16
+        self.tables = {}
+        for typ in TYPES:
+            spec = layout[typ]
+            if spec is None:
+                self.tables[typ] = None
+                continue
+            n = len(spec[0])
+            kinds = self._view(buf, pos, n, "b")
+            pos += _align(n)
+            values = self._view(buf, pos, 8 * n, "q")
+            pos += 8 * n
+            changed = self._view(buf, pos, 8 * n, "d")
+            pos += 8 * n
+            self.tables[typ] = (kinds, values, changed)
+
+    def _view(self, buf, offset, size, fmt):
+        view = buf[offset:offset + size].cast(fmt)
+        self._views.append(view)
+        return view
+
+    @staticmethod
+    def size_of(layout):
+        size = 16
+        for typ in TYPES:
+            if layout[typ] is not None:
+                n = len(layout[typ][0])
+                size += _align(n) + 16 * n
+        return size
+
+    def write(self, snapshot):
+        with self._write_lock:
+            self.seq[0] += 1
+            try:
+                self.taken_at[0] = snapshot.taken_at
+                for typ, views in self.tables.items():
+                    if views is None:
+                        continue
+                    table = snapshot.get_table(typ)
+                    kinds, values, changed = views
+                    kinds[:] = array("b", map(_kind, table.values))
+                    values[:] = array("q", [value if isinstance(value, int)
+                                            else 0 for value in table.values])
+                    changed[:] = table.changed
+            finally:
+                self.seq[0] += 1
+
+    def read(self):
+        """(seq, taken_at, {тип: (значения, changed)}) согласованной копией."""
+        started = None
+        while True:
+            seq = self.seq[0]
+            if not seq & 1:
+                taken_at = self.taken_at[0]
+                tables = {}
+                for typ, views in self.tables.items():
+                    if views is None:
+                        tables[typ] = None
+                        continue
+                    kinds, values, changed = views
+                    tables[typ] = (kinds.tolist(), values.tolist(),
+                                   array("d", changed))
+                if self.seq[0] == seq:
+                    return seq, taken_at, tables
+            if started is None:
+                started = time.monotonic()
+            elif self.writer_alive is not None and not self.writer_alive():
+                raise DeviceError("Shard process exited while writing points")
+            elif time.monotonic() - started > self.read_timeout:
+                raise DeviceError("Points are being written for more than "
+                                  f"{self.read_timeout} s")
+            time.sleep(0)
+
+    def release(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+
+
+def _decode_values(kinds, values):
+    return [bool(value) if kind == KIND_BOOL else value if kind == KIND_INT
+            else None for kind, value in zip(kinds, values)]
+
+
+def _layout(device):
+    layout = {}
+    for typ, part in zip(TYPES, (device.interface.di_interface,
+                                 device.interface.relay_interface)):
+        if part is None:
+            layout[typ] = None
+        else:
+            table = part.point_table
+            layout[typ] = (table.channels, table.addrs)
+    return layout
+
+
+def _shard_main(conn, devices, options):
+    """Точка входа процесса шарда: FleetOperator своих устройств."""
+    try:
+        fleet = FleetOperator(**options)
+        for name, model, emulator, update_cooldown, kwargs in devices:
+            fleet.register(name, model, emulator, update_cooldown, **kwargs)
+        conn.send(("layout", {name: _layout(device)
+                              for name, device in fleet.devices.items()}))
+    except Exception as e:
+        conn.send(("failed", DeviceError(f"{type(e).__name__}: {e}")))
+        return
+    message = conn.recv()
+    if message[0] != "attach":
+        return
+    _, shm_name, offsets = message
+    shm = SharedMemory(shm_name)
+    slots = []
+    for name, device in fleet.devices.items():
+        slot = SharedSlot(shm.buf, offsets[name], _layout(device))
+        slot.write(device.snapshot)
+        device.on_snapshot = slot.write
+        slots.append(slot)
+    fleet.start()
+    send_lock = threading.Lock()
+
+    def reply(request_id, ok, value):
+        with send_lock:
+            try:
+                conn.send(("result", request_id, ok, value))
+            except Exception as e:
+                # Например, непиклуемое исключение драйвера
+                conn.send(("result", request_id, False, DeviceError(repr(e))))
+
+    def on_done(request_id):
+        def done(future):
+            error = future.exception()
+            reply(request_id, error is None,
+                  future.result() if error is None else error)
+        return done
+
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message[0] == "stop":
+                break
+            _, request_id, op, args = message
+            try:
+                if op == "relays":
+                    fleet.submit_relays_state(*args).add_done_callback(
+                        on_done(request_id))
+                elif op == "stats":
+                    reply(request_id, True, fleet.get_stats())
+                elif op == "metrics":
+                    reply(request_id, True, fleet.get_metrics())
+                else:
+                    reply(request_id, False, ValueError(f"Unknown op {op}"))
+            except Exception as e:
+                reply(request_id, False, e)
+    finally:
+        fleet.stop()
+        for device in fleet.devices.values():
+            device.on_snapshot = None
+        for slot in slots:
+            slot.release()
+        shm.close()
+
+
+class Shard:
+    """Процесс-шард в родительском процессе: канал, слоты и ожидающие ответы."""
+    def __init__(self, index, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.names = []
+        self.shm = None
+        self.send_lock = threading.Lock()
+        self.pending = {}
+        self.reader = None
+
+    def request(self, request_id, op, *args):
+        future = Future()
+        self.pending[request_id] = future
+        try:
+            with self.send_lock:
+                self.conn.send(("call", request_id, op, args))
+        except (OSError, ValueError) as e:
+            self.pending.pop(request_id, None)
+            raise DeviceError(f"Shard {self.index} is not running") from e
+        return future
+
+    def read_results(self):
+        while True:
+            try:
+                _, request_id, ok, value = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self.pending.pop(request_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+        error = DeviceError(f"Shard {self.index} process exited")
+        for request_id in list(self.pending):
+            future = self.pending.pop(request_id, None)
+            if future is not None:
+                future.set_exception(error)
+
+
+class ShardedFleetOperator:
+    """
+    FleetOperator, распределённый по процессам: устройства делятся между
+    processes шардами (по порядку регистрации), каждый шард опрашивает
+    свои устройства собственным FleetOperator и пишет состояния точек
+    в общую память (multiprocessing.shared_memory). Разбор ответов
+    устройств идёт на разных ядрах, а не под одним GIL.
+
+        sharded = ShardedFleetOperator(processes=4, max_workers=16)
+        sharded.register("gate_1", "moxa_e1214", ip="192.168.60.103")
+        sharded.start()
+        sharded.get_points()                      # как у FleetOperator
+        sharded.change_relay_state("gate_1", 0, 1)
+
+    Чтение точек - из общей памяти без обращения к шардам; команды реле
+    уходят процессу-владельцу устройства. Параметры FleetOperator
+    (max_workers, update_cooldown, adaptive_polling, ...) передаются
+    каждому шарду. Регистрация - до start(); аргументы контроллера
+    должны сериализоваться pickle.
+    """
+    def __init__(self, processes=None, start_method="spawn", **fleet_options):
+        self.processes = processes or multiprocessing.cpu_count()
+        self.fleet_options = fleet_options
+        self._context = multiprocessing.get_context(start_method)
+        self._devices = {}
+        self._shards = []
+        self._owner = {}
+        self._slots = {}
+        self._cache = {}
+        self._ids = itertools.count()
+        self._running = False
+
+    def register(self, name, model, emulator=False, update_cooldown=None,
+                 **kwargs):
+        if self._running:
+            raise RuntimeError("Register controllers before start()")
+        if name in self._devices:
+            raise ValueError(f"Controller {name} already registered")
+        # Неизвестная модель - ошибка сразу, а не в процессе шарда
+        get_controller_class("emulator_controller" if emulator else model)
+        self._devices[name] = (name, model, emulator, update_cooldown, kwargs)
+
+    def start(self, timeout=60):
+        if self._running:
+            return self
+        names = list(self._devices)
+        count = max(1, min(self.processes, len(names)))
+        try:
+            for index in range(count):
+                self._start_shard(index, names[index::count], timeout)
+        except BaseException:
+            self.stop()
+            raise
+        self._running = True
+        return self
+
+    def _start_shard(self, index, names, timeout):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_shard_main, name=f"fleet-shard-{index}", daemon=True,
+            args=(child_conn, [self._devices[name] for name in names],
+                  self.fleet_options))
+        process.start()
+        child_conn.close()
+        shard = Shard(index, process, parent_conn)
+        shard.names = names
+        self._shards.append(shard)
+        if not parent_conn.poll(timeout):
+            raise DeviceError(f"Shard {index} did not start in {timeout} s")
+        status, payload = parent_conn.recv()
+        if status != "layout":
+            raise payload
+        offsets = {}
+        size = 0
+        for name in names:
+            offsets[name] = size
+            size += SharedSlot.size_of(payload[name])
+        shard.shm = SharedMemory(create=True, size=max(size, 8))
+        for name in names:
+            self._slots[name] = SharedSlot(shard.shm.buf, offsets[name],
+                                           payload[name], process.is_alive)
+            self._owner[name] = shard
+        parent_conn.send(("attach", shard.shm.name, offsets))
+        shard.reader = threading.Thread(
+            target=shard.read_results, name=f"fleet-shard-{index}-results",
+            daemon=True)
+        shard.reader.start()
+
+    def stop(self, timeout=10):
+        self._running = False
+        for shard in self._shards:
+            try:
+                with shard.send_lock:
+                    shard.conn.send(("stop",))
+            except (OSError, ValueError):
+                pass
+        for shard in self._shards:
+            shard.process.join(timeout)
+            if shard.process.is_alive():
+                shard.process.terminate()
+                shard.process.join()
+            shard.conn.close()
+            if shard.reader is not None:
+                shard.reader.join(timeout)
+        for slot in self._slots.values():
+            slot.release()
+        for shard in self._shards:
+            if shard.shm is not None:
+                shard.shm.close()
+                shard.shm.unlink()
+        self._shards = []
+        self._slots = {}
+        self._owner = {}
+        self._cache = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def get_controller_points(self, name):
+        """ControllerSnapshot устройства из общей памяти."""
+        slot = self._slots[name]
+        cached = self._cache.get(name)
+        # Нечётный seq (идёт запись) - через read(), он же ловит смерть шарда
+        if cached is not None and slot.seq[0] == cached.seq << 1:
+            return cached
+        seq, taken_at, tables = slot.read()
+        frozen = []
+        for typ in TYPES:
+            if tables[typ] is None:
+                frozen.append(None)
+                continue
+            kinds, values, changed = tables[typ]
+            table = PointTable(*slot.layout[typ])
+            table.values = _decode_values(kinds, values)
+            table.changed = changed
+            frozen.append(table.freeze())
+        # Монотонное время снимка пересчитывается в часы этого процесса
+        snapshot = ControllerSnapshot(
+            *frozen, seq=seq >> 1, taken_at=taken_at,
+            monotonic=time.monotonic() - max(0.0, time.time() - taken_at))
+        self._cache[name] = snapshot
+        return snapshot
+
+    def get_points(self):
+        return {name: self.get_controller_points(name) for name in self._slots}
+
+    def get_point(self, name, typ, ch):
+        return self.get_controller_points(name).get_point(typ, ch)
+
+    def _request(self, shard, op, *args):
+        return shard.request(next(self._ids), op, *args)
+
+    def submit_relays_state(self, name, states: dict):
+        """Команда владельцу устройства; Future с результатом записи."""
+        return self._request(self._owner[name], "relays", name, states)
+
+    def submit_relay_state(self, name, ch: int, value: int):
+        return self.submit_relays_state(name, {ch: value})
+
+    def change_relays_state(self, name, states: dict, timeout=None):
+        return self.submit_relays_state(name, states).result(timeout)
+
+    def change_relay_state(self, name, ch: int, value: int, timeout=None):
+        return self.submit_relay_state(name, ch, value).result(timeout)
+
+    def _gather(self, op, timeout):
+        futures = [self._request(shard, op) for shard in self._shards]
+        result = {}
+        for future in futures:
+            result.update(future.result(timeout))
+        return result
+
+    def get_stats(self, timeout=None):
+        """Статистика всех шардов (см. FleetOperator.get_stats)."""
+        stats = self._gather("stats", timeout)
+        for shard in self._shards:
+            for name in shard.names:
+                stats[name]["shard"] = shard.index
+        return stats
+
+    def get_metrics(self, timeout=None):
+        return self._gather("metrics", timeout)
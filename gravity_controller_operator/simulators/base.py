@@ -0,0 +1,73 @@
+import socket
+import struct
+import time
+
+from gravity_controller_operator.simulators.faults import FaultInjector
+
+
+LOCALHOST = "127.0.0.1"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((LOCALHOST, 0))
+        return sock.getsockname()[1]
+
+
+def reset_connection(sock):
+    """Закрыть сокет с RST вместо FIN (SO_LINGER с нулевым таймаутом)."""
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER,
+                        struct.pack("ii", 1, 0))
+    except OSError:
+        pass
+    sock.close()
+
+
+class Simulator:
+    """
+    Локальный симулятор устройства: отвечает по протоколу настоящего
+    контроллера, неисправности линии задаёт faults (FaultInjector).
+    start()/stop() или with; controller_kwargs(i) - аргументы
+    ControllerCreator.get_controller для i-го устройства.
+
+        with MoxaSimulator(delay=0.02, error_rate=0.1) as sim:
+            controller = ControllerCreator.get_controller(
+                sim.model, **sim.controller_kwargs(0))
+    """
+    model = None
+
+    def __init__(self, **fault_options):
+        self.faults = FaultInjector(**fault_options)
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def controller_kwargs(self, index):
+        return {}
+
+    def decide(self):
+        """
+        Решение по очередному запросу; задержка ответа (reply, error)
+        выдерживается здесь же.
+        """
+        action = self.faults.decide()
+        if action in ("reply", "error"):
+            delay = self.faults.response_delay()
+            if delay > 0:
+                time.sleep(delay)
+        return action
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class EmulatorSimulator(Simulator):
+    """EmulatorController: точка отсчёта без ввода-вывода и неисправностей."""
+    model = "emulator_controller"
@@ -0,0 +1,64 @@
+import random
+import threading
+
+
+ACTIONS = ("reply", "drop", "error", "reset")
+
+
+class FaultInjector:
+    """
+    Неисправности линии связи симулятора. Для каждого запроса decide()
+    выбирает, что с ним сделать:
+      reply - ответить после delay + uniform(0, jitter) секунд;
+      drop  - не отвечать (клиент ждёт свой таймаут);
+      error - ответить ошибкой протокола (исключение Modbus, HTTP 500,
+              io_result('error') у NetPing);
+      reset - оборвать соединение (TCP RST; на RS-485 - кадр с битой CRC).
+    Вероятности drop_rate, error_rate, reset_rate можно менять на ходу
+    через configure(). seed делает последовательность воспроизводимой.
+    """
+    def __init__(self, delay=0.0, jitter=0.0, drop_rate=0.0, error_rate=0.0,
+                 reset_rate=0.0, seed=None):
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = dict.fromkeys(ACTIONS, 0)
+        self.delay = self.jitter = 0.0
+        self.drop_rate = self.error_rate = self.reset_rate = 0.0
+        self.configure(delay=delay, jitter=jitter, drop_rate=drop_rate,
+                       error_rate=error_rate, reset_rate=reset_rate)
+
+    def configure(self, **options):
+        for name, value in options.items():
+            if name not in ("delay", "jitter", "drop_rate", "error_rate",
+                            "reset_rate"):
+                raise TypeError(f"Unknown fault option {name!r}")
+            if value < 0:
+                raise ValueError(f"{name} must be non-negative")
+            setattr(self, name, value)
+        if self.drop_rate + self.error_rate + self.reset_rate > 1:
+            raise ValueError("Sum of fault rates must not exceed 1")
+        return self
+
+    def decide(self):
+        with self._lock:
+            roll = self._rng.random()
+            action = "reply"
+            for name, rate in (("drop", self.drop_rate),
+                               ("error", self.error_rate),
+                               ("reset", self.reset_rate)):
+                if roll < rate:
+                    action = name
+                    break
+                roll -= rate
+            self.counts[action] += 1
+            return action
+
+    def response_delay(self):
+        if not self.jitter:
+            return self.delay
+        with self._lock:
+            return self.delay + self._rng.uniform(0, self.jitter)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.counts)
@@ -0,0 +1,115 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from gravity_controller_operator.simulators.base import LOCALHOST, \
+    Simulator, reset_connection
+
+
+class _Server(ThreadingHTTPServer):
+    # Очередь listen() по умолчанию (5) переполняется, когда десятки
+    # клиентов подключаются разом, и SYN повторяется только через 1 с
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class HTTPSimulator(Simulator):
+    """
+    Общая часть HTTP-симуляторов: ThreadingHTTPServer с keep-alive,
+    ответы - методы handle_get/handle_put/handle_error потомка.
+    check_request(headers) может отклонить запрос до обработки
+    (авторизация, заголовок Accept). drop держит соединение drop_hold
+    секунд без ответа и закрывает его, reset - TCP RST. Методы, которые
+    потомок не переопределил, отвечают 405.
+    connections - число принятых TCP-соединений (проверка keep-alive).
+    """
+    drop_hold = 5.0
+
+    def __init__(self, drop_hold=None, **fault_options):
+        super().__init__(**fault_options)
+        if drop_hold is not None:
+            self.drop_hold = drop_hold
+        self.port = None
+        self.connections = 0
+        self._server = None
+        self._closing = threading.Event()
+        self._connections_lock = threading.Lock()
+
+    def start(self):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Заголовки и тело одним сегментом, иначе Nagle и delayed ACK
+            # добавляют к каждому ответу ~40 мс, которых у устройства нет
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with simulator._connections_lock:
+                    simulator.connections += 1
+
+            def reply(self, code, body, content_type):
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def serve(self, handle):
+                rejected = simulator.check_request(self.headers)
+                if rejected is not None:
+                    self.reply(*rejected)
+                    return
+                action = simulator.decide()
+                if action == "drop":
+                    simulator._closing.wait(simulator.drop_hold)
+                    self.close_connection = True
+                elif action == "reset":
+                    self.close_connection = True
+                    reset_connection(self.connection)
+                elif action == "error":
+                    self.reply(*simulator.handle_error(urlsplit(self.path)))
+                else:
+                    self.reply(*handle(urlsplit(self.path)))
+
+            def do_GET(self):
+                self.serve(simulator.handle_get)
+
+            def do_PUT(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                self.serve(lambda url: simulator.handle_put(url, body))
+
+        self._closing.clear()
+        self._server = _Server((LOCALHOST, 0), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever,
+                         name=f"simulator-{self.model}", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            # Отпустить обработчики, держащие drop
+            self._closing.set()
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def check_request(self, headers):
+        return None
+
+    # Метод, которого нет у устройства, - 405, как у настоящего веб-сервера
+    def handle_get(self, url):
+        return 405, b"Method Not Allowed", "text/plain"
+
+    def handle_put(self, url, body):
+        return 405, b"Method Not Allowed", "text/plain"
+
+    def handle_error(self, url):
+        return 500, b"Internal Server Error", "text/plain"
@@ -0,0 +1,200 @@
+import socket
+import socketserver
+import struct
+import threading
+
+from gravity_controller_operator.simulators.base import LOCALHOST, \
+    Simulator, reset_connection
+
+
+# Коды исключений Modbus
+ILLEGAL_FUNCTION = 1
+ILLEGAL_ADDRESS = 2
+ILLEGAL_VALUE = 3
+DEVICE_FAILURE = 4
+
+_MBAP = struct.Struct(">HHHB")
+
+
+def pack_bits(bits):
+    data = bytearray((len(bits) + 7) // 8)
+    for i, bit in enumerate(bits):
+        if bit:
+            data[i // 8] |= 1 << (i % 8)
+    return bytes(data)
+
+
+def unpack_bits(data, count):
+    return [(data[i // 8] >> (i % 8)) & 1 for i in range(count)]
+
+
+def exception_pdu(function, code):
+    return bytes([function | 0x80, code])
+
+
+class ModbusDataModel:
+    """
+    Четыре таблицы Modbus (coils, discrete inputs, holding и input
+    registers) и обработка PDU функций 1-6, 15, 16.
+    """
+    def __init__(self, size=16):
+        self.size = size
+        self.coils = [0] * size
+        self.discrete_inputs = [0] * size
+        self.holding_registers = [0] * size
+        self.input_registers = [0] * size
+        self.lock = threading.Lock()
+
+    def _check(self, function, addr, count, limit):
+        if not 1 <= count <= limit:
+            return exception_pdu(function, ILLEGAL_VALUE)
+        if addr + count > self.size:
+            return exception_pdu(function, ILLEGAL_ADDRESS)
+        return None
+
+    def write_coils(self, addr, values):
+        self.coils[addr:addr + len(values)] = values
+
+    def handle(self, pdu):
+        function = pdu[0]
+        if function in (1, 2, 3, 4, 5, 6, 15, 16) and len(pdu) < 5:
+            return exception_pdu(function, ILLEGAL_VALUE)
+        with self.lock:
+            if function in (1, 2):
+                addr, count = struct.unpack(">HH", pdu[1:5])
+                error = self._check(function, addr, count, 2000)
+                if error:
+                    return error
+                source = self.coils if function == 1 else self.discrete_inputs
+                data = pack_bits(source[addr:addr + count])
+                return bytes([function, len(data)]) + data
+            if function in (3, 4):
+                addr, count = struct.unpack(">HH", pdu[1:5])
+                error = self._check(function, addr, count, 125)
+                if error:
+                    return error
+                source = self.holding_registers if function == 3 \
+                    else self.input_registers
+                values = source[addr:addr + count]
+                return bytes([function, 2 * count]) + struct.pack(
+                    f">{count}H", *(value & 0xFFFF for value in values))
+            if function == 5:
+                addr, value = struct.unpack(">HH", pdu[1:5])
+                if value not in (0x0000, 0xFF00):
+                    return exception_pdu(function, ILLEGAL_VALUE)
+                error = self._check(function, addr, 1, 1)
+                if error:
+                    return error
+                self.write_coils(addr, [int(value == 0xFF00)])
+                return pdu[:5]
+            if function == 6:
+                addr, value = struct.unpack(">HH", pdu[1:5])
+                error = self._check(function, addr, 1, 1)
+                if error:
+                    return error
+                self.holding_registers[addr] = value
+                return pdu[:5]
+            if function == 15:
+                addr, count = struct.unpack(">HH", pdu[1:5])
+                error = self._check(function, addr, count, 1968)
+                if error:
+                    return error
+                self.write_coils(addr, unpack_bits(pdu[6:], count))
+                return pdu[:5]
+            if function == 16:
+                addr, count = struct.unpack(">HH", pdu[1:5])
+                error = self._check(function, addr, count, 123)
+                if error:
+                    return error
+                self.holding_registers[addr:addr + count] = struct.unpack(
+                    f">{count}H", pdu[6:6 + 2 * count])
+                return pdu[:5]
+        return exception_pdu(function, ILLEGAL_FUNCTION)
+
+
+class ARMK210DataModel(ModbusDataModel):
+    """
+    ARM K210: DI - input registers, состояние реле - holding registers,
+    реле переключаются записью coils (отражается в holding registers).
+    """
+    def write_coils(self, addr, values):
+        super().write_coils(addr, values)
+        self.holding_registers[addr:addr + len(values)] = values
+
+
+class ModbusTCPSimulator(Simulator):
+    """
+    Modbus TCP сервер (MBAP + PDU) на своём сокете, чтобы неисправности
+    вносились на уровне кадров: задержка, пропуск ответа, исключение
+    Modbus 04 (Server Device Failure), обрыв соединения. Все устройства
+    подключаются к одному серверу своими соединениями, таблицы - в data.
+    """
+    model = "arm_k210"
+
+    def __init__(self, size=16, timeout=2.0, **fault_options):
+        super().__init__(**fault_options)
+        self.timeout = timeout
+        self.data = ARMK210DataModel(size)
+        self.port = None
+        self._server = None
+
+    def start(self):
+        simulator = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                simulator._serve_connection(self.request)
+
+        self._server = socketserver.ThreadingTCPServer((LOCALHOST, 0), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever,
+                         name="simulator-modbus-tcp", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def controller_kwargs(self, index):
+        return {"ip": LOCALHOST, "port": self.port, "timeout": self.timeout}
+
+    @staticmethod
+    def _recv_exact(sock, size):
+        data = b""
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _serve_connection(self, sock):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                header = self._recv_exact(sock, _MBAP.size)
+                if header is None:
+                    return
+                tid, pid, length, unit = _MBAP.unpack(header)
+                pdu = self._recv_exact(sock, length - 1)
+                if pdu is None:
+                    return
+            except OSError:
+                return
+            action = self.decide()
+            if action == "drop":
+                continue
+            if action == "reset":
+                reset_connection(sock)
+                return
+            if action == "error":
+                reply = exception_pdu(pdu[0], DEVICE_FAILURE)
+            else:
+                reply = self.data.handle(pdu)
+            try:
+                sock.sendall(_MBAP.pack(tid, pid, len(reply) + 1, unit) + reply)
+            except OSError:
+                return
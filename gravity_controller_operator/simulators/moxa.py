@@ -0,0 +1,65 @@
+import json
+import threading
+
+from gravity_controller_operator.simulators.base import LOCALHOST
+from gravity_controller_operator.simulators.http_server import HTTPSimulator
+
+
+class MoxaSimulator(HTTPSimulator):
+    """
+    RESTful API Moxa ioLogik E1214 (vdn.dac.v1): /api/slot/0/io, /io/di,
+    /io/relay и запись реле (PUT по одному каналу и групповой).
+    Без заголовка Accept: vdn.dac.v1 отвечает 406, как устройство.
+    combined_io=False - прошивка без общего запроса: /io отвечает 404.
+    """
+    model = "moxa_e1214"
+    accept = "vdn.dac.v1"
+
+    def __init__(self, di_count=16, relay_count=4, timeout=2,
+                 combined_io=True, **options):
+        super().__init__(**options)
+        self.timeout = timeout
+        self.combined_io = combined_io
+        self.di = [0] * di_count
+        self.relays = [0] * relay_count
+        self._lock = threading.Lock()
+
+    def controller_kwargs(self, index):
+        return {"ip": f"{LOCALHOST}:{self.port}", "timeout": self.timeout}
+
+    def _json(self, obj, code=200):
+        return code, json.dumps(obj).encode(), "application/json"
+
+    def check_request(self, headers):
+        if headers.get("Accept") != self.accept:
+            return self._json({"error": {"code": 406}}, 406)
+        return None
+
+    def handle_get(self, url):
+        with self._lock:
+            di = [{"diIndex": i, "diStatus": v} for i, v in enumerate(self.di)]
+            relay = [{"relayIndex": i, "relayStatus": v}
+                     for i, v in enumerate(self.relays)]
+        if url.path.endswith("/io") and self.combined_io:
+            return self._json({"slot": 0, "io": {"di": di, "relay": relay}})
+        if url.path.endswith("/di"):
+            return self._json({"slot": 0, "io": {"di": di}})
+        if url.path.endswith("/relay"):
+            return self._json({"slot": 0, "io": {"relay": relay}})
+        return self._json({}, 404)
+
+    def handle_put(self, url, body):
+        relays = body["io"]["relay"]
+        if isinstance(relays, dict):
+            relays = [{"relayIndex": ch, "relayStatus": item["relayStatus"]}
+                      for ch, item in relays.items()]
+        with self._lock:
+            for item in relays:
+                channel = int(item["relayIndex"])
+                if not 0 <= channel < len(self.relays):
+                    return self._json({"error": {"code": 400}}, 400)
+                self.relays[channel] = int(item["relayStatus"])
+        return self._json({})
+
+    def handle_error(self, url):
+        return self._json({"error": {"code": 500}}, 500)
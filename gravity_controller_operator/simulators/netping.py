@@ -0,0 +1,67 @@
+import base64
+
+from gravity_controller_operator.simulators.base import LOCALHOST
+from gravity_controller_operator.simulators.http_server import HTTPSimulator
+
+
+class NetPingSimulator(HTTPSimulator):
+    """
+    CGI NetPing: io.cgi?io (маска входов, бит 0 - линия 1, 1 - разомкнута),
+    relay.cgi?rN и relay.cgi?rN=S (S - только 0 или 1, иначе
+    relay_result('error')). С username проверяет Basic auth (401).
+    Ошибка устройства - io_result('error') / relay_result('error').
+    """
+    model = "netping_relay"
+
+    def __init__(self, relay_count=4, username=None, password=None,
+                 timeout=2, **options):
+        super().__init__(**options)
+        self.timeout = timeout
+        self.username = username
+        self.password = password
+        self.di_mask = 0b1111     # все входы разомкнуты
+        self.relays = [0] * (relay_count + 1)
+
+    def controller_kwargs(self, index):
+        kwargs = {"ip": LOCALHOST, "port": self.port, "timeout": self.timeout}
+        if self.username is not None:
+            kwargs.update(username=self.username, password=self.password)
+        return kwargs
+
+    def check_request(self, headers):
+        if self.username is None:
+            return None
+        credentials = base64.b64encode(
+            f"{self.username}:{self.password}".encode()).decode()
+        if headers.get("Authorization") != f"Basic {credentials}":
+            return 401, b"Unauthorized", "text/plain"
+        return None
+
+    def _relay(self, query):
+        relay, _, state = query[1:].partition("=")
+        relay = int(relay)
+        if not 1 <= relay < len(self.relays):
+            raise ValueError(relay)
+        return relay, state
+
+    def handle_get(self, url):
+        if url.path.endswith("io.cgi"):
+            body = f"io_result('ok', {self.di_mask}, 0, 0);"
+        else:
+            try:
+                relay, state = self._relay(url.query)
+            except ValueError:
+                return self.handle_error(url)
+            if state:
+                if state not in ("0", "1"):
+                    return self.handle_error(url)
+                self.relays[relay] = int(state)
+                body = "relay_result('ok');"
+            else:
+                body = f"relay_result('ok', {self.relays[relay]}, 0);"
+        return 200, body.encode(), "text/plain"
+
+    def handle_error(self, url):
+        body = "io_result('error');" if url.path.endswith("io.cgi") \
+            else "relay_result('error');"
+        return 200, body.encode(), "text/plain"
@@ -0,0 +1,19 @@
+from gravity_controller_operator.simulators.base import EmulatorSimulator
+from gravity_controller_operator.simulators.modbus_tcp import ModbusTCPSimulator
+from gravity_controller_operator.simulators.moxa import MoxaSimulator
+from gravity_controller_operator.simulators.netping import NetPingSimulator
+from gravity_controller_operator.simulators.rtu import RTUSimulator
+
+
+SIMULATORS = {simulator.model: simulator for simulator in (
+    EmulatorSimulator, ModbusTCPSimulator, RTUSimulator, MoxaSimulator,
+    NetPingSimulator)}
+
+
+def get_simulator(model, **options):
+    try:
+        simulator = SIMULATORS[model]
+    except KeyError:
+        raise ValueError(f"No simulator for model {model!r}, "
+                         f"expected one of {sorted(SIMULATORS)}") from None
+    return simulator(**options)
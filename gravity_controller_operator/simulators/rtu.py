@@ -0,0 +1,112 @@
+import os
+import pty
+import threading
+import tty
+
+from gravity_controller_operator.controllers.rs485_frames import crc16, \
+    MODEL_REGISTER, MODEL_LENGTH
+from gravity_controller_operator.simulators.base import Simulator
+from gravity_controller_operator.simulators.modbus_tcp import \
+    DEVICE_FAILURE, ModbusDataModel, exception_pdu
+
+
+def request_size(buffer):
+    """Длина кадра запроса RTU по коду функции (None - нужно больше байт)."""
+    if len(buffer) < 8:
+        return None
+    if buffer[1] in (15, 16):
+        return 9 + buffer[6] if len(buffer) >= 7 else None
+    return 8
+
+
+class WBDataModel(ModbusDataModel):
+    """Модуль Wiren Board: строка модели в input registers 200-219."""
+    def __init__(self, size=16, signature="WBMR6LV"):
+        super().__init__(max(size, MODEL_REGISTER + MODEL_LENGTH))
+        for i, char in enumerate(signature[:MODEL_LENGTH]):
+            self.input_registers[MODEL_REGISTER + i] = ord(char)
+
+
+class RTUSimulator(Simulator):
+    """
+    Modbus RTU на псевдотерминале: драйвер WB-MR6LV открывает путь
+    ведомой стороны pty как последовательный порт. На одной «шине»
+    отвечают slave 1..247 (или только slaves), у каждого свои таблицы
+    (WBDataModel).
+    Неисправности: drop - slave молчит, error - исключение 04,
+    reset - кадр с битой CRC (помеха на линии).
+    """
+    model = "wb_mr6lv"
+    baudrate = 115200
+
+    def __init__(self, size=16, slaves=None, **fault_options):
+        super().__init__(**fault_options)
+        self.size = size
+        self.slave_ids = None if slaves is None else set(slaves)
+        self.slaves = {}
+        self.path = None
+        self._master = self._slave = None
+
+    def slave(self, slave_id):
+        data = self.slaves.get(slave_id)
+        if data is None:
+            data = self.slaves[slave_id] = WBDataModel(self.size)
+        return data
+
+    def start(self):
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.path = os.ttyname(self._slave)
+        threading.Thread(target=self._serve, name="simulator-rtu",
+                         daemon=True).start()
+        return self
+
+    def stop(self):
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def controller_kwargs(self, index):
+        return {"device": self.path, "slave_id": 1 + index % 247,
+                "baudrate": self.baudrate}
+
+    def _serve(self):
+        buffer = b""
+        while True:
+            try:
+                buffer += os.read(self._master, 256)
+            except OSError:
+                return
+            while True:
+                size = request_size(buffer)
+                if size is None or len(buffer) < size:
+                    break
+                frame, buffer = buffer[:size], buffer[size:]
+                if crc16(frame[:-2]) != frame[-2:]:
+                    # Битый кадр ведомый игнорирует
+                    continue
+                if self.slave_ids is not None \
+                        and frame[0] not in self.slave_ids:
+                    continue
+                reply = self._reply(frame[0], frame[1:-2])
+                if reply is None:
+                    continue
+                try:
+                    os.write(self._master, reply)
+                except OSError:
+                    return
+
+    def _reply(self, slave_id, pdu):
+        action = self.decide()
+        if action == "drop":
+            return None
+        if action == "error":
+            body = bytes([slave_id]) + exception_pdu(pdu[0], DEVICE_FAILURE)
+            return body + crc16(body)
+        body = bytes([slave_id]) + self.slave(slave_id).handle(pdu)
+        crc = crc16(body)
+        if action == "reset":
+            crc = bytes([crc[0] ^ 0xFF, crc[1]])
+        return body + crc
@@ -0,0 +1,77 @@
+import datetime
+import time
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from gravity_controller_operator.controllers_super import StateView
+
+
+EMPTY_STATE = MappingProxyType({})
+
+
+class ControllerSnapshot(Mapping):
+    """
+    Неизменяемый снимок состояния контроллера {"di": ..., "relays": ...}.
+    Публикуется оператором после каждого опроса заменой ссылки, поэтому
+    читать его можно из любого потока без блокировок.
+    """
+    __slots__ = ("_states", "_tables", "taken_at", "monotonic", "seq")
+
+    def __init__(self, di=None, relays=None, seq=0, taken_at=None,
+                 monotonic=None):
+        self._tables = {"di": di, "relays": relays}
+        self._states = {
+            typ: StateView(table) if table is not None else EMPTY_STATE
+            for typ, table in self._tables.items()
+        }
+        self.seq = seq
+        self.taken_at = taken_at or time.time()
+        self.monotonic = monotonic if monotonic is not None else time.monotonic()
+
+    @classmethod
+    def from_interface(cls, interface, seq=0):
+        di = interface.di_interface
+        relays = interface.relay_interface
+        return cls(di.point_table.freeze() if di else None,
+                   relays.point_table.freeze() if relays else None,
+                   seq=seq)
+
+    def __getitem__(self, typ):
+        return self._states[typ]
+
+    def __iter__(self):
+        return iter(self._states)
+
+    def __len__(self):
+        return len(self._states)
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def get_table(self, typ):
+        """FrozenPointTable типа точек или None."""
+        return self._tables[typ]
+
+    def get_point(self, typ, ch):
+        state = self._states.get(typ, EMPTY_STATE)
+        if ch not in state:
+            return {"error": f"channel {ch} not found"}
+        return state[ch]
+
+    def differs_from(self, other):
+        """Изменились ли точки относительно другого снимка."""
+        if other is None:
+            return True
+        return any(table is not other._tables[typ]
+                   for typ, table in self._tables.items())
+
+    def age(self):
+        """Сколько секунд прошло с момента снимка."""
+        return time.monotonic() - self.monotonic
+
+    def get_taken_at(self):
+        return datetime.datetime.fromtimestamp(self.taken_at)
+
+    def to_dict(self):
+        return {typ: {ch: dict(point) for ch, point in state.items()}
+                for typ, state in self._states.items()}
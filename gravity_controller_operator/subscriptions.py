@@ -0,0 +1,136 @@
+import asyncio
+import datetime
+import logging
+import queue
+import threading
+from collections import namedtuple
+from functools import partial
+
+
+logger = logging.getLogger(__name__)
+
+# typ - "di" или "relays", timestamp - datetime момента изменения
+PointEvent = namedtuple("PointEvent", "typ channel old new timestamp")
+
+POINT_TYPES = ("di", "relays")
+
+
+class Subscription:
+    """
+    Подписка на изменения точек с фильтрами по каналам и типам.
+    """
+    def __init__(self, hub, callback, channels=None, types=None):
+        self.hub = hub
+        self.callback = callback
+        self.channels = frozenset(channels) if channels is not None else None
+        self.types = frozenset(types) if types is not None else None
+
+    def matches(self, event):
+        if self.types is not None and event.typ not in self.types:
+            return False
+        if self.channels is not None and event.channel not in self.channels:
+            return False
+        return True
+
+    def cancel(self):
+        self.hub.unsubscribe(self)
+
+
+class QueueSubscription(Subscription):
+    """
+    Подписка, складывающая события в потокобезопасную очередь.
+    При переполнении самое старое событие вытесняется.
+    """
+    def __init__(self, hub, channels=None, types=None, maxsize=0):
+        self.queue = queue.Queue(maxsize=maxsize)
+        super().__init__(hub, self._put, channels, types)
+
+    def _put(self, event):
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, block=True, timeout=None):
+        return self.queue.get(block, timeout)
+
+
+class SubscriptionHub:
+    """
+    Раздаёт подписчикам события изменения точек ControllerInterface.
+    События возникают только при фактическом изменении значения
+    в SoftStateMixin (опрос устройства или команда реле).
+    """
+    def __init__(self, interface=None):
+        self._subscriptions = ()
+        self._lock = threading.Lock()
+        if interface is not None:
+            self.bind(interface)
+
+    def bind(self, interface):
+        if interface.di_interface:
+            interface.di_interface.listeners.append(partial(self._on_change, "di"))
+        if interface.relay_interface:
+            interface.relay_interface.listeners.append(
+                partial(self._on_change, "relays"))
+
+    def subscribe(self, callback, channels=None, types=None):
+        """
+        callback(event: PointEvent) вызывается в потоке, обновившем состояние,
+        поэтому он должен быть быстрым.
+        """
+        return self._add(Subscription(self, callback, channels, types))
+
+    def subscribe_queue(self, channels=None, types=None, maxsize=0):
+        return self._add(QueueSubscription(self, channels, types, maxsize))
+
+    async def events(self, channels=None, types=None):
+        """
+        Асинхронный итератор событий для текущего event loop:
+
+            async for event in hub.events(types=["di"]):
+                ...
+        """
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        subscription = self.subscribe(
+            partial(loop.call_soon_threadsafe, events.put_nowait),
+            channels, types)
+        try:
+            while True:
+                yield await events.get()
+        finally:
+            subscription.cancel()
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = tuple(
+                s for s in self._subscriptions if s is not subscription)
+
+    def _add(self, subscription):
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def _on_change(self, typ, channel, old, new, timestamp):
+        subscriptions = self._subscriptions
+        if not subscriptions:
+            return
+        event = PointEvent(typ, channel, old, new,
+                           datetime.datetime.fromtimestamp(timestamp))
+        self.publish(event, subscriptions)
+
+    def publish(self, event, subscriptions=None):
+        for subscription in subscriptions or self._subscriptions:
+            if not subscription.matches(event):
+                continue
+            try:
+                subscription.callback(event)
+            except Exception:
+                # Ошибка подписчика не должна останавливать опрос
+                logger.exception("Subscriber failed on %s", event)
@@ -0,0 +1,21 @@
+import asyncio
+
+from gravity_controller_operator.controllers.emulator_contr import \
+    AsyncEmulatorController
+from gravity_controller_operator.main import AsyncControllerOperator
+
+
+def test_async_operator_roundtrip():
+    async def scenario():
+        operator = AsyncControllerOperator(
+            AsyncEmulatorController(), update_cooldown=0.01)
+        async with operator:
+            assert operator.get_point("di", 1)["state"] == 0
+            await operator.change_relay_state(2, 1)
+            assert operator.get_relay_state(2)["state"] == 1
+            await operator.change_relays_state({1: 1, 3: 1})
+            assert operator.get_relay_state(3)["state"] == 1
+            assert operator.get_model() == "emulator_controller"
+        assert operator._task is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,38 @@
+from gravity_controller_operator.benchmarks.suite import compare, \
+    format_report, run_suite, summarize
+from gravity_controller_operator.simulators.registry import SIMULATORS
+
+
+def test_summarize_percentiles():
+    summary = summarize([i / 100 for i in range(100)])
+    assert summary["p50"] == 0.49
+    assert summary["p99"] == 0.98
+    assert summarize([1.0, 2.0])["p50"] == 1.0
+    assert summary["count"] == 100
+
+
+def test_suite_runs_against_all_simulators():
+    results = run_suite([simulator() for simulator in SIMULATORS.values()],
+                        device_counts=(2,), cycles=3, reads=10, commands=2,
+                        duration=0.2, max_workers=4)
+    assert set(results) == set(SIMULATORS)
+    for result in results.values():
+        assert result["operator"]["poll"]["count"] == 3
+        assert result["fleet"]["2"]["errors"] == 0
+        assert result["fleet"]["2"]["polls_per_sec"] > 0
+    assert "arm_k210" in format_report(results)
+    assert compare(results, results) == []
+
+
+def test_compare_flags_regressions():
+    baseline = {"m": {"operator": {"poll": {"p50": 0.001, "p99": 0.002}},
+                      "fleet": {"10": {"polls_per_sec": 1000.0,
+                                       "commands_per_sec": 50.0,
+                                       "command": {}}}}}
+    current = {"m": {"operator": {"poll": {"p50": 0.003, "p99": 0.002}},
+                     "fleet": {"10": {"polls_per_sec": 500.0,
+                                      "commands_per_sec": 50.0,
+                                      "command": {}}}}}
+    regressions = compare(current, baseline)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("m.operator.poll.p50")
@@ -0,0 +1,101 @@
+import pytest
+
+from gravity_controller_operator.simulators.netping import NetPingSimulator
+from gravity_controller_operator.bitmask import MaskDebouncer, bits_to_mask, \
+    iter_bits, mask_to_bits
+from gravity_controller_operator.controller_factory import ControllerCreator
+from gravity_controller_operator.controllers.emulator_contr import \
+    EmulatorController
+from gravity_controller_operator.controllers_super import DIInterface
+from gravity_controller_operator.main import ControllerOperator
+
+
+def test_mask_helpers():
+    mask = bits_to_mask([1, 0, True, 0, 1])
+    assert mask == 0b10101
+    assert list(iter_bits(mask)) == [0, 2, 4]
+    assert mask_to_bits(mask, 6) == [True, False, True, False, True, False]
+
+
+def test_debouncer_rejects_short_pulse():
+    debouncer = MaskDebouncer(delay=0.1)
+    assert debouncer.filter(0b00, 0.0) == 0b00
+    assert debouncer.filter(0b01, 1.0) == 0b00
+    assert debouncer.filter(0b00, 1.05) == 0b00
+    assert debouncer.filter(0b01, 2.0) == 0b00
+    assert debouncer.filter(0b01, 2.05) == 0b00
+    assert debouncer.filter(0b01, 2.1) == 0b01
+
+
+def test_debouncer_per_bit_delay():
+    # Бит 0 - без фильтра, бит 1 - 0.5 с
+    debouncer = MaskDebouncer(per_bit={1: 0.5})
+    debouncer.filter(0b00, 0.0)
+    assert debouncer.filter(0b11, 1.0) == 0b01
+    assert debouncer.filter(0b11, 1.5) == 0b11
+
+
+class MaskDI(DIInterface):
+    map_keys_amount = 4
+    starts_with = 1
+    bitmask = True
+    mask_value = bool
+
+    def __init__(self):
+        self.mask = 0
+        self.reads = 0
+        super().__init__()
+
+    def get_phys_dict(self):
+        return dict(enumerate(mask_to_bits(self.mask, 4), start=1))
+
+    def get_phys_mask(self):
+        self.reads += 1
+        return self.mask
+
+
+def test_xor_applies_only_changed_bits():
+    di = MaskDI()
+    changes = []
+    di.listeners.append(lambda ch, old, new, ts: changes.append((ch, old, new)))
+    assert di.get_point(2)["state"] is False
+    di.mask = 0b0010
+    di.update_from_device()
+    assert changes == [(2, False, True)]
+    di.update_from_device()
+    assert changes == [(2, False, True)]
+    # Значение, поставленное в обход устройства, сверяется со следующим чтением
+    di.set_point(2, False)
+    di.update_from_device()
+    assert di.get_point(2)["state"] is True
+
+
+def test_debounce_through_interface():
+    di = MaskDI()
+    di.set_debounce(10)
+    di.mask = 0b1
+    di.update_from_device()
+    assert di.get_point(1)["state"] is False
+    di.set_debounce(0)
+    di.update_from_device()
+    assert di.get_point(1)["state"] is True
+
+
+def test_debounce_requires_bitmask_interface():
+    operator = ControllerOperator(EmulatorController(), auto_update_points=False)
+    with pytest.raises(TypeError):
+        operator.interface.di_interface.set_debounce(0.05)
+
+
+def test_netping_reads_masks():
+    with NetPingSimulator() as simulator:
+        simulator.di_mask = 0b1101
+        simulator.relays[2] = 1
+        controller = ControllerCreator.get_controller(
+            simulator.model, **simulator.controller_kwargs(0))
+        operator = ControllerOperator(controller, auto_update_points=False)
+        points = operator.get_points()
+    # Входы NetPing инверсны: замкнут только вход 2
+    assert [points["di"][ch]["state"] for ch in range(1, 5)] == [0, 1, 0, 0]
+    assert points["relays"][2]["state"] == 1
+    assert points["relays"][1]["state"] == 0
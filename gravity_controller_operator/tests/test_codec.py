@@ -0,0 +1,103 @@
+import pytest
+
+from gravity_controller_operator.codec import decode_fleet, decode_snapshot, \
+    encode_fleet, encode_snapshot
+from gravity_controller_operator.controllers.emulator_contr import \
+    EmulatorController
+from gravity_controller_operator.controllers_super import PointTable
+from gravity_controller_operator.exceptions import CodecError
+from gravity_controller_operator.main import ControllerOperator
+from gravity_controller_operator.snapshot import ControllerSnapshot
+
+
+def make_operator():
+    return ControllerOperator(EmulatorController(), auto_update_points=False)
+
+
+def test_full_roundtrip():
+    operator = make_operator()
+    operator.change_relay_state(2, 1)
+    snapshot = operator.get_snapshot()
+    decoded = decode_snapshot(encode_snapshot(snapshot))
+    assert decoded.seq == snapshot.seq
+    assert decoded.taken_at == snapshot.taken_at
+    assert decoded.to_dict().keys() == snapshot.to_dict().keys()
+    relay = decoded.get_point("relays", 2)
+    assert relay["state"] == 1 and relay["addr"] == 2
+    assert abs(relay["changed"].timestamp()
+               - snapshot.get_point("relays", 2)["changed"].timestamp()) < 1e-3
+
+
+def test_ints_bools_and_unknown_values():
+    table = PointTable([0, 1, 2, 3], [10, 11, 12, 13])
+    table.values = [None, 250, -3, 0]
+    bools = PointTable([1, 2], [1, 2])
+    bools.values = [True, None]
+    decoded = decode_snapshot(encode_snapshot(
+        ControllerSnapshot(table.freeze(), bools.freeze(), seq=7)))
+    assert [decoded["di"][ch]["state"] for ch in range(4)] == [None, 250, -3, 0]
+    assert decoded["di"][3]["addr"] == 13
+    assert decoded["di"][1]["changed"] is None
+    assert decoded["relays"][1]["state"] is True
+    assert decoded["relays"][2]["state"] is None
+
+
+def test_delta_contains_only_changed_points():
+    operator = make_operator()
+    base = operator.get_snapshot()
+    full = encode_snapshot(base)
+    received = decode_snapshot(full)
+    operator.change_relay_state(3, 1)
+    delta = encode_snapshot(operator.get_snapshot(), base)
+    assert len(delta) < len(full)
+    decoded = decode_snapshot(delta, received)
+    assert decoded.to_dict() == decode_snapshot(
+        encode_snapshot(operator.get_snapshot())).to_dict()
+    assert decoded["relays"][3]["state"] == 1
+    # Неизменившаяся таблица переиспользуется без копирования
+    assert decoded.get_table("di") is received.get_table("di")
+    with pytest.raises(CodecError):
+        decode_snapshot(delta)
+
+
+def test_fleet_roundtrip_and_errors():
+    operators = {f"gate_{i}": make_operator() for i in range(3)}
+    snapshots = {name: op.get_snapshot() for name, op in operators.items()}
+    received = decode_fleet(encode_fleet(snapshots))
+    operators["gate_1"].change_relay_state(1, 1)
+    current = {name: op.get_snapshot() for name, op in operators.items()}
+    decoded = decode_fleet(encode_fleet(current, snapshots), received)
+    assert list(decoded) == ["gate_0", "gate_1", "gate_2"]
+    assert decoded["gate_1"]["relays"][1]["state"] == 1
+    assert decoded["gate_0"]["relays"][1]["state"] == 0
+    with pytest.raises(CodecError):
+        decode_snapshot(b"JSON")
+    with pytest.raises(CodecError):
+        decode_snapshot(encode_snapshot(snapshots["gate_0"])[:-4])
+
+
+def test_truncated_data_raises_codec_error():
+    operators = {f"gate_{i}": make_operator() for i in range(2)}
+    snapshots = {name: op.get_snapshot() for name, op in operators.items()}
+    fleet = encode_fleet(snapshots)
+    for end in range(len(fleet)):
+        with pytest.raises(CodecError):
+            decode_fleet(fleet[:end])
+    base = snapshots["gate_0"]
+    operators["gate_0"].change_relay_state(2, 1)
+    delta = encode_snapshot(operators["gate_0"].get_snapshot(), base)
+    for end in range(len(delta)):
+        with pytest.raises(CodecError):
+            decode_snapshot(delta[:end], base)
+    with pytest.raises(CodecError):
+        decode_snapshot(delta + b"\0", base)
+
+
+def test_fleet_entry_length_is_checked():
+    snapshot = make_operator().get_snapshot()
+    fleet = bytearray(encode_fleet({"a": snapshot, "b": snapshot}))
+    # Длина записи "a" (после заголовка парка и имени) на байт больше
+    offset = 8 + 2 + 1
+    fleet[offset] += 1
+    with pytest.raises(CodecError):
+        decode_fleet(bytes(fleet))
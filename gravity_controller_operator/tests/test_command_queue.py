@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from gravity_controller_operator.command_queue import RelayCommandQueue
+from gravity_controller_operator.controllers.emulator_contr import \
+    EmulatorController
+from gravity_controller_operator.fleet import FleetOperator
+from gravity_controller_operator.main import ControllerOperator
+
+
+class BlockingWriter:
+    def __init__(self):
+        self.writes = []
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def __call__(self, states):
+        self.started.set()
+        self.release.wait(5)
+        self.writes.append(dict(states))
+        return len(self.writes)
+
+
+def test_pending_commands_are_coalesced():
+    writer = BlockingWriter()
+    queue = RelayCommandQueue(writer)
+    first = queue.submit(1, 1)
+    assert writer.started.wait(5)
+    # Пока идёт первая запись, накапливаются и схлопываются следующие
+    futures = [queue.submit(2, i % 2) for i in range(5)] + [queue.submit(3, 1)]
+    writer.release.set()
+    assert first.result(5) == 1
+    assert {f.result(5) for f in futures} == {2}
+    assert writer.writes == [{1: 1}, {2: 0, 3: 1}]
+    assert list(writer.writes[1]) == [2, 3]
+    assert queue.get_stats() == {"pending": 0, "submitted": 7,
+                                 "coalesced": 4, "writes": 2}
+    queue.close()
+
+
+def test_coalesced_channel_keeps_first_position():
+    writer = BlockingWriter()
+    queue = RelayCommandQueue(writer)
+    queue.submit(1, 1)
+    assert writer.started.wait(5)
+    queue.submit(2, 1)
+    queue.submit(3, 1)
+    last = queue.submit(2, 0)
+    writer.release.set()
+    last.result(5)
+    assert list(writer.writes[1].items()) == [(2, 0), (3, 1)]
+    queue.close()
+
+
+def test_write_error_is_set_on_futures():
+    def fail(states):
+        raise ValueError("no answer")
+    queue = RelayCommandQueue(fail)
+    with pytest.raises(ValueError):
+        queue.submit(1, 1).result(5)
+    queue.close()
+    with pytest.raises(RuntimeError):
+        queue.submit(1, 0)
+
+
+def test_operator_submit_relay_state():
+    operator = ControllerOperator(EmulatorController(), auto_update_points=False)
+    operator.submit_relay_state(2, 1)
+    operator.submit_relays_state({2: 0, 3: 1}).result(5)
+    assert operator.get_point("relays", 2)["state"] == 0
+    assert operator.get_point("relays", 3)["state"] == 1
+    operator.commands.close()
+
+
+def test_fleet_submit_relay_state():
+    fleet = FleetOperator(max_workers=2)
+    fleet.register("emu", "emulator_controller")
+    fleet.submit_relay_state("emu", 1, 1).result(5)
+    assert fleet.get_point("emu", "relays", 1)["state"] == 1
+    assert fleet.get_stats()["emu"]["commands"]["writes"] == 1
+    fleet.stop()
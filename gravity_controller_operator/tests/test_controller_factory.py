@@ -0,0 +1,71 @@
+import subprocess
+import sys
+from importlib.metadata import EntryPoint
+
+import pytest
+
+from gravity_controller_operator import controller_factory
+from gravity_controller_operator.controller_factory import ControllerCreator, \
+    register_controller
+from gravity_controller_operator.controllers.emulator_contr import \
+    EmulatorController
+from gravity_controller_operator.exceptions import UnknownController
+
+
+def test_import_does_not_load_drivers():
+    code = ("import sys\n"
+            "from gravity_controller_operator.controller_factory import ControllerCreator\n"
+            "ControllerCreator.get_controller('Emulator_Controller')\n"
+            "print(sorted(m for m in ('pymodbus', 'pyModbusTCP', 'requests',"
+            " 'netping_contr') if m in sys.modules))")
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+    assert output.strip() == "[]"
+
+
+def test_unknown_model():
+    with pytest.raises(UnknownController):
+        ControllerCreator.get_controller("no_such_model")
+
+
+def test_register_controller(monkeypatch):
+    monkeypatch.setitem(controller_factory.CONTROLLERS, "my_model",
+                        "gravity_controller_operator.controllers.emulator_contr:"
+                        "EmulatorController")
+    assert isinstance(ControllerCreator.get_controller("MY_MODEL"),
+                      EmulatorController)
+    register_controller("other", EmulatorController)
+    try:
+        assert isinstance(ControllerCreator.get_controller("other"),
+                          EmulatorController)
+    finally:
+        del controller_factory.CONTROLLERS["other"]
+
+
+def test_entry_points(monkeypatch):
+    # Атрибут через точку и extras разбирает EntryPoint.load()
+    entry_point = EntryPoint(
+        "Plugin_Model", "gravity_controller_operator.controllers:"
+        "emulator_contr.EmulatorController [async]",
+        controller_factory.ENTRY_POINT_GROUP)
+    monkeypatch.setattr(controller_factory, "_entry_points_loaded", False)
+    monkeypatch.setattr(controller_factory, "_select_entry_points",
+                        lambda group: [entry_point] if "async" not in group else [])
+    monkeypatch.setattr(controller_factory, "CONTROLLERS",
+                        dict(controller_factory.CONTROLLERS))
+    assert isinstance(ControllerCreator.get_controller("plugin_model"),
+                      EmulatorController)
+    assert controller_factory.CONTROLLERS["plugin_model"] is EmulatorController
+    assert "plugin_model" in controller_factory.available_models()
+
+
+def test_missing_metadata_backport(monkeypatch):
+    monkeypatch.setitem(sys.modules, "importlib.metadata", None)
+    monkeypatch.setitem(sys.modules, "importlib_metadata", None)
+    with pytest.raises(ImportError, match="importlib_metadata"):
+        controller_factory._select_entry_points(
+            controller_factory.ENTRY_POINT_GROUP)
+
+
+def test_available_controllers_compat():
+    models = {contr.model for contr in controller_factory.AVAILABLE_CONTROLLERS}
+    assert {"moxa_e1214", "arm_k210", "emulator_controller"} <= models
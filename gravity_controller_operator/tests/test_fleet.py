@@ -0,0 +1,42 @@
+import threading
+import time
+
+from gravity_controller_operator.fleet import FleetOperator
+
+
+def test_fleet_polls_every_device_with_bounded_pool():
+    with FleetOperator(max_workers=4, update_cooldown=0.02) as fleet:
+        for i in range(50):
+            fleet.register(f"emu_{i}", "emulator_controller")
+        time.sleep(0.3)
+        stats = fleet.get_stats()
+        points = fleet.get_points()
+    assert all(s["polls"] >= 2 and s["errors"] == 0 for s in stats.values())
+    assert len(points) == 50
+    assert points["emu_7"]["di"][1]["state"] == 0
+    fleet_threads = [t for t in threading.enumerate() if t.name.startswith("fleet")]
+    assert not fleet_threads
+
+
+def test_fleet_relay_command():
+    fleet = FleetOperator(max_workers=1)
+    fleet.register("emu", "emulator_controller")
+    fleet.change_relay_state("emu", 3, 1)
+    assert fleet.get_point("emu", "relays", 3)["state"] == 1
+    fleet.remove_controller("emu")
+    assert fleet.get_points() == {}
+    fleet.stop()
+
+
+def test_failing_poll_hook_keeps_device_scheduled():
+    with FleetOperator(max_workers=1, update_cooldown=0.01) as fleet:
+        device = fleet.register("emu", "emulator_controller")
+
+        def on_poll(duration, error):
+            raise RuntimeError("hook failed")
+
+        device.on_poll = on_poll
+        time.sleep(0.2)
+        polls = device.polls
+        time.sleep(0.2)
+    assert polls >= 2 and device.polls > polls
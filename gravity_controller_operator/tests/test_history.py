@@ -0,0 +1,57 @@
+import pytest
+
+from gravity_controller_operator.controllers.emulator_contr import \
+    EmulatorController
+from gravity_controller_operator.history import PointHistory
+from gravity_controller_operator.main import ControllerOperator
+
+
+def test_ring_buffer_keeps_latest_records():
+    history = PointHistory(capacity=4)
+    for i in range(6):
+        history.record(0, 1, i, i + 1, timestamp=100.0 + i)
+    assert len(history) == 4
+    assert history.dropped == 2
+    assert history.get_transitions("di", 1) == [
+        (102.0, 2.0, 3.0), (103.0, 3.0, 4.0), (104.0, 4.0, 5.0),
+        (105.0, 5.0, 6.0)]
+    assert history.get_transitions("di", 1, since=103.5, until=105.0) == [
+        (104.0, 4.0, 5.0)]
+
+
+def test_clear_resets_dropped():
+    history = PointHistory(capacity=2)
+    for i in range(5):
+        history.record(0, i % 2, i, i + 1, timestamp=float(i))
+    assert history.get_transitions("di", 0) == [(4.0, 4.0, 5.0)]
+    history.clear()
+    assert len(history) == 0
+    assert history.dropped == 0
+    history.record(0, 1, 0, 1, timestamp=10.0)
+    assert history.dropped == 0
+
+
+def test_counts_per_channel_and_type():
+    history = PointHistory(capacity=8)
+    history.record(0, 3, 0, 1, timestamp=1.0)
+    history.record(0, 3, 1, 0, timestamp=2.0)
+    history.record(1, 3, 0, 1, timestamp=3.0)
+    history.record(0, 2, 0, 1, timestamp=4.0)
+    assert history.get_counts("di") == {3: 2, 2: 1}
+    assert history.get_counts(since=2.5) == {"di": {2: 1}, "relays": {3: 1}}
+
+
+def test_operator_records_point_changes():
+    operator = ControllerOperator(EmulatorController(), auto_update_points=False,
+                                  update_cooldown=0, history_size=16)
+    operator.change_relay_state(2, 1)
+    operator.change_relay_state(2, 0)
+    transitions = operator.get_transitions("relays", 2)
+    assert [(old, new) for _, old, new in transitions] == [(0, 1), (1, 0)]
+    assert operator.get_transition_counts("relays") == {2: 2}
+
+
+def test_history_disabled_by_default():
+    operator = ControllerOperator(EmulatorController(), auto_update_points=False)
+    with pytest.raises(RuntimeError):
+        operator.get_transitions("di", 1)
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from gravity_controller_operator.controllers.emulator_contr import \
+    EmulatorController
+from gravity_controller_operator.exceptions import DeviceError
+from gravity_controller_operator.main import ControllerOperator
+
+
+def make_operator(latency=0.0):
+    controller = EmulatorController(latency=latency)
+    operator = ControllerOperator(controller, auto_update_points=False)
+    # Чтения при создании контроллера не в счёт
+    controller.device.reads = 0
+    return operator, controller.device
+
+
+def call_concurrently(func, threads=16):
+    barrier = threading.Barrier(threads)
+    results, errors = [], []
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(func())
+        except Exception as e:
+            errors.append(e)
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return results, errors
+
+
+def test_fresh_cache_is_returned_without_reading():
+    operator, device = make_operator()
+    # Оператор ещё не читал устройство - первый вызов читает DI и реле
+    operator.get_points(max_age=10)
+    assert device.reads == 2
+    operator.get_points(max_age=10)
+    operator.get_point("di", 1, max_age=10)
+    assert device.reads == 2
+    # update_points тоже освежает данные
+    operator.update_cooldown = 0
+    operator.update_points()
+    operator.get_points(max_age=10)
+    assert device.reads == 4
+    time.sleep(0.02)
+    operator.get_relay_state(1, max_age=0.01)
+    assert device.reads == 6
+
+
+def test_concurrent_callers_share_one_read():
+    operator, device = make_operator(latency=0.05)
+    results, errors = call_concurrently(lambda: operator.get_points(max_age=1))
+    assert not errors
+    assert device.reads == 2
+    assert len({snapshot.seq for snapshot in results}) == 1
+
+
+def test_strict_max_age_waits_for_read_started_after_call():
+    operator, device = make_operator(latency=0.02)
+    results, errors = call_concurrently(lambda: operator.get_points(max_age=0))
+    assert not errors
+    # Опоздавшие к первому чтению ждут второго, но не читают каждый сам
+    assert 2 <= device.reads <= 6
+
+
+def test_read_error_is_shared():
+    operator, device = make_operator(latency=0.02)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise DeviceError("no response")
+    operator.interface.di_interface.get_phys_mask = failing
+    _, errors = call_concurrently(lambda: operator.get_points(max_age=1), 8)
+    assert len(errors) == 8
+    assert all(isinstance(e, DeviceError) for e in errors)
+    # Повторы одного чтения делает device_guard, не каждый вызов
+    assert len(calls) < 8
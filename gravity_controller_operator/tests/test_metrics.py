@@ -0,0 +1,63 @@
+import json
+import urllib.request
+
+from gravity_controller_operator.controllers.emulator_contr import \
+    EmulatorController
+from gravity_controller_operator.main import ControllerOperator
+from gravity_controller_operator.metrics import Histogram, MetricsRegistry, \
+    MetricsServer, REGISTRY
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((0.01, 0.1))
+    for value in (0.005, 0.01, 0.05, 1.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [(0.01, 2), (0.1, 3), (float("inf"), 4)]
+    assert histogram.count == 4
+
+
+def test_operator_collects_device_metrics():
+    operator = ControllerOperator(EmulatorController(), auto_update_points=False,
+                                  update_cooldown=0, name="gate_metrics")
+    operator.update_points()
+    operator.change_relay_state(1, 1)
+    metrics = operator.get_metrics()
+    assert metrics["histograms"]["update_all"]["count"] == 1
+    # Начальное чтение DI + опрос DI и реле (метрики общие с
+    # ControllerInterface, начальное чтение реле было до объединения)
+    assert metrics["histograms"]["read"]["count"] == 3
+    assert metrics["histograms"]["write"]["count"] == 1
+    assert metrics["histograms"]["lock_wait"]["count"] == 2
+    assert metrics["gauges"]["snapshot_age_seconds"] >= 0
+    assert metrics["health"]["state"] == "closed"
+    assert REGISTRY.get("gate_metrics") is operator.metrics
+
+
+def test_registry_names_are_unique_and_weak():
+    registry = MetricsRegistry()
+    first = EmulatorController().interface.metrics
+    second = EmulatorController().interface.metrics
+    assert registry.register("gate", first) == "gate"
+    assert registry.register("gate", second) == "gate_2"
+    del first
+    assert [name for name, _ in registry.items()] == ["gate_2"]
+
+
+def test_prometheus_endpoint():
+    registry = MetricsRegistry()
+    operator = ControllerOperator(EmulatorController(), auto_update_points=False,
+                                  update_cooldown=0)
+    registry.register("gate", operator.metrics)
+    operator.update_points()
+    server = MetricsServer(registry, port=0).start()
+    try:
+        url = f"http://127.0.0.1:{server.port}"
+        text = urllib.request.urlopen(f"{url}/metrics").read().decode()
+        data = json.loads(urllib.request.urlopen(f"{url}/metrics.json").read())
+    finally:
+        server.stop()
+    assert 'gravity_controller_update_all_seconds_count{device="gate"} 1' in text
+    assert 'gravity_controller_read_seconds_bucket{device="gate",le="+Inf"} 3' in text
+    assert 'gravity_controller_circuit_state{device="gate",state="closed"} 1' in text
+    assert "gravity_controller_snapshot_age_seconds" in text
+    assert data["gate"]["histograms"]["update_all"]["count"] == 1
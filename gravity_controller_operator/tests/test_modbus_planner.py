@@ -0,0 +1,83 @@
+from gravity_controller_operator.controllers_super import ControllerInterface, \
+    DIInterface, RelayInterface
+from gravity_controller_operator.modbus_planner import ModbusReadMixin, \
+    ModbusReadPlanner, ReadSpan, plan_reads, READ_COILS, \
+    READ_DISCRETE_INPUTS, READ_HOLDING_REGISTERS
+
+
+def test_plan_merges_adjacent_and_overlapping():
+    spans = [
+        ReadSpan(READ_COILS, 1, 0, 6),
+        ReadSpan(READ_COILS, 1, 6, 4),
+        ReadSpan(READ_COILS, 1, 2, 3),
+        ReadSpan(READ_COILS, 2, 0, 6),
+        ReadSpan(READ_DISCRETE_INPUTS, 1, 0, 8),
+        ReadSpan(READ_COILS, 1, 20, 2),
+    ]
+    assert sorted(plan_reads(spans)) == sorted([
+        ReadSpan(READ_COILS, 1, 0, 10),
+        ReadSpan(READ_COILS, 1, 20, 2),
+        ReadSpan(READ_COILS, 2, 0, 6),
+        ReadSpan(READ_DISCRETE_INPUTS, 1, 0, 8),
+    ])
+    assert len(plan_reads(spans, max_gap=10)) == 3
+
+
+def test_plan_respects_pdu_limit():
+    spans = [ReadSpan(READ_HOLDING_REGISTERS, 1, 0, 100),
+             ReadSpan(READ_HOLDING_REGISTERS, 1, 100, 100)]
+    assert len(plan_reads(spans)) == 2
+
+
+class FakeBus:
+    def __init__(self):
+        self.transactions = []
+
+    def __call__(self, tx):
+        # Нечётные адреса включены
+        self.transactions.append(tx)
+        return [(tx.address + i) % 2 == 1 for i in range(tx.count)]
+
+
+class PlannedDI(ModbusReadMixin, DIInterface):
+    map_keys_amount = 4
+    read_function = READ_COILS
+    slave_id = 1
+
+    def __init__(self, planner):
+        self.planner = planner
+        super().__init__()
+
+
+class PlannedRelay(ModbusReadMixin, RelayInterface):
+    map_keys_amount = 4
+    starts_with = 4
+    read_function = READ_COILS
+    slave_id = 1
+
+    def __init__(self, planner):
+        self.planner = planner
+        super().__init__()
+
+    def change_phys_relay_state(self, addr, state: bool):
+        pass
+
+
+def test_update_all_uses_single_transaction():
+    bus = FakeBus()
+    planner = ModbusReadPlanner(bus)
+    interface = ControllerInterface(PlannedDI(planner), PlannedRelay(planner))
+    bus.transactions.clear()
+    interface.update_all()
+    assert bus.transactions == [ReadSpan(READ_COILS, 1, 0, 8)]
+    states = interface.get_all_states()
+    assert states["di"][3]["state"] is True
+    assert states["di"][2]["state"] is False
+    assert states["relays"][5]["state"] is True
+    assert states["relays"][6]["state"] is False
+
+
+def test_contiguous_runs():
+    from gravity_controller_operator.modbus_planner import contiguous_runs
+    assert contiguous_runs({3: 1, 0: 1, 1: 0, 5: 1}) == \
+        [(0, [1, 0]), (3, [1]), (5, [1])]
@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+import time
+
+from gravity_controller_operator.fleet import FleetOperator
+from gravity_controller_operator.monitor import Monitor, MonitorWriter, \
+    percentiles
+
+
+def test_percentiles_nearest_rank():
+    assert percentiles([i / 100 for i in range(100)]) == {
+        "p50": 0.49, "p90": 0.89, "p99": 0.98}
+    assert percentiles([1.0, 2.0]) == {"p50": 1.0, "p90": 2.0, "p99": 2.0}
+    assert percentiles([3.0]) == {"p50": 3.0, "p90": 3.0, "p99": 3.0}
+    assert percentiles([]) == {"p50": None, "p90": None, "p99": None}
+
+
+def test_monitor_counts_polls_and_transitions():
+    fleet = FleetOperator(max_workers=2, update_cooldown=0)
+    fleet.register("flapping", "emulator_controller", pattern="periodic",
+                   rate=20.0, latency=0.002, seed=1)
+    fleet.register("broken", "emulator_controller")
+    # Каждое чтение второго устройства падает
+    fleet.get_device("broken").interface.di_interface.get_phys_dict = None
+    monitor = Monitor(fleet, rate_window=1.0)
+    fleet.start()
+    try:
+        time.sleep(0.5)
+    finally:
+        fleet.stop()
+    stats = monitor.get_stats()
+    flapping = stats["flapping"]
+    assert flapping["polls"] > 20 and flapping["errors"] == 0
+    assert flapping["polls_per_sec"] > 20
+    assert 0.002 <= flapping["latency"]["p50"] <= flapping["latency"]["p99"]
+    # 20 переключений/с на канал за 0.5 с
+    assert all(3 <= n <= 12 for n in flapping["transitions"]["di"].values())
+    assert len(flapping["states"]["di"]) == 4
+    assert stats["broken"]["polls"] == 0 and stats["broken"]["errors"] > 0
+    assert stats["broken"]["last_error"]
+    table = monitor.render(stats)
+    assert "flapping" in table and "DI " in table
+
+
+def test_monitor_chains_existing_poll_hook():
+    fleet = FleetOperator(max_workers=1, update_cooldown=0)
+    device = fleet.register("emu", "emulator_controller")
+    calls = []
+    device.on_poll = lambda duration, error: calls.append(error)
+    monitor = Monitor(fleet)
+    device.on_poll(0.001, None)
+    assert calls == [None]
+    assert monitor.get_stats()["emu"]["polls"] == 1
+    fleet.stop()
+
+
+def test_writer_formats():
+    stats = {"dev": {
+        "polls": 10, "errors": 1, "last_error": None, "polls_per_sec": 20.0,
+        "latency": {"p50": 0.001, "p90": 0.002, "p99": None},
+        "states": {"di": {1: True, 2: False}, "relays": {1: 1}},
+        "transitions": {"di": {2: 5}, "relays": {}}}}
+    csv_file, jsonl_file = io.StringIO(), io.StringIO()
+    MonitorWriter(csv_file, jsonl_file).write(stats, timestamp=1.0)
+    row = list(csv.DictReader(io.StringIO(csv_file.getvalue())))[0]
+    assert row["di"] == "10" and row["di_transitions"] == "0 5"
+    assert row["p50_ms"] == "1.000" and row["p99_ms"] == ""
+    record = json.loads(jsonl_file.getvalue())
+    assert record["device"] == "dev" and record["transitions"]["di"] == {"2": 5}
@@ -0,0 +1,79 @@
+from gravity_controller_operator.controllers_super import DIInterface, \
+    RelayInterface
+
+
+class FakeDI(DIInterface):
+    map_keys_amount = 8
+    starts_with = 0
+    spec_addr = {0: 7, 1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5}
+
+    def __init__(self):
+        self.phys = {i: False for i in range(8)}
+        super().__init__()
+
+    def get_phys_dict(self):
+        return dict(self.phys)
+
+
+class FakeRelay(RelayInterface):
+    map_keys_amount = 6
+    starts_with = 1
+    spec_addr = {1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5}
+
+    def __init__(self):
+        self.written = []
+        super().__init__()
+
+    def get_phys_dict(self):
+        return {i: False for i in range(6)}
+
+    def change_phys_relay_state(self, addr, state: bool):
+        self.written.append((addr, state))
+
+
+def test_spec_addr_mapping():
+    di = FakeDI()
+    di.phys[7] = True
+    di.update_from_device()
+    # Логические 0 и 7 оба смотрят на физический адрес 7
+    assert di.get_point(0)["state"] is True
+    assert di.get_point(7)["state"] is True
+    assert di.get_point(1)["state"] is False
+    assert di.get_point(0)["addr"] == 7
+
+
+def test_changed_marked_only_on_change():
+    di = FakeDI()
+    assert di.get_point(3)["changed"] is not None
+    di.phys[2] = True
+    di.update_from_device()
+    first = di.get_point(3)["changed"]
+    di.update_from_device()
+    assert di.get_point(3)["changed"] == first
+    assert di.get_point(4)["changed"] <= first
+
+
+def test_state_view_is_compatible():
+    di = FakeDI()
+    state = di.get_state()
+    assert list(state) == list(range(8))
+    assert state.get(1, {}).get("addr") == 0
+    assert state.to_dict()[1]["addr"] == 0
+    assert set(state[1]) == {"state", "changed", "addr"}
+    assert di.get_point(42) == {"error": "channel 42 not found"}
+
+
+def test_relay_change_uses_logical_channel():
+    relay = FakeRelay()
+    relay.change_relay_state(1, True)
+    assert relay.written == [(0, True)]
+    assert relay.get_point(1)["state"] is True
+    assert relay.get_point(2)["state"] is False
+
+
+def test_bulk_relay_change_maps_addresses():
+    relay = FakeRelay()
+    relay.change_relays_state({1: True, 3: True, 4: False})
+    assert relay.written == [(0, True), (2, True), (3, False)]
+    assert [relay.get_point(ch)["state"] for ch in (1, 2, 3, 4)] == \
+        [True, False, True, False]
@@ -0,0 +1,33 @@
+import pytest
+
+from gravity_controller_operator.controllers.emulator_contr import \
+    EmulatorController
+from gravity_controller_operator.main import ControllerOperator
+from gravity_controller_operator.polling import AdaptivePollRate
+
+
+def test_adaptive_rate_backs_off_and_resets():
+    rate = AdaptivePollRate(min_interval=0.1, max_interval=1.0, backoff=2)
+    intervals = [rate.observe_poll(False, 0.001) for _ in range(5)]
+    assert intervals == pytest.approx([0.2, 0.4, 0.8, 1.0, 1.0])
+    assert rate.observe_poll(True, 0.001) == pytest.approx(0.1)
+    rate.observe_poll(False, 0.001)
+    rate.notify_activity()
+    assert rate.effective_interval == pytest.approx(0.1)
+
+
+def test_adaptive_rate_respects_rtt():
+    rate = AdaptivePollRate(min_interval=0.01, max_interval=1.0, rtt_factor=2)
+    assert rate.observe_poll(True, 0.2) == pytest.approx(0.4)
+
+
+def test_operator_exposes_effective_rate():
+    operator = ControllerOperator(
+        EmulatorController(), auto_update_points=False, adaptive_polling=True,
+        min_update_cooldown=0.001, max_update_cooldown=0.004)
+    operator.update_points()
+    operator.update_points()
+    assert operator.update_cooldown > 0.001
+    operator.change_relay_state(1, 1)
+    assert operator.update_cooldown == pytest.approx(0.001)
+    assert operator.get_poll_stats()["mode"] == "adaptive"
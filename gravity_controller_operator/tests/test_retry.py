@@ -0,0 +1,225 @@
+import asyncio
+import time
+
+import pytest
+
+from gravity_controller_operator.controller_factory import ControllerCreator
+from gravity_controller_operator.controllers.emulator_contr import \
+    AsyncEmulatorController, EmulatorController, EmulatorDI
+from gravity_controller_operator.controllers_super import ControllerInterface
+from gravity_controller_operator.exceptions import DeviceError, DeviceUnavailable
+from gravity_controller_operator import main
+from gravity_controller_operator.main import AsyncControllerOperator, \
+    ControllerOperator
+from gravity_controller_operator.retry import CircuitBreaker, DeviceGuard, \
+    RetryPolicy
+from gravity_controller_operator.simulators.registry import get_simulator
+
+
+class FlakyDI(EmulatorDI):
+    # Первые fail_reads чтений устройство не отвечает
+    fail_reads = 0
+
+    def __init__(self):
+        self.reads = 0
+        super().__init__()
+
+    def get_phys_dict(self):
+        self.reads += 1
+        if self.reads <= self.fail_reads:
+            return {"error": "No response from controller"}
+        return super().get_phys_dict()
+
+
+def test_retry_policy_recovers_within_deadline():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise OSError("timeout")
+        return "ok"
+
+    policy = RetryPolicy(deadline=1.0, base_delay=0.001, jitter=0)
+    assert policy.call(flaky) == ("ok", 2)
+
+
+def test_retry_policy_stops_at_deadline():
+    def dead():
+        raise OSError("timeout")
+
+    policy = RetryPolicy(deadline=0.05, base_delay=0.01, max_delay=0.02)
+    started = time.monotonic()
+    with pytest.raises(OSError):
+        policy.call(dead)
+    assert time.monotonic() - started < 0.1
+
+
+@pytest.mark.parametrize("model", ["arm_k210", "moxa_e1214", "netping_relay"])
+def test_deadline_bounds_hung_attempt(model):
+    with get_simulator(model) as simulator:
+        # Таймаут драйвера намного больше бюджета вызова
+        controller = ControllerCreator.get_controller(
+            model, **dict(simulator.controller_kwargs(0), timeout=30))
+        guard = controller.interface.di_interface.device_guard
+        guard.retry_policy = RetryPolicy(deadline=0.3)
+        simulator.faults.configure(drop_rate=1.0)
+        started = time.monotonic()
+        with pytest.raises(DeviceError):
+            controller.interface.update_all()
+        assert time.monotonic() - started < 0.5
+
+
+def test_async_deadline_bounds_hung_attempt():
+    async def hung():
+        await asyncio.sleep(10)
+
+    policy = RetryPolicy(deadline=0.1)
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(policy.call_async(hung))
+    assert time.monotonic() - started < 0.3
+
+
+def test_breaker_opens_and_probes_after_timeout():
+    guard = DeviceGuard(RetryPolicy(max_attempts=1),
+                        CircuitBreaker(failure_threshold=2, reset_timeout=0.05),
+                        name="gate_1")
+
+    def dead():
+        raise OSError("timeout")
+
+    for _ in range(2):
+        with pytest.raises(DeviceError):
+            guard.call(dead)
+    with pytest.raises(DeviceUnavailable, match="gate_1"):
+        guard.call(lambda: "never called")
+    assert guard.get_health()["state"] == "open"
+    time.sleep(0.06)
+    # Пробный вызов после паузы замыкает предохранитель
+    assert guard.call(lambda: "ok") == "ok"
+    health = guard.get_health()
+    assert health["state"] == "closed"
+    assert health["consecutive_failures"] == 0
+
+
+def test_failed_probe_doubles_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01,
+                             max_reset_timeout=0.03)
+    breaker.record_failure(OSError())
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure(OSError())
+    assert breaker.current_timeout == pytest.approx(0.02)
+
+
+def test_interface_survives_dead_device_at_start():
+    FlakyDI.fail_reads = 100
+    di = FlakyDI()
+    di.device_guard.retry_policy = RetryPolicy(max_attempts=1)
+    interface = ControllerInterface(di_interface=di)
+    assert di.get_state()[1]["state"] is None
+    assert interface.get_health()["last_error"] is not None
+
+    FlakyDI.fail_reads = 0
+    di.reads = 0
+    di.device_guard.breaker.state = CircuitBreaker.CLOSED
+    interface.update_all()
+    assert di.get_state()[1]["state"] == 0
+    assert interface.get_health()["state"] == "closed"
+
+
+def failing_write(addr_or_states, state=None):
+    raise OSError("write timeout")
+
+
+def test_failed_write_keeps_relay_state():
+    controller = EmulatorController()
+    operator = ControllerOperator(controller, auto_update_points=False,
+                                  update_cooldown=0)
+    relay = controller.interface.relay_interface
+    relay.device_guard.retry_policy = RetryPolicy(max_attempts=1)
+    relay.device_guard.breaker.failure_threshold = 2
+    relay.change_phys_relay_state = failing_write
+    relay.change_phys_relays_state = failing_write
+    events = []
+    operator.subscribe(events.append)
+
+    with pytest.raises(DeviceError):
+        operator.change_relay_state(1, 1)
+    with pytest.raises(DeviceError):
+        operator.change_relays_state({1: 1, 2: 1})
+    # Предохранитель разомкнут: запись не отправляется, состояние прежнее
+    with pytest.raises(DeviceUnavailable):
+        operator.change_relay_state(1, 1)
+    assert operator.get_relay_state(1)["state"] == 0
+    assert operator.get_relay_state(2)["state"] == 0
+    assert controller.device.relay_mask == 0
+    assert events == []
+
+
+def test_async_failed_write_keeps_relay_state():
+    controller = AsyncEmulatorController()
+    relay = controller.interface.relay_interface
+    relay.device_guard.retry_policy = RetryPolicy(max_attempts=1)
+
+    async def failing(*args):
+        raise OSError("write timeout")
+
+    async def scenario():
+        await relay.update_from_device()
+        relay.change_phys_relays_state = failing
+        with pytest.raises(DeviceError):
+            await relay.change_relays_state({1: 1})
+        assert relay.get_state()[1]["state"] == 0
+
+    asyncio.run(scenario())
+
+
+def broken_snapshots(monkeypatch, skip, failures):
+    # Первые skip снимков (конструктор, start()) проходят, затем failures
+    # падают
+    calls = []
+    from_interface = main.ControllerSnapshot.from_interface
+
+    def flaky(interface, seq=0):
+        calls.append(seq)
+        if skip < len(calls) <= skip + failures:
+            raise RuntimeError("snapshot failed")
+        return from_interface(interface, seq)
+
+    monkeypatch.setattr(main.ControllerSnapshot, "from_interface", flaky)
+    monkeypatch.setattr(main, "ERROR_BACKOFF_MIN", 0.01)
+
+
+def test_poll_loop_survives_unexpected_errors(monkeypatch):
+    broken_snapshots(monkeypatch, skip=1, failures=3)
+    operator = ControllerOperator(EmulatorController(), update_cooldown=0.01)
+    try:
+        deadline = time.monotonic() + 2.0
+        while operator.get_snapshot().seq < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert operator.get_snapshot().seq >= 4
+    finally:
+        operator.auto_update_points_enabled = False
+
+
+def test_async_poll_loop_survives_unexpected_errors(monkeypatch):
+    broken_snapshots(monkeypatch, skip=2, failures=3)
+
+    async def scenario():
+        operator = AsyncControllerOperator(AsyncEmulatorController(),
+                                           update_cooldown=0.01)
+        await operator.start()
+        try:
+            for _ in range(200):
+                if operator.get_snapshot().seq >= 5:
+                    break
+                await asyncio.sleep(0.01)
+            assert operator.get_snapshot().seq >= 5
+            assert not operator._task.done()
+        finally:
+            await operator.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,105 @@
+import pickle
+import threading
+import time
+
+import pytest
+
+from gravity_controller_operator.controllers.emulator_contr import \
+    EmulatorController
+from gravity_controller_operator.exceptions import DeviceError, \
+    DeviceUnavailable, UnknownController
+from gravity_controller_operator.main import ControllerOperator
+from gravity_controller_operator.sharded import SharedSlot, \
+    ShardedFleetOperator, _layout
+
+
+def wait_polled(sharded, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(s["polls"] for s in sharded.get_stats(timeout).values()):
+            return
+        time.sleep(0.01)
+    raise TimeoutError
+
+
+def test_sharded_points_and_commands():
+    # Эмулятор при опросе возвращает реле в 0 - опрос редкий
+    sharded = ShardedFleetOperator(processes=2, update_cooldown=30)
+    for i in range(5):
+        sharded.register(f"emu_{i}", "emulator_controller")
+    with sharded:
+        wait_polled(sharded)
+        stats = sharded.get_stats()
+        assert {stats[f"emu_{i}"]["shard"] for i in range(5)} == {0, 1}
+        sharded.change_relay_state("emu_3", 2, 1, timeout=10)
+        points = sharded.get_points()
+        assert points["emu_3"]["relays"][2]["state"] == 1
+        assert points["emu_3"]["relays"][2]["changed"] is not None
+        assert points["emu_1"]["relays"][2]["state"] == 0
+        assert sharded.get_point("emu_0", "di", 1)["state"] == 0
+        assert sharded.get_points()["emu_0"] is points["emu_0"]
+
+
+def test_register_validates_model():
+    sharded = ShardedFleetOperator(processes=1)
+    with pytest.raises(UnknownController):
+        sharded.register("x", "no_such_model")
+
+
+def test_device_unavailable_pickles():
+    error = pickle.loads(pickle.dumps(DeviceUnavailable("gate_1", 2.5)))
+    assert error.retry_in == 2.5
+    assert "gate_1" in str(error)
+
+
+def make_slot(writer_alive=None):
+    controller = EmulatorController()
+    operator = ControllerOperator(controller, auto_update_points=False)
+    layout = _layout(controller)
+    buf = memoryview(bytearray(SharedSlot.size_of(layout)))
+    return SharedSlot(buf, 0, layout, writer_alive), operator.get_snapshot()
+
+
+def test_slot_read_gives_up_on_stuck_writer():
+    slot, snapshot = make_slot(writer_alive=lambda: False)
+    slot.write(snapshot)
+    # Писатель умер посреди записи: seq остался нечётным
+    slot.seq[0] += 1
+    with pytest.raises(DeviceError, match="exited"):
+        slot.read()
+    slot.writer_alive = lambda: True
+    slot.read_timeout = 0.05
+    started = time.monotonic()
+    with pytest.raises(DeviceError):
+        slot.read()
+    assert time.monotonic() - started < 0.5
+
+
+def test_slot_concurrent_writers():
+    slot, snapshot = make_slot()
+
+    def write():
+        for _ in range(500):
+            slot.write(snapshot)
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert slot.seq[0] == 2 * 4 * 500
+    assert slot.read()[0] == slot.seq[0]
+
+
+def test_dead_shard_does_not_hang_reads():
+    sharded = ShardedFleetOperator(processes=1, update_cooldown=30)
+    sharded.register("emu_0", "emulator_controller")
+    with sharded:
+        wait_polled(sharded)
+        sharded.get_points()
+        shard = sharded._shards[0]
+        shard.process.terminate()
+        shard.process.join()
+        sharded._slots["emu_0"].seq[0] += 1
+        with pytest.raises(DeviceError):
+            sharded.get_points()
@@ -0,0 +1,111 @@
+import pytest
+import requests
+from pyModbusTCP.client import ModbusClient
+
+from gravity_controller_operator.controller_factory import ControllerCreator
+from gravity_controller_operator.exceptions import DeviceError
+from gravity_controller_operator.main import ControllerOperator
+from gravity_controller_operator.simulators.faults import FaultInjector
+from gravity_controller_operator.simulators.modbus_tcp import \
+    ModbusTCPSimulator
+from gravity_controller_operator.simulators.moxa import MoxaSimulator
+from gravity_controller_operator.simulators.netping import NetPingSimulator
+from gravity_controller_operator.simulators.registry import SIMULATORS, \
+    get_simulator
+
+PROTOCOL_MODELS = sorted(set(SIMULATORS) - {"emulator_controller"})
+
+
+def make_operator(simulator):
+    controller = ControllerCreator.get_controller(
+        simulator.model, **simulator.controller_kwargs(0))
+    return ControllerOperator(controller, auto_update_points=False,
+                              update_cooldown=0)
+
+
+def test_fault_injector_is_seeded_and_validated():
+    rolls = [FaultInjector(drop_rate=0.2, error_rate=0.3, seed=7)
+             for _ in range(2)]
+    sequences = [[faults.decide() for _ in range(1000)] for faults in rolls]
+    assert sequences[0] == sequences[1]
+    counts = rolls[0].get_stats()
+    assert 150 < counts["drop"] < 250 and 250 < counts["error"] < 350
+    assert counts["reset"] == 0
+    with pytest.raises(ValueError):
+        FaultInjector(drop_rate=0.6, reset_rate=0.6)
+    with pytest.raises(TypeError):
+        rolls[0].configure(loss=0.1)
+
+
+@pytest.mark.parametrize("model", sorted(SIMULATORS))
+def test_drivers_round_trip(model):
+    with get_simulator(model) as simulator:
+        operator = make_operator(simulator)
+        channel = next(iter(operator.get_points()["relays"]))
+        operator.change_relay_state(channel, 1)
+        operator.update_points()
+        assert operator.get_point("relays", channel)["state"] == 1
+
+
+def test_modbus_exceptions():
+    with ModbusTCPSimulator() as simulator:
+        simulator.data.input_registers[2] = 1
+        client = ModbusClient(host="127.0.0.1", port=simulator.port, timeout=1)
+        assert client.read_input_registers(0, 4) == [0, 0, 1, 0]
+        assert client.read_input_registers(10, 10) is None
+        assert client.last_except == 2
+        assert client.write_single_coil(3, True)
+        assert client.read_holding_registers(3, 1) == [1]
+        simulator.faults.configure(error_rate=1.0)
+        assert client.read_coils(0, 1) is None
+        assert client.last_except == 4
+        client.close()
+
+
+@pytest.mark.parametrize("fault", ["error_rate", "reset_rate"])
+@pytest.mark.parametrize("model", PROTOCOL_MODELS)
+def test_faults_surface_as_device_errors(model, fault):
+    with get_simulator(model) as simulator:
+        operator = make_operator(simulator)
+        simulator.faults.configure(**{fault: 1.0})
+        with pytest.raises(DeviceError):
+            operator.update_points()
+        simulator.faults.configure(**{fault: 0.0})
+        operator.update_points()
+
+
+def test_dropped_http_reply_times_out():
+    with MoxaSimulator(drop_rate=1.0, drop_hold=2.0) as simulator:
+        client = requests.Session()
+        with pytest.raises(requests.Timeout):
+            client.get(f"http://127.0.0.1:{simulator.port}/api/slot/0/io",
+                       headers={"Accept": "vdn.dac.v1"}, timeout=0.2)
+        assert simulator.faults.get_stats()["drop"] == 1
+
+
+def test_http_request_checks():
+    with MoxaSimulator() as simulator:
+        url = f"http://127.0.0.1:{simulator.port}/api/slot/0/io"
+        assert requests.get(url).status_code == 406
+        assert requests.get(url, headers={"Accept": "vdn.dac.v1"}).ok
+    with NetPingSimulator(username="visor", password="ping") as simulator:
+        url = f"http://127.0.0.1:{simulator.port}/io.cgi?io"
+        assert requests.get(url).status_code == 401
+        assert requests.get(url, auth=("visor", "ping")).text.startswith(
+            "io_result('ok'")
+        make_operator(simulator).update_points()
+
+
+def test_unsupported_method_and_relay_state():
+    with NetPingSimulator() as simulator:
+        base = f"http://127.0.0.1:{simulator.port}"
+        session = requests.Session()
+        assert session.put(f"{base}/relay.cgi?r1=1").status_code == 405
+        # После 405 обработчик жив и держит то же соединение
+        assert "error" in session.get(f"{base}/relay.cgi?r1=True").text
+        assert simulator.connections == 1
+        assert simulator.relays[1] == 0
+        session.close()
+        operator = make_operator(simulator)
+        operator.change_relay_state(1, True)
+        assert simulator.relays[1] == 1
@@ -0,0 +1,57 @@
+import json
+import time
+from collections.abc import Mapping
+
+from gravity_controller_operator.controllers.emulator_contr import \
+    EmulatorController
+from gravity_controller_operator.main import ControllerOperator
+
+
+def make_operator():
+    return ControllerOperator(
+        EmulatorController(), auto_update_points=False, update_cooldown=0)
+
+
+def test_snapshot_is_immutable():
+    operator = make_operator()
+    operator.change_relay_state(1, 1)
+    before = operator.get_points()
+    operator.change_relay_state(1, 0)
+    operator.update_points()
+    after = operator.get_points()
+    assert before["relays"][1]["state"] == 1
+    assert after["relays"][1]["state"] == 0
+    assert after.seq > before.seq
+    assert after.to_dict()["relays"][1]["state"] == 0
+
+
+def test_snapshot_contract():
+    operator = make_operator()
+    operator.change_relay_state(1, 1)
+    points = operator.get_points()
+    assert isinstance(points["di"], Mapping)
+    assert isinstance(points["relays"], Mapping)
+    assert not isinstance(points["relays"], dict)
+    relays = json.loads(json.dumps(points.to_dict(), default=str))["relays"]
+    assert relays["1"]["state"] == 1
+
+
+def test_snapshot_reuses_unchanged_tables():
+    operator = make_operator()
+    operator.update_points()
+    first = operator.get_snapshot()
+    operator.update_points()
+    second = operator.get_snapshot()
+    assert first is not second
+    assert first.get_table("di") is second.get_table("di")
+
+
+def test_reads_do_not_block():
+    operator = make_operator()
+    started = time.monotonic()
+    with operator.mutex:
+        for _ in range(100):
+            operator.get_points()
+            operator.get_point("di", 1)
+    assert time.monotonic() - started < 0.1
+    assert operator.get_point("di", 99) == {"error": "channel 99 not found"}
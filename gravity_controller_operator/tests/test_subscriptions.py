@@ -0,0 +1,58 @@
+import asyncio
+
+from gravity_controller_operator.controllers.emulator_contr import \
+    EmulatorController
+from gravity_controller_operator.main import ControllerOperator
+
+
+def make_operator():
+    controller = EmulatorController()
+    return controller, ControllerOperator(
+        controller, auto_update_points=False, update_cooldown=0)
+
+
+def test_callback_only_on_change():
+    controller, operator = make_operator()
+    events = []
+    operator.subscribe(events.append)
+    operator.update_points()
+    assert events == []
+    operator.change_relay_state(2, 1)
+    operator.change_relay_state(2, 1)
+    assert [(e.typ, e.channel, e.old, e.new) for e in events] == \
+        [("relays", 2, 0, 1)]
+    # Эмулятор хранит записанное состояние - опрос его подтверждает
+    operator.update_points()
+    assert len(events) == 1
+    operator.change_relay_state(2, 0)
+    assert [(e.channel, e.old, e.new) for e in events[1:]] == [(2, 1, 0)]
+
+
+def test_queue_filters():
+    controller, operator = make_operator()
+    sub = operator.subscribe_queue(channels=[3], types=["relays"])
+    operator.change_relay_state(1, 1)
+    operator.change_relay_state(3, 1)
+    event = sub.get(timeout=1)
+    assert (event.typ, event.channel, event.new) == ("relays", 3, 1)
+    assert sub.queue.empty()
+    sub.cancel()
+    operator.change_relay_state(3, 0)
+    assert sub.queue.empty()
+
+
+def test_async_iterator():
+    controller, operator = make_operator()
+
+    async def scenario():
+        events = operator.iter_events(types=["relays"])
+        pending = asyncio.ensure_future(events.__anext__())
+        await asyncio.sleep(0)
+        operator.change_relay_state(4, 1)
+        event = await asyncio.wait_for(pending, 1)
+        await events.aclose()
+        return event
+
+    event = asyncio.run(scenario())
+    assert (event.channel, event.new) == (4, 1)
+    assert not operator.subscriptions._subscriptions
@@ -13,7 +13,11 @@ setup(
     install_requires=[
         "pyModbusTCP",
         "pymodbus==3.6.9",
+        "importlib_metadata; python_version < '3.8'",
     ],
+    extras_require={
+        "async": ["aiohttp"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "Operating System :: OS Independent",